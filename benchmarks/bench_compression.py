@@ -0,0 +1,95 @@
+"""
+Benchmark compression of typical payloads
+
+Reports bytes saved and CPU cost of compressing/decompressing typical
+Metrifox payloads with gzip, and with brotli and zstandard when installed.
+
+Usage (with the SDK installed, e.g. ``pip install -e .``):
+    python benchmarks/bench_compression.py
+"""
+
+import gzip
+import json
+import timeit
+
+from metrifox_sdk.compression import GZIP_LEVEL
+
+CUSTOMERS_PAGE = {
+    "data": [
+        {
+            "customer_key": f"cust_{i:06d}",
+            "customer_type": "BUSINESS" if i % 3 else "INDIVIDUAL",
+            "primary_email": f"user{i}@example.com",
+            "display_name": f"Customer {i}",
+            "currency": "USD",
+            "timezone": "America/New_York",
+            "created_at": f"2025-09-{i % 28 + 1:02d}T12:00:00Z",
+        }
+        for i in range(100)
+    ],
+    "meta": {"page": 1, "per_page": 100, "total": 10000},
+}
+
+BILLING_HISTORY = {
+    "data": [
+        {
+            "id": f"inv_{i:08d}",
+            "amount": 4900 + i,
+            "currency": "USD",
+            "status": "paid",
+            "description": "Premium plan - monthly",
+            "created_at": f"20{20 + i // 12}-{i % 12 + 1:02d}-01T00:00:00Z",
+        }
+        for i in range(60)
+    ]
+}
+
+USAGE_EVENTS = [
+    {
+        "customer_key": f"cust_{i % 50:06d}",
+        "event_name": "api_call",
+        "event_id": f"evt_{i:012d}",
+        "quantity": 1,
+        "timestamp": 1760000000000 + i,
+        "metadata": {"source": "web_app"},
+    }
+    for i in range(500)
+]
+
+
+def codecs():
+    yield f"gzip-{GZIP_LEVEL}", lambda b: gzip.compress(b, GZIP_LEVEL, mtime=0), gzip.decompress
+    yield "gzip-1", lambda b: gzip.compress(b, 1, mtime=0), gzip.decompress
+    try:
+        import brotli
+        yield "br-4", lambda b: brotli.compress(b, quality=4), brotli.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        compressor, decompressor = zstandard.ZstdCompressor(level=3), zstandard.ZstdDecompressor()
+        yield "zstd-3", compressor.compress, decompressor.decompress
+    except ImportError:
+        pass
+
+
+def run(name, payload, number=200):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    print(f"\n{name}: {len(body)} bytes")
+    for codec_name, compress, decompress in codecs():
+        compressed = compress(body)
+        compress_time = min(timeit.repeat(lambda: compress(body), number=number, repeat=3)) / number
+        decompress_time = (
+            min(timeit.repeat(lambda: decompress(compressed), number=number, repeat=3)) / number
+        )
+        print(
+            f"  {codec_name:<8} {len(compressed):7d} bytes "
+            f"({1 - len(compressed) / len(body):5.1%} saved)  "
+            f"compress {compress_time * 1e6:7.1f} us  decompress {decompress_time * 1e6:6.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    run("Customers page (100 customers)", CUSTOMERS_PAGE)
+    run("Billing history (60 entries)", BILLING_HISTORY)
+    run("Usage events (500 events)", USAGE_EVENTS)
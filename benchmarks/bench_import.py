@@ -0,0 +1,72 @@
+"""
+Benchmark the cold import time of the SDK
+
+Measures ``import metrifox_sdk`` (and client construction) in fresh
+interpreters and lists any heavy dependencies loaded. Pass ``--max-ms`` to
+fail when the median import time exceeds a budget, e.g. in CI.
+
+Usage (with the SDK installed, e.g. ``pip install -e .``):
+    python benchmarks/bench_import.py [--runs 20] [--max-ms 25]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("requests", "urllib3", "httpx", "charset_normalizer", "idna", "orjson")
+
+SCENARIOS = {
+    "import metrifox_sdk": "import metrifox_sdk",
+    "construct client": (
+        "from metrifox_sdk import MetrifoxClient\n"
+        "MetrifoxClient(api_key='test').usages"
+    ),
+}
+
+
+def time_scenario(code, runs):
+    """Median wall time of running code in a fresh interpreter, minus interpreter startup"""
+    def run(source):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", source], check=True)
+        return time.perf_counter() - start
+
+    baseline = statistics.median(run("pass") for _ in range(runs))
+    return max(statistics.median(run(code) for _ in range(runs)) - baseline, 0.0)
+
+
+def heavy_modules_loaded(code):
+    script = (
+        f"import sys\n{code}\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return output.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, help="Fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    failed = False
+    for name, code in SCENARIOS.items():
+        elapsed_ms = time_scenario(code, args.runs) * 1000
+        heavy = heavy_modules_loaded(code)
+        print(
+            f"{name:<22}: {elapsed_ms:6.1f} ms  heavy modules loaded: {', '.join(heavy) or 'none'}"
+        )
+        if args.max_ms is not None and name == "import metrifox_sdk" and elapsed_ms > args.max_ms:
+            failed = True
+
+    if failed:
+        print(f"Import time budget of {args.max_ms} ms exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
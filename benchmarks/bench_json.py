@@ -0,0 +1,89 @@
+"""
+Benchmark JSON encoding/decoding per API call
+
+Compares the previous path (``requests``' ``json=`` encoding plus
+``response.json()`` decoding) with the codecs in ``metrifox_sdk.serialization``.
+
+Usage (with the SDK installed, e.g. ``pip install -e .``):
+    python benchmarks/bench_json.py
+"""
+
+import json
+import timeit
+
+import requests
+from requests.models import PreparedRequest
+
+from metrifox_sdk.serialization import JSONCodec, OrjsonCodec
+
+USAGE_EVENT = {
+    "customer_key": "cust_8f14e45fceea167a",
+    "event_name": "api_call",
+    "event_id": "evt_c9f0f895fb98ab9159f51fd0297e236d",
+    "feature_key": "premium_feature",
+    "quantity": 3,
+    "credit_used": 15,
+    "timestamp": 1760000000000,
+    "metadata": {"source": "web_app", "session_id": "sess_xyz", "region": "eu-west-1"},
+}
+
+CUSTOMERS_PAGE = {
+    "data": [
+        {
+            "customer_key": f"cust_{i}",
+            "customer_type": "INDIVIDUAL",
+            "primary_email": f"user{i}@example.com",
+            "first_name": "Test",
+            "last_name": "User",
+            "currency": "USD",
+            "timezone": "America/New_York",
+            "created_at": "2025-09-01T12:00:00Z",
+        }
+        for i in range(100)
+    ],
+    "meta": {"page": 1, "per_page": 100, "total": 10000},
+}
+
+
+def requests_path(payload, body):
+    """Encode like requests' json= and decode like response.json()"""
+    prepared = PreparedRequest()
+    prepared.prepare_headers({})
+    prepared.prepare_body(data=None, files=None, json=payload)
+    response = requests.Response()
+    response._content = body
+    response.encoding = None
+    return response.json()
+
+
+def codec_path(codec, payload, body):
+    """Encode and decode with an SDK codec"""
+    codec.dumps(payload)
+    return codec.loads(body)
+
+
+def run(name, payload, number):
+    body = json.dumps(payload).encode("utf-8")
+    baseline = min(timeit.repeat(lambda: requests_path(payload, body), number=number, repeat=5))
+    print(f"\n{name} ({len(body)} bytes, {number} calls)")
+    print(f"  requests json=/response.json(): {baseline / number * 1e6:8.2f} us/call")
+
+    codecs = [JSONCodec()]
+    try:
+        codecs.append(OrjsonCodec())
+    except ImportError:
+        print("  orjson not installed, skipping")
+
+    for codec in codecs:
+        elapsed = min(
+            timeit.repeat(lambda: codec_path(codec, payload, body), number=number, repeat=5)
+        )
+        print(
+            f"  {codec.name:<30}: {elapsed / number * 1e6:8.2f} us/call "
+            f"({baseline / elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    run("Usage event", USAGE_EVENT, 20000)
+    run("Customers page", CUSTOMERS_PAGE, 500)
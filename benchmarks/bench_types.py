@@ -0,0 +1,79 @@
+"""
+Benchmark request type serialisation
+
+Compares the slotted request types' ``to_dict`` with the previous
+``dataclasses.asdict`` based implementation, measuring time and bytes
+allocated per usage event.
+
+Usage (with the SDK installed, e.g. ``pip install -e .``):
+    python benchmarks/bench_types.py
+"""
+
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from metrifox_sdk.types import UsageEventRequest
+
+
+@dataclass
+class LegacyUsageEventRequest:
+    """The pre-slots implementation, kept for comparison"""
+    customer_key: str
+    event_id: str
+    event_name: Optional[str] = None
+    feature_key: Optional[str] = None
+    amount: int = 1
+    credit_used: Optional[int] = None
+    timestamp: Optional[int] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        if 'amount' in data:
+            data['quantity'] = data.pop('amount')
+        return {k: v for k, v in data.items() if v is not None}
+
+
+KWARGS = dict(
+    customer_key="cust_8f14e45fceea167a",
+    event_id="evt_c9f0f895fb98ab9159f51fd0297e236d",
+    event_name="api_call",
+    amount=3,
+    timestamp=1760000000000,
+    metadata={"source": "web_app", "session_id": "sess_xyz", "tags": ["a", "b"]},
+)
+
+
+def allocated_per_event(cls, count=10000):
+    """Peak bytes allocated per event while building and serialising events"""
+    tracemalloc.start()
+    events = [cls(**KWARGS).to_dict() for _ in range(count)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return peak / count
+
+
+def main():
+    number = 50000
+    print(f"Usage event construction + to_dict ({number} events)")
+    results = {}
+    for name, cls in (
+        ("dataclasses.asdict", LegacyUsageEventRequest),
+        ("slotted", UsageEventRequest),
+    ):
+        elapsed = min(timeit.repeat(lambda: cls(**KWARGS).to_dict(), number=number, repeat=5))
+        results[name] = (elapsed / number * 1e6, allocated_per_event(cls))
+
+    legacy_time, legacy_bytes = results["dataclasses.asdict"]
+    for name, (per_call, per_event) in results.items():
+        print(
+            f"  {name:<20}: {per_call:6.2f} us/event ({legacy_time / per_call:.1f}x), "
+            f"{per_event:7.0f} bytes/event ({legacy_bytes / per_event:.1f}x less)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,137 @@ Metrifox SDK for Python
 A Python SDK for interacting with the Metrifox platform API.
 """
 
-from .client import MetrifoxClient, init
-from .exceptions import MetrifoxError, APIError, ConfigurationError
-from .subscriptions import SubscriptionsModule
-from .types import (
-    CustomerCreateRequest,
-    CustomerUpdateRequest,
-    CustomerListRequest,
-    UsageEventRequest,
-    AccessCheckRequest,
-    CheckoutConfig,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+from .exceptions import MetrifoxError, APIError, ConfigurationError, TransportError, QueueFullError
+
+if TYPE_CHECKING:
+    from .client import MetrifoxClient, init, shared_client
+    from .base import AsyncBaseClient
+    from .transport import (
+        Transport,
+        TransportResponse,
+        StreamingResponse,
+        RequestsTransport,
+        HTTP2Transport,
+        AsyncTransport,
+        AsyncHTTPXTransport,
+        MockTransport,
+        AsyncMockTransport,
+    )
+    from .retry import RetryPolicy
+    from .limits import AdaptiveLimiter, AIMDLimit, GradientLimit
+    from .priority import Priority, request_priority
+    from .sharding import ShardedMetrifoxClient
+    from .snapshot import EntitlementSnapshot, UsageReplayQueue, SnapshotRefresher
+    from .subscriptions import SubscriptionsModule
+    from .models import (
+        Response,
+        RawResponse,
+        Customer,
+        CustomerDetails,
+        AccessCheck,
+        UsageEvent,
+        BillingHistoryEntry,
+        Entitlement,
+    )
+    from .types import (
+        CustomerCreateRequest,
+        CustomerUpdateRequest,
+        CustomerListRequest,
+        UsageEventRequest,
+        AccessCheckRequest,
+        CheckoutConfig,
+    )
+
+# Public names are imported from their submodule on first access, so
+# `import metrifox_sdk` stays cheap (and does not import the HTTP stack)
+_LAZY_ATTRIBUTES = {
+    "MetrifoxClient": ".client",
+    "init": ".client",
+    "shared_client": ".client",
+    "AsyncBaseClient": ".base",
+    "Transport": ".transport",
+    "TransportResponse": ".transport",
+    "StreamingResponse": ".transport",
+    "RequestsTransport": ".transport",
+    "HTTP2Transport": ".transport",
+    "AsyncTransport": ".transport",
+    "AsyncHTTPXTransport": ".transport",
+    "MockTransport": ".transport",
+    "AsyncMockTransport": ".transport",
+    "RetryPolicy": ".retry",
+    "AdaptiveLimiter": ".limits",
+    "AIMDLimit": ".limits",
+    "GradientLimit": ".limits",
+    "Priority": ".priority",
+    "request_priority": ".priority",
+    "ShardedMetrifoxClient": ".sharding",
+    "EntitlementSnapshot": ".snapshot",
+    "UsageReplayQueue": ".snapshot",
+    "SnapshotRefresher": ".snapshot",
+    "SubscriptionsModule": ".subscriptions",
+    "Response": ".models",
+    "RawResponse": ".models",
+    "Customer": ".models",
+    "CustomerDetails": ".models",
+    "AccessCheck": ".models",
+    "UsageEvent": ".models",
+    "BillingHistoryEntry": ".models",
+    "Entitlement": ".models",
+    "CustomerCreateRequest": ".types",
+    "CustomerUpdateRequest": ".types",
+    "CustomerListRequest": ".types",
+    "UsageEventRequest": ".types",
+    "AccessCheckRequest": ".types",
+    "CheckoutConfig": ".types",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 __version__ = "1.1.1"
 __all__ = [
     "MetrifoxClient",
     "init",
+    "shared_client",
     "MetrifoxError",
     "APIError",
     "ConfigurationError",
+    "TransportError",
+    "QueueFullError",
+    "Transport",
+    "RequestsTransport",
+    "TransportResponse",
+    "StreamingResponse",
+    "HTTP2Transport",
+    "AsyncTransport",
+    "AsyncHTTPXTransport",
+    "MockTransport",
+    "AsyncMockTransport",
+    "AsyncBaseClient",
+    "RetryPolicy",
+    "AdaptiveLimiter",
+    "AIMDLimit",
+    "GradientLimit",
+    "Priority",
+    "request_priority",
+    "ShardedMetrifoxClient",
+    "EntitlementSnapshot",
+    "UsageReplayQueue",
+    "SnapshotRefresher",
     "CustomerCreateRequest",
     "CustomerUpdateRequest",
     "CustomerListRequest",
@@ -29,4 +141,12 @@ __all__ = [
     "AccessCheckRequest",
     "CheckoutConfig",
     "SubscriptionsModule",
+    "Response",
+    "RawResponse",
+    "Customer",
+    "CustomerDetails",
+    "AccessCheck",
+    "UsageEvent",
+    "BillingHistoryEntry",
+    "Entitlement",
 ]
@@ -0,0 +1,400 @@
+"""
+Cross-process usage aggregation for Metrifox SDK
+
+In prefork deployments every worker process recording usage on its own
+multiplies the outbound requests and connections per host. Instead, one
+collector process per host listens on a Unix datagram socket; workers hand
+their usage events to it and return immediately. The collector drops
+duplicate ``event_id``s, optionally merges events that differ only in
+quantity, and forwards them through :class:`~metrifox_sdk.usages.UsagesModule`
+from a single connection pool.
+
+Run the collector as a sidecar process:
+
+    METRIFOX_API_KEY=... python -m metrifox_sdk.aggregator --socket /tmp/metrifox-usage.sock
+
+and point the workers' clients at it:
+
+    client = MetrifoxClient(usage_collector="/tmp/metrifox-usage.sock")
+"""
+
+import argparse
+import hashlib
+import os
+import signal
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import fork
+from .exceptions import APIError, ConfigurationError
+from .retry import RetryPolicy
+from .serialization import JSONCodec, get_default_codec
+
+# Comfortably below the default Linux limit for a single Unix datagram
+MAX_DATAGRAM_SIZE = 64 * 1024
+
+_Retry = Tuple[Dict[str, Any], List[Dict[str, Any]], int, float, float]
+
+
+class UsageCollectorClient:
+    """
+    Worker-side handle for sending usage events to a :class:`UsageCollector`
+
+    Sending never blocks: if the collector is not running or its queue is
+    full, :meth:`send` returns False and the caller records the event directly.
+
+    Args:
+        address: Path of the collector's Unix socket
+        codec: JSON codec used to encode events (optional)
+    """
+
+    def __init__(self, address: str, codec: Optional[JSONCodec] = None):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ConfigurationError("The usage collector requires Unix domain sockets")
+        self.address = address
+        self.codec = codec or get_default_codec()
+        self._socket = None
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._socket = None
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        Hand a usage event to the collector
+
+        Returns:
+            True if the collector accepted the event, False otherwise
+        """
+        data = self.codec.dumps(event)
+        if len(data) > MAX_DATAGRAM_SIZE:
+            return False
+        with self._lock:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._socket.setblocking(False)
+            try:
+                self._socket.sendto(data, self.address)
+            except OSError:
+                return False
+        return True
+
+    def close(self) -> None:
+        """Close the socket"""
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+
+class UsageCollector:
+    """
+    Per-host collector that batches, dedups and forwards usage events
+
+    Args:
+        usages: Usages module used to forward events. It must not itself be
+            configured with a usage collector
+        address: Path of the Unix socket to listen on
+        flush_interval: Seconds between flushes
+        max_batch_size: Flush early once this many events are pending
+        max_workers: Maximum number of concurrent forwarding requests
+        aggregate: Merge events with the same customer, event name, feature
+            and metadata into one event whose quantity (and credit_used) is
+            the sum. The merged event gets a deterministic ``event_id``
+            derived from the merged events' ids
+        dedup_size: Number of recent event ids remembered for deduplication
+        retry_buffer_size: Maximum number of failed events kept for retrying;
+            beyond it the oldest are dropped
+        retry_backoff: Seconds before the first retry of a failed event,
+            doubling with every further failure
+        max_retry_backoff: Upper bound of the wait between retries in seconds
+    """
+
+    def __init__(
+        self,
+        usages,
+        address: str,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 500,
+        max_workers: int = 4,
+        aggregate: bool = False,
+        dedup_size: int = 100000,
+        retry_buffer_size: int = 100000,
+        retry_backoff: float = 1.0,
+        max_retry_backoff: float = 300.0,
+        codec: Optional[JSONCodec] = None
+    ):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ConfigurationError("The usage collector requires Unix domain sockets")
+        self.usages = usages
+        self.address = address
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_workers = max_workers
+        self.aggregate = aggregate
+        self.dedup_size = dedup_size
+        self.retry_buffer_size = retry_buffer_size
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.codec = codec or get_default_codec()
+
+        self.stats = {'received': 0, 'duplicates': 0, 'forwarded': 0, 'requests': 0, 'failed': 0}
+        self._pending: List[Dict[str, Any]] = []
+        # Failed (event, originals, attempts, retry_at, failed_at) units, resent unchanged
+        self._retries: List[_Retry] = []
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_needed = threading.Event()
+        self._stopping = threading.Event()
+        self._socket = None
+        self._threads: List[threading.Thread] = []
+        fork.register(self)
+
+    def _after_fork(self) -> None:
+        # The collector's threads do not exist in a forked child and the
+        # socket belongs to the parent
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pending = []
+        self._retries = []
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def start(self) -> 'UsageCollector':
+        """Bind the socket and start the receiving and flushing threads"""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.address)
+        self._socket.settimeout(0.2)
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._receive_loop, name='metrifox-collector-recv', daemon=True
+            ),
+            threading.Thread(target=self._flush_loop, name='metrifox-collector-flush', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Run the collector until interrupted"""
+        self.start()
+        try:
+            while not self._stopping.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the threads, optionally forwarding the pending events first"""
+        self._stopping.set()
+        self._flush_needed.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+        if flush:
+            self.flush()
+
+    def add(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue an event for forwarding
+
+        Returns:
+            False if the event was dropped as a duplicate
+        """
+        event_id = event.get('event_id')
+        with self._lock:
+            self.stats['received'] += 1
+            if event_id is not None:
+                if event_id in self._seen:
+                    self.stats['duplicates'] += 1
+                    return False
+                self._seen[event_id] = None
+                if len(self._seen) > self.dedup_size:
+                    self._seen.popitem(last=False)
+            self._pending.append(event)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush_needed.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Forward all pending events
+
+        Events that fail are kept and retried on later flushes with
+        exponential backoff until the service accepts them, exactly as they
+        were sent: a merged event keeps its ``event_id`` (and so its
+        idempotency key) and is never merged again with newer events, so a
+        request that reached the service before failing cannot be recorded
+        twice. Events the service rejects with a client error, and the oldest
+        ones once more than ``retry_buffer_size`` are waiting, are dropped and
+        forgotten by deduplication so they can be sent again. While stopping,
+        every waiting event gets a last attempt.
+
+        Returns:
+            Number of events forwarded successfully
+        """
+        now = time.monotonic()
+        stopping = self._stopping.is_set()
+        with self._lock:
+            events, self._pending = self._pending, []
+            due = [unit for unit in self._retries if stopping or unit[3] <= now]
+            self._retries = [unit for unit in self._retries if not stopping and unit[3] > now]
+        if not events and not due:
+            return 0
+
+        if self.aggregate:
+            merged = self._merge(events)
+        else:
+            merged = [(event, [event]) for event in events]
+        batches = due + [(event, originals, 0, now, now) for event, originals in merged]
+        workers = min(self.max_workers, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = list(executor.map(self._forward, [batch[0] for batch in batches]))
+
+        now = time.monotonic()
+        forwarded = 0
+        retry: List[_Retry] = []
+        dropped: List[Dict[str, Any]] = []
+        for (event, originals, attempts, _, failed_at), error in zip(batches, errors):
+            if error is None:
+                forwarded += len(originals)
+            elif _is_rejection(error):
+                dropped.extend(originals)
+            else:
+                delay = min(self.retry_backoff * 2 ** attempts, self.max_retry_backoff)
+                retry.append((event, originals, attempts + 1, now + delay, failed_at))
+        with self._lock:
+            # Oldest failures first
+            self._retries = sorted(self._retries + retry, key=lambda unit: unit[4])
+            waiting = sum(len(unit[1]) for unit in self._retries)
+            while self._retries and waiting > self.retry_buffer_size:
+                unit = self._retries.pop(0)
+                waiting -= len(unit[1])
+                dropped.extend(unit[1])
+            for original in dropped:
+                self._seen.pop(original.get('event_id'), None)
+            self.stats['failed'] += len(dropped)
+            self.stats['forwarded'] += forwarded
+            self.stats['requests'] += len(batches)
+        return forwarded
+
+    def _forward(self, event: Dict[str, Any]) -> Optional[APIError]:
+        try:
+            self.usages.record_usage(event)
+        except APIError as e:
+            return e
+        return None
+
+    def _merge(
+        self, events: List[Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Group events that differ only in id, quantity, credit and timestamp"""
+        groups: "OrderedDict[Any, List[Dict[str, Any]]]" = OrderedDict()
+        for event in events:
+            metadata = event.get('metadata')
+            key = (
+                event.get('customer_key'),
+                event.get('event_name'),
+                event.get('feature_key'),
+                self.codec.dumps(metadata) if metadata else None,
+            )
+            groups.setdefault(key, []).append(event)
+
+        batches = []
+        for originals in groups.values():
+            if len(originals) == 1:
+                batches.append((originals[0], originals))
+                continue
+            merged = dict(originals[0])
+            merged['quantity'] = sum(e.get('quantity', 1) for e in originals)
+            credits = [e['credit_used'] for e in originals if e.get('credit_used') is not None]
+            if credits:
+                merged['credit_used'] = sum(credits)
+            timestamps = [e['timestamp'] for e in originals if e.get('timestamp') is not None]
+            if timestamps:
+                merged['timestamp'] = max(timestamps)
+            ids = sorted(str(e.get('event_id')) for e in originals)
+            merged['event_id'] = 'agg_' + hashlib.sha1('\n'.join(ids).encode('utf-8')).hexdigest()
+            batches.append((merged, originals))
+        return batches
+
+    def _receive_loop(self) -> None:
+        sock = self._socket
+        while not self._stopping.is_set():
+            try:
+                data = sock.recv(MAX_DATAGRAM_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                event = self.codec.loads(data)
+            except ValueError:
+                continue
+            if isinstance(event, dict):
+                self.add(event)
+
+    def _flush_loop(self) -> None:
+        while not self._stopping.is_set():
+            self._flush_needed.wait(self.flush_interval)
+            self._flush_needed.clear()
+            if not self._stopping.is_set():
+                self.flush()
+
+
+def _is_rejection(error: APIError) -> bool:
+    """Whether the service refused the event itself, so resending it cannot succeed"""
+    status = error.status_code
+    if status is None or status in RetryPolicy.DEFAULT_RETRY_STATUSES:
+        return False
+    return 400 <= status < 500
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a usage collector sidecar process"""
+    from .client import MetrifoxClient
+
+    parser = argparse.ArgumentParser(description="Metrifox per-host usage collector")
+    parser.add_argument('--socket', required=True, help="Path of the Unix socket to listen on")
+    parser.add_argument('--api-key', help="Metrifox API key (defaults to METRIFOX_API_KEY)")
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    parser.add_argument('--max-batch-size', type=int, default=500)
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument(
+        '--aggregate', action='store_true', help="Merge events differing only in quantity"
+    )
+    args = parser.parse_args(argv)
+
+    client = MetrifoxClient(api_key=args.api_key)
+    collector = UsageCollector(
+        client.usages,
+        args.socket,
+        flush_interval=args.flush_interval,
+        max_batch_size=args.max_batch_size,
+        max_workers=args.max_workers,
+        aggregate=args.aggregate
+    )
+    # Flush pending events on shutdown
+    signal.signal(signal.SIGTERM, lambda signum, frame: collector._stopping.set())
+    collector.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Usage backfill from files for Metrifox SDK
+
+Streams usage events from a JSON Lines or CSV file, validates each row into
+a :class:`~metrifox_sdk.types.UsageEventRequest` and records them with
+bounded concurrency, one batch at a time, so memory use does not grow with
+the file. Progress is checkpointed after every batch; a re-run with the same
+checkpoint file resumes after the last completed batch. Events are sent with
+idempotency keys derived from their ``event_id``, so rows that are sent again
+after an interruption are not recorded twice.
+
+    METRIFOX_API_KEY=... python -m metrifox_sdk.backfill usage.jsonl --checkpoint usage.ckpt
+
+Rows need ``customer_key``, ``event_id`` and ``event_name`` or ``feature_key``;
+``quantity`` (or ``amount``), ``credit_used``, ``timestamp`` and ``metadata``
+(a JSON object, also in CSV files) are optional.
+"""
+
+import argparse
+import csv
+import io
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .concurrency import DEFAULT_MAX_WORKERS, gather
+from .exceptions import APIError
+from .priority import Priority, runs_at
+from .serialization import JSONCodec, get_default_codec
+from .types import UsageEventRequest
+
+if TYPE_CHECKING:
+    from .usages import UsagesModule
+
+
+@dataclass
+class BackfillStats:
+    """Progress of a backfill"""
+    read: int = 0
+    sent: int = 0
+    failed: int = 0
+    invalid: int = 0
+    skipped: int = 0
+    line: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Events sent per second"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"line {self.line}: {self.sent} sent, {self.failed} failed, {self.invalid} invalid, "
+            f"{self.skipped} skipped in {self.elapsed:.1f}s ({self.rate:.0f} events/s)"
+        )
+
+
+def read_rows(
+    path: str, format: Optional[str] = None, codec: Optional[JSONCodec] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream the rows of a JSON Lines or CSV file
+
+    Args:
+        path: File to read
+        format: ``"jsonl"`` or ``"csv"`` (guessed from the extension if not given)
+        codec: JSON codec for JSON Lines files (optional)
+
+    Yields:
+        ``(line_number, row)`` pairs; a JSON line that does not parse yields
+        its ValueError as the row
+    """
+    format = format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    if format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        return
+
+    codec = codec or get_default_codec()
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, codec.loads(line)
+            except ValueError as e:
+                yield line_number, e
+
+
+def to_usage_event(row: Dict[str, Any], codec: Optional[JSONCodec] = None) -> UsageEventRequest:
+    """
+    Validate a row and convert it into a usage event
+
+    CSV rows are all strings: empty cells are treated as missing, and numbers
+    and the ``metadata`` JSON object are parsed.
+
+    Raises:
+        ValueError: If the row is not a valid usage event
+    """
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    values = {k: v for k, v in row.items() if k and v not in (None, '')}
+
+    for field in ('customer_key', 'event_id'):
+        if not values.get(field):
+            raise ValueError(f"missing {field}")
+    if not values.get('event_name') and not values.get('feature_key'):
+        raise ValueError("missing event_name or feature_key")
+
+    metadata = values.get('metadata')
+    if isinstance(metadata, str):
+        metadata = (codec or get_default_codec()).loads(metadata.encode('utf-8'))
+    if metadata is not None and not isinstance(metadata, dict):
+        raise ValueError("metadata is not an object")
+
+    return UsageEventRequest(
+        customer_key=str(values['customer_key']),
+        event_id=str(values['event_id']),
+        event_name=values.get('event_name'),
+        feature_key=values.get('feature_key'),
+        amount=_number(values.get('quantity', values.get('amount', 1)), 'quantity'),
+        credit_used=_number(values.get('credit_used'), 'credit_used'),
+        timestamp=_number(values.get('timestamp'), 'timestamp'),
+        metadata=metadata,
+    )
+
+
+def _number(value: Any, field: str) -> Any:
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    if isinstance(value, str):
+        try:
+            # Exact for integers beyond float precision
+            return int(value.strip())
+        except ValueError:
+            pass
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} is not a number: {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{field} is not a finite number: {value!r}")
+    return int(number) if number.is_integer() else number
+
+
+class Backfill:
+    """
+    Record the usage events of a file
+
+    Args:
+        usages: Usages module used to record the events
+        path: JSON Lines or CSV file of usage events
+        format: ``"jsonl"`` or ``"csv"`` (guessed from the extension if not given)
+        checkpoint_path: File recording the last completed line, for resuming (optional)
+        failures_path: JSON Lines file receiving rows that were invalid or
+            failed to send, with the reason (optional)
+        batch_size: Events read, sent and checkpointed together
+        max_workers: Maximum number of concurrent requests
+        on_progress: Called with the :class:`BackfillStats` after every batch (optional)
+
+    Example:
+        >>> stats = Backfill(client.usages, "usage.csv", checkpoint_path="usage.ckpt").run()
+        >>> print(stats)
+    """
+
+    def __init__(
+        self,
+        usages: 'UsagesModule',
+        path: str,
+        format: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        failures_path: Optional[str] = None,
+        batch_size: int = 500,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        on_progress: Optional[Callable[[BackfillStats], None]] = None,
+        codec: Optional[JSONCodec] = None
+    ):
+        self.usages = usages
+        self.path = path
+        self.format = format
+        self.checkpoint_path = checkpoint_path
+        self.failures_path = failures_path
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self.codec = codec or get_default_codec()
+        self.stats = BackfillStats()
+
+    @runs_at(Priority.BULK)
+    def run(self) -> BackfillStats:
+        """
+        Send all events after the checkpoint
+
+        Returns:
+            The final statistics
+        """
+        self.stats = stats = BackfillStats()
+        resume_after = self._read_checkpoint()
+        started = time.monotonic()
+        failures = open(self.failures_path, 'ab') if self.failures_path else None
+        try:
+            batch: List[Tuple[int, Any]] = []
+            for line_number, row in read_rows(self.path, self.format, self.codec):
+                stats.read += 1
+                if line_number <= resume_after:
+                    stats.skipped += 1
+                    continue
+                batch.append((line_number, row))
+                if len(batch) >= self.batch_size:
+                    self._send_batch(batch, failures, started)
+                    batch = []
+            if batch:
+                self._send_batch(batch, failures, started)
+        finally:
+            if failures is not None:
+                failures.close()
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def _send_batch(
+        self, batch: List[Tuple[int, Any]], failures: Optional[io.BufferedWriter], started: float
+    ) -> None:
+        stats = self.stats
+        events = []
+        for line_number, row in batch:
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                events.append((line_number, row, to_usage_event(row, self.codec)))
+            except ValueError as e:
+                stats.invalid += 1
+                self._record_failure(failures, line_number, row, f"invalid: {e}")
+
+        results = gather(
+            # Only events the meter service confirmed may be checkpointed, so
+            # none are handed to a usage collector or replay queue
+            lambda item: self.usages.record_usage(item[2], direct=True),
+            events,
+            max_workers=self.max_workers,
+            return_exceptions=True
+        )
+        for (line_number, row, _), result in zip(events, results):
+            if isinstance(result, APIError):
+                stats.failed += 1
+                self._record_failure(failures, line_number, row, str(result))
+            else:
+                stats.sent += 1
+
+        stats.line = batch[-1][0]
+        stats.elapsed = time.monotonic() - started
+        self._write_checkpoint(stats.line)
+        if self.on_progress is not None:
+            self.on_progress(stats)
+
+    def _record_failure(
+        self, failures: Optional[io.BufferedWriter], line_number: int, row: Any, reason: str
+    ) -> None:
+        if failures is None:
+            return
+        if isinstance(row, ValueError):
+            row = None
+        failures.write(self.codec.dumps({'line': line_number, 'row': row, 'error': reason}) + b'\n')
+
+    def _read_checkpoint(self) -> int:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, 'rb') as f:
+            data = self.codec.loads(f.read())
+        if data.get('path') != os.path.abspath(self.path):
+            return 0
+        return int(data.get('line', 0))
+
+    def _write_checkpoint(self, line_number: int) -> None:
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.codec.dumps({'path': os.path.abspath(self.path), 'line': line_number}))
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the backfill command line options to ``parser``"""
+    parser.add_argument('path', help="JSON Lines or CSV file of usage events")
+    parser.add_argument(
+        '--format', choices=('jsonl', 'csv'), help="File format (default: from the extension)"
+    )
+    parser.add_argument('--checkpoint', help="Checkpoint file for resuming")
+    parser.add_argument(
+        '--failures', help="JSON Lines file receiving rows that could not be recorded"
+    )
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS)
+
+
+def run_from_arguments(usages: 'UsagesModule', args: argparse.Namespace) -> BackfillStats:
+    """Run a backfill configured by :func:`add_arguments`' options, reporting progress on stderr"""
+    backfill = Backfill(
+        usages,
+        args.path,
+        format=args.format,
+        checkpoint_path=args.checkpoint,
+        failures_path=args.failures,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        on_progress=lambda stats: print(stats, file=sys.stderr)
+    )
+    stats = backfill.run()
+    print(f"Done, {stats}", file=sys.stderr)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Backfill usage events from a file"""
+    from .client import MetrifoxClient
+    from .retry import RetryPolicy
+
+    parser = argparse.ArgumentParser(
+        description="Backfill Metrifox usage events from a JSON Lines or CSV file"
+    )
+    add_arguments(parser)
+    parser.add_argument('--api-key', help="Metrifox API key (defaults to METRIFOX_API_KEY)")
+    args = parser.parse_args(argv)
+
+    client = MetrifoxClient(api_key=args.api_key, retry_policy=RetryPolicy())
+    try:
+        stats = run_from_arguments(client.usages, args)
+    finally:
+        client.close()
+    sys.exit(1 if stats.failed or stats.invalid else 0)
+
+
+if __name__ == '__main__':
+    main()
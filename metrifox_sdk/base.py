@@ -2,22 +2,230 @@
 Base HTTP client for Metrifox SDK
 """
 
-import requests
-from typing import Dict, Any, Optional
-from .exceptions import APIError
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from http import HTTPStatus
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Any,
+    Callable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from .compression import compress_body
+from .limits import DROP_STATUSES
+from .exceptions import APIError, TransportError
+from .models import RawResponse
+from .pagination import DEFAULT_ITEM_KEYS
+from .retry import IDEMPOTENCY_HEADER, IDEMPOTENT_KEY_METHODS, RetryPolicy, generate_idempotency_key
+from .serialization import JSONCodec, get_default_codec
+from .streaming import iter_json_items
+from .transport import (
+    AsyncHTTPXTransport,
+    AsyncTransport,
+    RequestsTransport,
+    StreamingResponse,
+    Transport,
+    TransportResponse,
+)
 
+if TYPE_CHECKING:
+    from .limits import AdaptiveLimiter
 
-class BaseClient:
-    """Base client for making HTTP requests to Metrifox API"""
+R = TypeVar('R', TransportResponse, StreamingResponse)
 
-    def __init__(self, api_key: str, base_url: str):
+
+class _HTTPClientBase(ABC):
+    """Request building and response handling shared by the sync and async clients"""
+
+    DEFAULT_TIMEOUT = 30
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        codec: Optional[JSONCodec] = None,
+        transport=None,
+        timeout: float = DEFAULT_TIMEOUT,
+        compression_threshold: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.codec = codec or get_default_codec()
+        self.transport = transport if transport is not None else self._default_transport()
+        self.timeout = timeout
+        self.compression_threshold = compression_threshold
+        self.retry_policy = retry_policy
+        # Headers are sent per request so one transport can be shared by clients
+        # with different API keys
+        self.headers = {
             'x-api-key': api_key,
-            'Content-Type': 'application/json'
-        })
+            'Content-Type': self.codec.content_type
+        }
+        if self.transport.accept_encoding:
+            self.headers['Accept-Encoding'] = self.transport.accept_encoding
+
+    @abstractmethod
+    def _default_transport(self):
+        """Build the transport used when none is given"""
+
+    def _prepare_request(
+        self,
+        endpoint: str,
+        json: Optional[Dict[str, Any]],
+        files: Optional[Dict[str, Any]],
+        method: str = "GET",
+        idempotency_key: Optional[str] = None
+    ) -> Tuple[str, Dict[str, str], Optional[bytes]]:
+        """Build the URL, headers and encoded body of a request"""
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+
+        # For file uploads, we need to leave out the Content-Type header
+        # and let the transport set it with the boundary
+        if files:
+            headers, content = {'x-api-key': self.api_key}, None
+        else:
+            # Encode the body once, straight to bytes, with the client's codec
+            content = self.codec.dumps(json) if json is not None else None
+            content, encoding = compress_body(content, self.compression_threshold)
+            headers = {**self.headers, 'Content-Encoding': encoding} if encoding else self.headers
+
+        # The key is fixed here, so every retry of this call sends the same one
+        if method in IDEMPOTENT_KEY_METHODS:
+            headers = {**headers, IDEMPOTENCY_HEADER: idempotency_key or generate_idempotency_key()}
+        return url, headers, content
+
+    def _retry_delay(
+        self, attempt: int, response: Optional[TransportResponse] = None
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed attempt, or None to give up
+
+        Args:
+            attempt: Number of retries made so far
+            response: The unsuccessful response, or None if none was received
+        """
+        policy = self.retry_policy
+        if policy is None or attempt >= policy.max_retries:
+            return None
+        if response is None:
+            return policy.delay(attempt)
+        if not policy.should_retry_status(response.status_code):
+            return None
+        return policy.delay(attempt, response.headers)
+
+    @staticmethod
+    def _rewind_files(files: Optional[Dict[str, Any]]) -> None:
+        """Seek uploaded file objects back to the start before resending them"""
+        for value in (files or {}).values():
+            fileobj = value[1] if isinstance(value, tuple) else value
+            if hasattr(fileobj, 'seek'):
+                fileobj.seek(0)
+
+    def _parse_response(self, response: TransportResponse, url: str) -> Dict[str, Any]:
+        """Decode a response, raising APIError for unsuccessful ones"""
+        if response.status_code >= 400:
+            raise self._error_from_response(response, url)
+
+        try:
+            return self.codec.loads(response.content)
+        except ValueError as e:
+            raise APIError(f"Invalid JSON response: {str(e)}")
+
+    def _finish_response(
+        self, response: TransportResponse, url: str, raw: bool
+    ) -> Union[Dict[str, Any], RawResponse]:
+        """Decode a response, or with ``raw`` return it undecoded
+
+        Unsuccessful responses raise APIError either way.
+        """
+        if not raw:
+            return self._parse_response(response, url)
+        if response.status_code >= 400:
+            raise self._error_from_response(response, url)
+        return RawResponse.from_transport(response)
+
+    def _error_from_response(self, response: TransportResponse, url: str) -> APIError:
+        """Build an APIError from an unsuccessful response"""
+        try:
+            reason = HTTPStatus(response.status_code).phrase
+        except ValueError:
+            reason = "Error"
+        error_message = f"{response.status_code} {reason} for url: {url}"
+
+        try:
+            error_body = self.codec.loads(response.content)
+            if error_body:
+                error_message = error_body.get('message', error_message)
+        except Exception:
+            pass
+
+        return APIError(
+            message=f"API request failed: {error_message}",
+            status_code=response.status_code,
+            response_body=response.content.decode('utf-8', errors='replace')
+        )
+
+
+class BaseClient(_HTTPClientBase):
+    """
+    Base client for making HTTP requests to Metrifox API
+
+    Args:
+        limiter: Adaptive limit on the requests in flight (optional). Every
+            request waits for a slot and reports its latency, and whether the
+            service shed it, to the limiter, see :mod:`metrifox_sdk.limits`
+    """
+
+    transport: Transport
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        codec: Optional[JSONCodec] = None,
+        transport: Optional[Transport] = None,
+        timeout: float = _HTTPClientBase.DEFAULT_TIMEOUT,
+        compression_threshold: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        limiter: Optional['AdaptiveLimiter'] = None
+    ):
+        super().__init__(
+            api_key,
+            base_url,
+            codec=codec,
+            transport=transport,
+            timeout=timeout,
+            compression_threshold=compression_threshold,
+            retry_policy=retry_policy
+        )
+        self.limiter = limiter
+
+    def _default_transport(self) -> Transport:
+        return RequestsTransport()
+
+    def _send(self, send: Callable[..., R], method: str, url: str, **kwargs) -> R:
+        """Send one attempt with ``send``, within the limiter's concurrency limit"""
+        limiter = self.limiter
+        if limiter is None:
+            return send(method, url, **kwargs)
+        inflight = limiter.acquire()
+        started = time.monotonic()
+        dropped = True
+        try:
+            response = send(method, url, **kwargs)
+            dropped = response.status_code in DROP_STATUSES
+            return response
+        finally:
+            limiter.release(time.monotonic() - started, dropped, inflight)
 
     def _make_request(
         self,
@@ -25,17 +233,27 @@ class BaseClient:
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
         json: Optional[Dict[str, Any]] = None,
-        files: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        files: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
         """
         Make an HTTP request to the Metrifox API
 
+        Requests are retried according to the client's retry policy. POST
+        and PATCH requests carry an idempotency key that stays the same
+        across retries.
+
         Args:
             method: HTTP method (GET, POST, PATCH, DELETE)
             endpoint: API endpoint (without base URL)
             params: Query parameters
             json: JSON body
             files: Files for multipart upload
+            idempotency_key: Idempotency key for POST and PATCH requests
+                (optional). Generated if not given
+            raw: Return the response undecoded, as a
+                :class:`~metrifox_sdk.models.RawResponse`
 
         Returns:
             Parsed JSON response
@@ -43,69 +261,285 @@ class BaseClient:
         Raises:
             APIError: If the request fails
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-
-        try:
-            # For file uploads, we need to remove Content-Type header
-            # and let requests set it with the boundary
-            headers = {}
-            if files:
-                headers = {'x-api-key': self.api_key}
-                response = requests.request(
-                    method=method,
-                    url=url,
+        url, headers, content = self._prepare_request(
+            endpoint, json, files, method, idempotency_key
+        )
+        attempt = 0
+        while True:
+            try:
+                response = self._send(
+                    self.transport.send,
+                    method,
+                    url,
                     params=params,
-                    json=json,
-                    files=files,
                     headers=headers,
-                    timeout=30
+                    content=content,
+                    files=files,
+                    timeout=self.timeout
                 )
+            except TransportError:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
             else:
-                response = self.session.request(
-                    method=method,
-                    url=url,
+                if response.status_code < 400:
+                    return self._finish_response(response, url, raw)
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return self._finish_response(response, url, raw)
+            attempt += 1
+            self._rewind_files(files)
+            time.sleep(delay)
+
+    def _open_stream(
+        self, method: str, endpoint: str, params: Optional[Dict[str, Any]]
+    ) -> StreamingResponse:
+        """Send a request whose body is read incrementally, retrying until its headers arrive"""
+        url, headers, _ = self._prepare_request(endpoint, None, None, method)
+        attempt = 0
+        while True:
+            try:
+                response = self._send(
+                    self.transport.stream,
+                    method,
+                    url,
                     params=params,
-                    json=json,
-                    timeout=30
+                    headers=headers,
+                    timeout=self.timeout,
                 )
+            except TransportError:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code < 400:
+                    return response
+                # Error bodies are small: read them whole for the APIError
+                with response:
+                    failed = TransportResponse(
+                        response.status_code, response.headers, response.read()
+                    )
+                delay = self._retry_delay(attempt, failed)
+                if delay is None:
+                    raise self._error_from_response(failed, url)
+            attempt += 1
+            time.sleep(delay)
 
-            response.raise_for_status()
-            return response.json()
+    def stream_items(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        keys: Sequence[str] = DEFAULT_ITEM_KEYS
+    ) -> Iterator[Any]:
+        """
+        Make a GET request for a list and yield its items as they are decoded
 
-        except requests.exceptions.HTTPError as e:
-            status_code = e.response.status_code if e.response is not None else None
-            response_body = e.response.text if e.response is not None else None
+        The body is read from the connection in chunks and decoded one item at
+        a time, so memory use is bounded by the largest item rather than the
+        size of the response. The request is sent when iteration starts and
+        is retried according to the client's retry policy until the response
+        headers arrive.
 
-            try:
-                error_body = e.response.json() if e.response is not None else None
-                error_message = error_body.get('message', str(e)) if error_body else str(e)
-            except Exception as json_err:
-                error_message = str(e)
-
-            raise APIError(
-                message=f"API request failed: {error_message}",
-                status_code=status_code,
-                response_body=response_body
-            )
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            keys: Keys the items may be nested under when ``data`` is an object
 
-        except requests.exceptions.RequestException as e:
-            raise APIError(f"Request failed: {str(e)}")
+        Yields:
+            The items of the ``data`` array
 
+        Raises:
+            APIError: If the request fails or the body is not valid JSON
+        """
+        response = self._open_stream("GET", endpoint, params)
+        try:
+            yield from iter_json_items(response.iter_bytes(), keys)
         except ValueError as e:
-            raise APIError(f"Invalid JSON response: {str(e)}")
+            raise APIError(str(e))
+        finally:
+            response.close()
+
+    def warmup(self, connections: int = 1, timeout: Optional[float] = None) -> None:
+        """
+        Open pooled connections to the API host ahead of the first request
+
+        Resolves the host and completes the TCP and TLS handshakes so the
+        first real request only pays a round trip. Errors are ignored.
+
+        Args:
+            connections: Number of connections to open concurrently
+            timeout: Timeout in seconds (defaults to the client's timeout)
+        """
+        url = f"{self.base_url}/"
+        timeout = self.timeout if timeout is None else timeout
+        if connections <= 1:
+            self.transport.warmup(url, timeout=timeout)
+            return
+        # Concurrent requests each check out their own connection
+        threads = [
+            threading.Thread(target=self.transport.warmup, args=(url, timeout), daemon=True)
+            for _ in range(connections)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def close(self) -> None:
+        """Close the underlying transport"""
+        self.transport.close()
+
+    def get(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None, raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
+        """Make a GET request"""
+        return self._make_request("GET", endpoint, params=params, raw=raw)
+
+    def post(
+        self,
+        endpoint: str,
+        json: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
+        """Make a POST request"""
+        return self._make_request(
+            "POST", endpoint, json=json, files=files, idempotency_key=idempotency_key, raw=raw
+        )
+
+    def patch(
+        self,
+        endpoint: str,
+        json: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
+        """Make a PATCH request"""
+        return self._make_request(
+            "PATCH", endpoint, json=json, idempotency_key=idempotency_key, raw=raw
+        )
+
+    def delete(self, endpoint: str, raw: bool = False) -> Union[Dict[str, Any], RawResponse]:
+        """Make a DELETE request"""
+        return self._make_request("DELETE", endpoint, raw=raw)
+
+
+class AsyncBaseClient(_HTTPClientBase):
+    """
+    Asynchronous base client for making HTTP requests to Metrifox API
+
+    Uses an :class:`~metrifox_sdk.transport.AsyncTransport`; by default
+    ``httpx.AsyncClient`` (``pip install metrifox-sdk[http2]``).
+
+    Example:
+        >>> client = AsyncBaseClient("your_api_key", "https://api-meter.metrifox.com/")
+        >>> access = await client.get("usage/access", params={
+        ...     "feature_key": "premium_feature",
+        ...     "customer_key": "cust_123"
+        ... })
+    """
+
+    transport: AsyncTransport
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        codec: Optional[JSONCodec] = None,
+        transport: Optional[AsyncTransport] = None,
+        timeout: float = _HTTPClientBase.DEFAULT_TIMEOUT,
+        compression_threshold: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        super().__init__(
+            api_key,
+            base_url,
+            codec=codec,
+            transport=transport,
+            timeout=timeout,
+            compression_threshold=compression_threshold,
+            retry_policy=retry_policy
+        )
+
+    def _default_transport(self) -> AsyncTransport:
+        return AsyncHTTPXTransport()
 
-    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
+        """Make an HTTP request to the Metrifox API; see :meth:`BaseClient._make_request`"""
+        url, headers, content = self._prepare_request(
+            endpoint, json, files, method, idempotency_key
+        )
+        attempt = 0
+        while True:
+            try:
+                response = await self.transport.send(
+                    method,
+                    url,
+                    params=params,
+                    headers=headers,
+                    content=content,
+                    files=files,
+                    timeout=self.timeout
+                )
+            except TransportError:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code < 400:
+                    return self._finish_response(response, url, raw)
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return self._finish_response(response, url, raw)
+            attempt += 1
+            self._rewind_files(files)
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """Close the underlying transport"""
+        await self.transport.close()
+
+    async def get(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None, raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
         """Make a GET request"""
-        return self._make_request("GET", endpoint, params=params)
+        return await self._make_request("GET", endpoint, params=params, raw=raw)
 
-    def post(self, endpoint: str, json: Optional[Dict[str, Any]] = None, files: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def post(
+        self,
+        endpoint: str,
+        json: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
         """Make a POST request"""
-        return self._make_request("POST", endpoint, json=json, files=files)
+        return await self._make_request(
+            "POST", endpoint, json=json, files=files, idempotency_key=idempotency_key, raw=raw
+        )
 
-    def patch(self, endpoint: str, json: Dict[str, Any]) -> Dict[str, Any]:
+    async def patch(
+        self,
+        endpoint: str,
+        json: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], RawResponse]:
         """Make a PATCH request"""
-        return self._make_request("PATCH", endpoint, json=json)
+        return await self._make_request(
+            "PATCH", endpoint, json=json, idempotency_key=idempotency_key, raw=raw
+        )
 
-    def delete(self, endpoint: str) -> Dict[str, Any]:
+    async def delete(self, endpoint: str, raw: bool = False) -> Union[Dict[str, Any], RawResponse]:
         """Make a DELETE request"""
-        return self._make_request("DELETE", endpoint)
+        return await self._make_request("DELETE", endpoint, raw=raw)
@@ -2,21 +2,41 @@
 Checkout module for Metrifox SDK
 """
 
-from typing import Dict, Any, Union
+import json
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Optional, Tuple, Union
 from .base import BaseClient
+from .concurrency import DEFAULT_MAX_WORKERS, BoundedExecutor, future_variant, gather
+from .exceptions import APIError
+from .priority import Priority, runs_at
 from .types import CheckoutConfig
 
+if TYPE_CHECKING:
+    from .cache import TTLCache
+
+#: Most checkout URLs kept by a client's checkout URL cache
+URL_CACHE_SIZE = 10000
+
 
 class CheckoutModule:
     """Module for checkout and billing"""
 
-    def __init__(self, client: BaseClient):
+    def __init__(
+        self,
+        client: BaseClient,
+        cache: Optional['TTLCache'] = None,
+        executor: Optional[BoundedExecutor] = None
+    ):
         self._client = client
+        self._cache = cache
+        self._executor = executor or BoundedExecutor()
 
     def url(self, config: Union[CheckoutConfig, Dict[str, Any]]) -> str:
         """
         Generate a checkout URL for a customer
 
+        When the client has a checkout URL cache, a URL generated for the same
+        configuration within its TTL is reused.
+
         Args:
             config: Checkout configuration (CheckoutConfig or dict)
 
@@ -43,5 +63,69 @@ class CheckoutModule:
             ... })
         """
         params = config.to_dict() if hasattr(config, 'to_dict') else config
+        if self._cache is None:
+            return self._generate(params)
+
+        # Every field shapes the checkout, so all of them make up the key
+        key = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+        url = self._cache.get(key)
+        if url is None:
+            url = self._generate(params)
+            if url:
+                self._cache.set(key, url)
+        return url
+
+    @runs_at(Priority.BULK)
+    def pregenerate(
+        self,
+        offering_keys: Iterable[str],
+        billing_intervals: Iterable[Optional[str]] = (None,),
+        customer_key: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> Dict[Tuple[str, Optional[str]], str]:
+        """
+        Generate checkout URLs for every offering and billing interval concurrently
+
+        The URLs are stored in the client's checkout URL cache, if it has one,
+        so later :meth:`url` calls for them need no request. Combinations that
+        fail to generate are left out.
+
+        Args:
+            offering_keys: Offerings to generate URLs for
+            billing_intervals: Billing intervals per offering (None for the default)
+            customer_key: Customer to pre-fill the checkouts for (optional)
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            Checkout URLs by ``(offering_key, billing_interval)``
+
+        Example:
+            >>> urls = client.checkout.pregenerate(
+            ...     ["basic_plan", "premium_plan"], billing_intervals=["monthly", "yearly"]
+            ... )
+            >>> urls[("premium_plan", "yearly")]
+        """
+        intervals = list(billing_intervals)
+        combinations = [
+            (offering_key, interval) for offering_key in offering_keys for interval in intervals
+        ]
+
+        def generate(combination: Tuple[str, Optional[str]]) -> str:
+            offering_key, interval = combination
+            return self.url(
+                CheckoutConfig(offering_key, billing_interval=interval, customer_key=customer_key)
+            )
+
+        results = gather(generate, combinations, max_workers=max_workers, return_exceptions=True)
+        return {
+            combination: url
+            for combination, url in zip(combinations, results)
+            if url and not isinstance(url, APIError)
+        }
+
+    def _generate(self, params: Dict[str, Any]) -> str:
         response = self._client.get("products/offerings/generate-checkout-url", params=params)
         return response.get('data', {}).get('checkout_url', '')
+
+    # Future-returning variants, run on the client's bounded thread pool
+    url_async = future_variant('url')
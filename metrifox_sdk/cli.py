@@ -0,0 +1,296 @@
+"""
+Command-line interface for Metrifox SDK
+
+Installed as the ``metrifox`` console script:
+
+    metrifox customers export --format csv --output customers.csv
+    metrifox customers import customers.jsonl
+    metrifox usage backfill usage.csv --checkpoint usage.ckpt
+    metrifox entitlements dump --customers-file top-customers.txt --output entitlements.jsonl
+
+Every command reads the API key from ``--api-key`` or ``METRIFOX_API_KEY``,
+retries failed requests, and reports progress on stderr.
+"""
+
+import argparse
+import csv
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional
+
+from . import backfill
+from .concurrency import DEFAULT_MAX_WORKERS, gather
+from .customers import customer_create_idempotency_key
+from .exceptions import APIError, MetrifoxError
+from .priority import Priority, default_priority
+from .serialization import JSONCodec, get_default_codec
+
+
+class Progress:
+    """Counts processed items and prints the rate to stderr every ``interval`` seconds"""
+
+    def __init__(self, label: str, interval: float = 2.0, stream: Optional[IO[str]] = None):
+        self.label = label
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+
+    def add(self, done: int = 0, failed: int = 0) -> None:
+        self.done += done
+        self.failed += failed
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = time.monotonic() - self._started
+        rate = self.done / elapsed if elapsed else 0.0
+        prefix = "Done, " if final else ""
+        print(
+            f"{prefix}{self.label}: {self.done} done, {self.failed} failed "
+            f"in {elapsed:.1f}s ({rate:.0f}/s)",
+            file=self.stream
+        )
+
+
+class RowWriter:
+    """Writes rows to a JSON Lines or CSV stream"""
+
+    def __init__(self, stream: IO[str], format: str, codec: JSONCodec):
+        self.stream = stream
+        self.format = format
+        self.codec = codec
+        self._csv: Optional[csv.DictWriter] = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self.format == 'jsonl':
+            self.stream.write(self.codec.dumps(row).decode('utf-8') + '\n')
+            return
+        if self._csv is None:
+            # Columns come from the first row; later rows' extra fields are dropped
+            self._csv = csv.DictWriter(self.stream, fieldnames=list(row), extrasaction='ignore')
+            self._csv.writeheader()
+        self._csv.writerow({key: self._cell(value) for key, value in row.items()})
+
+    def _cell(self, value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return self.codec.dumps(value).decode('utf-8')
+        return value
+
+
+@contextmanager
+def _output(path: Optional[str]) -> Iterator[IO[str]]:
+    if path is None or path == '-':
+        yield sys.stdout
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        yield f
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _lines(path: str) -> List[str]:
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def export_customers(client, args: argparse.Namespace) -> int:
+    """Stream all customers to JSON Lines or CSV"""
+    filters = {'search_term': args.search_term, 'customer_type': args.customer_type}
+    filters = {k: v for k, v in filters.items() if v}
+    progress = Progress("customers exported")
+    with _output(args.output) as stream:
+        writer = RowWriter(stream, args.format, get_default_codec())
+        customers = client.customers.iter_list(
+            filters, per_page=args.per_page, read_ahead=args.read_ahead
+        )
+        for customer in customers:
+            writer.write(customer)
+            progress.add(done=1)
+    progress.report(final=True)
+    return 0
+
+
+def import_customers(client, args: argparse.Namespace) -> int:
+    """Create customers from a JSON Lines or CSV file"""
+    progress = Progress("customers imported")
+    codec = get_default_codec()
+
+    def create(item) -> Optional[str]:
+        line_number, row = item
+        if not isinstance(row, dict) or not row.get('customer_key'):
+            return f"line {line_number}: invalid row"
+        data = {k: v for k, v in row.items() if k and v not in (None, '')}
+        try:
+            # Re-running an import does not create duplicates, and a corrected
+            # row is not answered with the stored response of its earlier attempt
+            client.customers.create(data, idempotency_key=customer_create_idempotency_key(data))
+        except APIError as e:
+            return f"line {line_number}: {e}"
+        return None
+
+    rows = backfill.read_rows(args.path, args.format, codec)
+    for batch in _batches(rows, args.batch_size):
+        errors = [error for error in gather(create, batch, max_workers=args.max_workers) if error]
+        for error in errors:
+            print(error, file=sys.stderr)
+        progress.add(done=len(batch) - len(errors), failed=len(errors))
+    progress.report(final=True)
+    return 1 if progress.failed else 0
+
+
+def backfill_usage(client, args: argparse.Namespace) -> int:
+    """Record usage events from a JSON Lines or CSV file"""
+    stats = backfill.run_from_arguments(client.usages, args)
+    return 1 if stats.failed or stats.invalid else 0
+
+
+def dump_entitlements(client, args: argparse.Namespace) -> int:
+    """Write the entitlements summaries of customers' subscriptions as JSON Lines"""
+    customer_keys = list(args.customer_key or [])
+    if args.customers_file:
+        customer_keys.extend(_lines(args.customers_file))
+    if not customer_keys:
+        print("No customers given: use --customer-key or --customers-file", file=sys.stderr)
+        return 2
+
+    codec = get_default_codec()
+    progress = Progress("customers dumped")
+
+    def summary(subscription_id: str) -> Any:
+        return client.subscriptions.get_entitlements_summary(subscription_id).get('data')
+
+    def dump(customer_key: str) -> Dict[str, Any]:
+        try:
+            details = client.customers.get_details(customer_key)
+            subscriptions = (details.get('data') or {}).get('subscriptions') or []
+            summaries = [
+                {
+                    'subscription_id': subscription['id'],
+                    'entitlements': summary(subscription['id']),
+                }
+                for subscription in subscriptions if subscription.get('id')
+            ]
+            return {'customer_key': customer_key, 'subscriptions': summaries}
+        except APIError as e:
+            return {'customer_key': customer_key, 'error': str(e)}
+
+    with _output(args.output) as stream:
+        for batch in _batches(customer_keys, args.batch_size):
+            for record in gather(dump, batch, max_workers=args.max_workers):
+                stream.write(codec.dumps(record).decode('utf-8') + '\n')
+                failed = 'error' in record
+                progress.add(done=0 if failed else 1, failed=1 if failed else 0)
+    progress.report(final=True)
+    return 1 if progress.failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the ``metrifox`` argument parser"""
+    parser = argparse.ArgumentParser(prog='metrifox', description="Metrifox bulk operations")
+    parser.add_argument('--api-key', help="Metrifox API key (defaults to METRIFOX_API_KEY)")
+    parser.add_argument('--base-url', help="Custom API base URL")
+    parser.add_argument('--max-retries', type=int, default=3, help="Retries per failed request")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    customers = commands.add_parser('customers', help="Customer export and import")
+    customer_commands = customers.add_subparsers(dest='action', metavar='ACTION')
+    customer_commands.required = True
+
+    export = customer_commands.add_parser('export', help="Stream all customers to a file")
+    export.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    export.add_argument('--output', '-o', help="Output file (default: stdout)")
+    export.add_argument('--per-page', type=int, default=100)
+    export.add_argument(
+        '--read-ahead', type=int, default=2, help="Pages fetched ahead concurrently"
+    )
+    export.add_argument('--search-term')
+    export.add_argument('--customer-type', choices=('INDIVIDUAL', 'BUSINESS'))
+    export.set_defaults(handler=export_customers)
+
+    import_ = customer_commands.add_parser(
+        'import', help="Create customers from a JSON Lines or CSV file"
+    )
+    import_.add_argument('path')
+    import_.add_argument(
+        '--format', choices=('jsonl', 'csv'), help="File format (default: from the extension)"
+    )
+    import_.add_argument('--batch-size', type=int, default=500)
+    import_.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS)
+    import_.set_defaults(handler=import_customers)
+
+    usage = commands.add_parser('usage', help="Usage events")
+    usage_commands = usage.add_subparsers(dest='action', metavar='ACTION')
+    usage_commands.required = True
+    backfill_parser = usage_commands.add_parser('backfill', help="Record usage events from a file")
+    backfill.add_arguments(backfill_parser)
+    backfill_parser.set_defaults(handler=backfill_usage)
+
+    entitlements = commands.add_parser('entitlements', help="Entitlements")
+    entitlement_commands = entitlements.add_subparsers(dest='action', metavar='ACTION')
+    entitlement_commands.required = True
+    dump = entitlement_commands.add_parser(
+        'dump', help="Dump customers' entitlements summaries as JSON Lines"
+    )
+    dump.add_argument('--customer-key', action='append', help="Customer to dump (repeatable)")
+    dump.add_argument('--customers-file', help="File with one customer key per line")
+    dump.add_argument('--output', '-o', help="Output file (default: stdout)")
+    dump.add_argument('--batch-size', type=int, default=500)
+    dump.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS)
+    dump.set_defaults(handler=dump_entitlements)
+    return parser
+
+
+def main(
+    argv: Optional[List[str]] = None,
+    client_factory: Optional[Callable[..., Any]] = None
+) -> int:
+    """
+    Run the ``metrifox`` command line
+
+    Args:
+        argv: Arguments (defaults to ``sys.argv[1:]``)
+        client_factory: Called with the client options to build the client (for tests)
+
+    Returns:
+        The exit status
+    """
+    args = build_parser().parse_args(argv)
+    if client_factory is None:
+        from .client import MetrifoxClient
+        client_factory = MetrifoxClient
+    from .retry import RetryPolicy
+
+    try:
+        client = client_factory(
+            api_key=args.api_key,
+            base_url=args.base_url,
+            retry_policy=RetryPolicy(max_retries=args.max_retries) if args.max_retries else None
+        )
+    except MetrifoxError as e:
+        print(f"metrifox: {e}", file=sys.stderr)
+        return 2
+    try:
+        with default_priority(Priority.BULK):
+            return args.handler(client, args)
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
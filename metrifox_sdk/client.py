@@ -3,14 +3,30 @@ Main Metrifox SDK client
 """
 
 import os
-from typing import Optional, Dict, Any
-from .base import BaseClient
-from .customers import CustomersModule
-from .usages import UsagesModule
-from .checkout import CheckoutModule
-from .subscriptions import SubscriptionsModule
+import threading
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, Mapping, Tuple, TypeVar, Union
+from . import fork
 from .exceptions import ConfigurationError
 
+# The HTTP stack and the modules are imported when first used, keeping
+# `import metrifox_sdk` and client construction cheap
+if TYPE_CHECKING:
+    from .base import BaseClient
+    from .customers import CustomersModule
+    from .usages import UsagesModule
+    from .checkout import CheckoutModule
+    from .subscriptions import SubscriptionsModule
+    from .serialization import JSONCodec
+    from .transport import Transport
+    from .dns import DNSCache
+    from .retry import RetryPolicy
+    from .snapshot import EntitlementSnapshot, UsageReplayQueue
+    from .concurrency import BoundedExecutor
+    from .limits import AdaptiveLimiter, Limit
+    from .priority import Priority
+
+T = TypeVar('T')
+
 
 class MetrifoxClient:
     """
@@ -21,6 +37,13 @@ class MetrifoxClient:
     - usages: Usage tracking and access control
     - checkout: Checkout URL generation
 
+    HTTP clients and modules are only built on first use, so creating a
+    client is cheap. A client is safe to use from many threads at once and
+    can be created once at import time and shared by the worker processes
+    of a prefork server: connection pools are rebuilt in each child after a
+    fork, so processes never share sockets. See :func:`shared_client` for a
+    process-wide client per configuration.
+
     Example:
         >>> from metrifox_sdk import MetrifoxClient
         >>>
@@ -57,6 +80,23 @@ class MetrifoxClient:
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         web_app_base_url: Optional[str] = None,
+        json_codec: Optional['JSONCodec'] = None,
+        transport: Optional['Transport'] = None,
+        compression_threshold: Optional[int] = None,
+        usage_collector: Optional[str] = None,
+        dns_cache_ttl: Optional[float] = None,
+        warmup: bool = False,
+        retry_policy: Optional['RetryPolicy'] = None,
+        snapshot: Optional['EntitlementSnapshot'] = None,
+        replay_queue: Optional['UsageReplayQueue'] = None,
+        entitlements_cache_ttl: Optional[float] = None,
+        checkout_url_cache_ttl: Optional[float] = None,
+        executor_max_workers: int = 8,
+        executor_max_queue: Optional[int] = 1000,
+        executor_block: bool = True,
+        adaptive_concurrency: Union[bool, Callable[[], 'Limit']] = False,
+        priority_lanes: Union[bool, Mapping['Priority', float]] = False,
+        max_in_flight: int = 16,
     ):
         """
         Initialize the Metrifox client
@@ -65,6 +105,52 @@ class MetrifoxClient:
             api_key: Your Metrifox API key. If not provided, will look for METRIFOX_API_KEY env var
             base_url: Custom API base URL (optional)
             web_app_base_url: Custom web app base URL (optional)
+            json_codec: JSON codec used for request and response bodies (optional).
+                Defaults to orjson when installed, otherwise the standard library
+            transport: HTTP transport shared by the API and meter service clients
+                (optional). Defaults to a ``requests`` based HTTP/1.1 transport per client;
+                pass ``HTTP2Transport()`` to multiplex requests over HTTP/2
+            compression_threshold: Gzip request bodies of at least this many bytes
+                (optional). Request bodies are sent uncompressed by default
+            usage_collector: Path of a per-host usage collector's Unix socket
+                (optional). ``record_usage`` then hands events to the collector, see
+                :mod:`metrifox_sdk.aggregator`
+            dns_cache_ttl: Reuse resolved API host addresses for this many seconds
+                (optional). Applies to the default transport only
+            warmup: Call :meth:`warmup` in a background thread right away, so
+                connections are ready by the first request (useful on serverless
+                cold starts)
+            retry_policy: Retry failed requests (optional). POST and PATCH requests
+                carry an idempotency key that is reused on every retry, so
+                mutations are safe to retry. Requests are not retried by default
+            snapshot: Entitlement snapshot (optional). Successful access checks
+                update it and ``check_access`` answers from it while the meter
+                service is unavailable, see :mod:`metrifox_sdk.snapshot`
+            replay_queue: Queue for usage events that could not be delivered
+                because the meter service was unavailable (optional)
+            entitlements_cache_ttl: Serve entitlements summaries fetched or prefetched
+                within this many seconds from memory (optional)
+            checkout_url_cache_ttl: Reuse generated checkout URLs for this many
+                seconds (optional)
+            executor_max_workers: Threads of the pool running the modules'
+                ``*_async`` methods
+            executor_max_queue: Calls that may wait for a thread before
+                ``*_async`` methods block (None for no limit)
+            executor_block: Block ``*_async`` methods while the queue is full;
+                False raises :class:`~metrifox_sdk.exceptions.QueueFullError`
+                instead
+            adaptive_concurrency: Adapt the number of requests in flight to the
+                service's latency and load shedding, separately for the API and
+                the meter service (see :mod:`metrifox_sdk.limits`). True uses
+                :class:`~metrifox_sdk.limits.AIMDLimit`; a callable returning a
+                :class:`~metrifox_sdk.limits.Limit` (such as ``GradientLimit``)
+                picks the algorithm. Requests are not limited by default
+            priority_lanes: Admit requests by :class:`~metrifox_sdk.priority.Priority`,
+                so bulk jobs yield to interactive calls (see :mod:`metrifox_sdk.priority`).
+                True gives each priority its :data:`~metrifox_sdk.limits.DEFAULT_SHARES`
+                of the API and meter service clients' concurrency; a mapping sets the shares
+            max_in_flight: Requests each of those clients may have in flight with
+                priority lanes but without ``adaptive_concurrency``
 
         Raises:
             ConfigurationError: If API key is not provided or found in environment
@@ -80,40 +166,272 @@ class MetrifoxClient:
         self.web_app_base_url = web_app_base_url or self.DEFAULT_WEB_APP_BASE_URL
         self.meter_service_base_url = self.METER_SERVICE_BASE_URL
 
-        # Initialize base HTTP clients
-        self._main_client = BaseClient(self.api_key, self.base_url)
-        self._meter_client = BaseClient(self.api_key, self.meter_service_base_url)
+        self._json_codec = json_codec
+        self._transport = transport
+        self._compression_threshold = compression_threshold
+        self._usage_collector = usage_collector
+        self._dns_cache_ttl = dns_cache_ttl
+        self._retry_policy = retry_policy
+        self.snapshot = snapshot
+        self.replay_queue = replay_queue
+        self._entitlements_cache_ttl = entitlements_cache_ttl
+        self._checkout_url_cache_ttl = checkout_url_cache_ttl
+        self._executor_max_workers = executor_max_workers
+        self._executor_max_queue = executor_max_queue
+        self._executor_block = executor_block
+        self._adaptive_concurrency = adaptive_concurrency
+        self._priority_lanes = priority_lanes
+        self._max_in_flight = max_in_flight
+
+        # Base HTTP clients and modules are built lazily on first access
+        self._lock = threading.RLock()
+        self._main_client_instance: Optional['BaseClient'] = None
+        self._meter_client_instance: Optional['BaseClient'] = None
+        self._customers_module: Optional['CustomersModule'] = None
+        self._usages_module: Optional['UsagesModule'] = None
+        self._checkout_module: Optional['CheckoutModule'] = None
+        self._subscriptions_module: Optional['SubscriptionsModule'] = None
+        self._dns_cache_instance: Optional['DNSCache'] = None
+        self._executor_instance: Optional['BoundedExecutor'] = None
+        fork.register(self)
+
+        if warmup:
+            self.warmup(background=True)
 
-        # Initialize modules
-        self._customers_module = CustomersModule(self._main_client)
-        self._usages_module = UsagesModule(self._main_client, self._meter_client)
-        self._checkout_module = CheckoutModule(self._main_client)
-        self._subscriptions_module = SubscriptionsModule(self._main_client)
+    def _after_fork(self) -> None:
+        # Another thread may have held the lock at fork time
+        self._lock = threading.RLock()
 
     @staticmethod
     def _get_api_key_from_environment() -> Optional[str]:
         """Get API key from environment variable"""
         return os.getenv("METRIFOX_API_KEY")
 
+    def _lazy(self, attr: str, factory: Callable[[], T]) -> T:
+        """Return ``self.<attr>``, building it with ``factory`` exactly once"""
+        value = getattr(self, attr)
+        if value is None:
+            with self._lock:
+                value = getattr(self, attr)
+                if value is None:
+                    value = factory()
+                    setattr(self, attr, value)
+        return value
+
+    def _build_dns_cache(self) -> 'DNSCache':
+        from .dns import DNSCache
+
+        return DNSCache(ttl=self._dns_cache_ttl)
+
+    def _build_executor(self) -> 'BoundedExecutor':
+        from .concurrency import BoundedExecutor
+
+        return BoundedExecutor(
+            self._executor_max_workers, self._executor_max_queue, block=self._executor_block
+        )
+
+    def _build_base_client(self, base_url: str) -> 'BaseClient':
+        from .base import BaseClient
+
+        transport = self._transport
+        if transport is None and self._dns_cache_ttl:
+            from .transport import RequestsTransport
+            transport = RequestsTransport(dns_cache=self._dns_cache)
+
+        return BaseClient(
+            self.api_key,
+            base_url,
+            codec=self._json_codec,
+            transport=transport,
+            compression_threshold=self._compression_threshold,
+            retry_policy=self._retry_policy,
+            limiter=self._build_limiter()
+        )
+
+    def _build_limiter(self) -> Optional['AdaptiveLimiter']:
+        adaptive, lanes = self._adaptive_concurrency, self._priority_lanes
+        if not adaptive and not lanes:
+            return None
+        from .limits import DEFAULT_SHARES, AdaptiveLimiter, FixedLimit
+
+        if adaptive:
+            limit = adaptive() if callable(adaptive) else None
+        else:
+            limit = FixedLimit(self._max_in_flight)
+        shares = (DEFAULT_SHARES if lanes is True else lanes) if lanes else None
+        return AdaptiveLimiter(limit, shares=shares)
+
+    def _build_customers_module(self) -> 'CustomersModule':
+        from .customers import CustomersModule
+
+        return CustomersModule(self._main_client, executor=self.executor)
+
+    def _build_usages_module(self) -> 'UsagesModule':
+        from .usages import UsagesModule
+
+        collector = None
+        if self._usage_collector:
+            from .aggregator import UsageCollectorClient
+            collector = UsageCollectorClient(self._usage_collector, codec=self._json_codec)
+        return UsagesModule(
+            self._main_client,
+            self._meter_client,
+            collector=collector,
+            snapshot=self.snapshot,
+            replay_queue=self.replay_queue,
+            executor=self.executor
+        )
+
+    def _build_checkout_module(self) -> 'CheckoutModule':
+        from .checkout import URL_CACHE_SIZE, CheckoutModule
+
+        cache = None
+        if self._checkout_url_cache_ttl:
+            from .cache import TTLCache
+            cache = TTLCache(self._checkout_url_cache_ttl, max_size=URL_CACHE_SIZE)
+        return CheckoutModule(self._main_client, cache=cache, executor=self.executor)
+
+    def _build_subscriptions_module(self) -> 'SubscriptionsModule':
+        from .subscriptions import SubscriptionsModule
+
+        entitlements_cache = None
+        if self._entitlements_cache_ttl:
+            from .cache import TTLCache
+            entitlements_cache = TTLCache(self._entitlements_cache_ttl)
+        return SubscriptionsModule(
+            self._main_client,
+            snapshot=self.snapshot,
+            entitlements_cache=entitlements_cache,
+            executor=self.executor
+        )
+
+    @property
+    def _dns_cache(self) -> 'DNSCache':
+        """Resolved addresses shared by the API and meter service clients"""
+        return self._lazy('_dns_cache_instance', self._build_dns_cache)
+
+    @property
+    def executor(self) -> 'BoundedExecutor':
+        """
+        Bounded thread pool running the modules' ``*_async`` methods
+
+        Example:
+            >>> futures = [client.usages.record_usage_async(event) for event in events]
+            >>> results = [future.result() for future in futures]
+        """
+        return self._lazy('_executor_instance', self._build_executor)
+
+    @property
+    def _main_client(self) -> 'BaseClient':
+        """HTTP client for the main API"""
+        return self._lazy('_main_client_instance', lambda: self._build_base_client(self.base_url))
+
+    @property
+    def _meter_client(self) -> 'BaseClient':
+        """HTTP client for the meter service"""
+        return self._lazy(
+            '_meter_client_instance', lambda: self._build_base_client(self.meter_service_base_url)
+        )
+
+    @property
+    def limiters(self) -> Dict[str, 'AdaptiveLimiter']:
+        """
+        Concurrency limiters (adaptive limits and priority lanes) of the API and
+        meter service clients built so far
+
+        Example:
+            >>> client = MetrifoxClient(api_key="your_api_key", adaptive_concurrency=True)
+            >>> client.limiters["api"].limit
+        """
+        clients = {'api': self._main_client_instance, 'meter': self._meter_client_instance}
+        return {
+            name: client.limiter
+            for name, client in clients.items()
+            if client is not None and client.limiter is not None
+        }
+
+    def warmup(
+        self,
+        connections: int = 1,
+        background: bool = False,
+        timeout: float = 5.0
+    ) -> Optional[threading.Thread]:
+        """
+        Pre-establish connections to the API and meter service
+
+        Resolves both hosts and opens pooled connections to them concurrently,
+        so the first ``check_access`` or ``record_usage`` in a fresh process
+        (e.g. a serverless cold start) costs a normal round trip instead of
+        DNS, TCP and TLS setup. Failures are ignored; requests then connect
+        as usual.
+
+        Args:
+            connections: Number of connections to open per host
+            background: Return immediately and warm up in a daemon thread
+            timeout: Timeout in seconds for each connection
+
+        Returns:
+            The background thread if ``background`` is True, otherwise None
+
+        Example:
+            >>> client = MetrifoxClient(api_key="your_api_key", dns_cache_ttl=300)
+            >>> client.warmup(connections=2)
+        """
+        def run() -> None:
+            clients = [self._main_client, self._meter_client]
+            threads = [
+                threading.Thread(target=client.warmup, args=(connections, timeout), daemon=True)
+                for client in clients
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='metrifox-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def close(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """
+        Shut down the executor and close the HTTP transports
+
+        Args:
+            wait: Wait for calls submitted through ``*_async`` methods to finish
+            cancel_pending: Cancel submitted calls that have not started yet
+        """
+        with self._lock:
+            executor = self._executor_instance
+            main, meter = self._main_client_instance, self._meter_client_instance
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+        if main is not None:
+            main.close()
+        if meter is not None and (main is None or meter.transport is not main.transport):
+            meter.close()
+
     @property
-    def customers(self) -> CustomersModule:
+    def customers(self) -> 'CustomersModule':
         """Access the customers module"""
-        return self._customers_module
+        return self._lazy('_customers_module', self._build_customers_module)
 
     @property
-    def usages(self) -> UsagesModule:
+    def usages(self) -> 'UsagesModule':
         """Access the usages module"""
-        return self._usages_module
+        return self._lazy('_usages_module', self._build_usages_module)
 
     @property
-    def checkout(self) -> CheckoutModule:
+    def checkout(self) -> 'CheckoutModule':
         """Access the checkout module"""
-        return self._checkout_module
+        return self._lazy('_checkout_module', self._build_checkout_module)
 
     @property
-    def subscriptions(self) -> SubscriptionsModule:
+    def subscriptions(self) -> 'SubscriptionsModule':
         """Access the subscriptions module"""
-        return self._subscriptions_module
+        return self._lazy('_subscriptions_module', self._build_subscriptions_module)
 
 
 def init(config: Optional[Dict[str, Any]] = None) -> MetrifoxClient:
@@ -127,6 +445,23 @@ def init(config: Optional[Dict[str, Any]] = None) -> MetrifoxClient:
             - api_key: Your Metrifox API key
             - base_url: Custom API base URL
             - web_app_base_url: Custom web app base URL
+            - json_codec: Custom JSON codec
+            - transport: Custom HTTP transport
+            - compression_threshold: Minimum request body size to gzip
+            - usage_collector: Path of a usage collector's Unix socket
+            - dns_cache_ttl: Seconds to reuse resolved API host addresses
+            - warmup: Pre-establish connections in a background thread
+            - retry_policy: RetryPolicy for failed requests
+            - snapshot: EntitlementSnapshot served while the meter service is down
+            - replay_queue: UsageReplayQueue for undelivered usage events
+            - entitlements_cache_ttl: Seconds to serve entitlements summaries from memory
+            - checkout_url_cache_ttl: Seconds to reuse generated checkout URLs
+            - executor_max_workers: Threads running ``*_async`` methods
+            - executor_max_queue: Calls that may wait for one of those threads
+            - executor_block: Block while that queue is full instead of raising
+            - adaptive_concurrency: Adapt the requests in flight to observed latency
+            - priority_lanes: Let interactive requests go ahead of bulk ones
+            - max_in_flight: Requests in flight per HTTP client with priority lanes
 
     Returns:
         Initialized MetrifoxClient instance
@@ -144,5 +479,91 @@ def init(config: Optional[Dict[str, Any]] = None) -> MetrifoxClient:
     return MetrifoxClient(
         api_key=config.get('api_key'),
         base_url=config.get('base_url'),
-        web_app_base_url=config.get('web_app_base_url')
+        web_app_base_url=config.get('web_app_base_url'),
+        json_codec=config.get('json_codec'),
+        transport=config.get('transport'),
+        compression_threshold=config.get('compression_threshold'),
+        usage_collector=config.get('usage_collector'),
+        dns_cache_ttl=config.get('dns_cache_ttl'),
+        warmup=config.get('warmup', False),
+        retry_policy=config.get('retry_policy'),
+        snapshot=config.get('snapshot'),
+        replay_queue=config.get('replay_queue'),
+        entitlements_cache_ttl=config.get('entitlements_cache_ttl'),
+        checkout_url_cache_ttl=config.get('checkout_url_cache_ttl'),
+        executor_max_workers=config.get('executor_max_workers', 8),
+        executor_max_queue=config.get('executor_max_queue', 1000),
+        executor_block=config.get('executor_block', True),
+        adaptive_concurrency=config.get('adaptive_concurrency', False),
+        priority_lanes=config.get('priority_lanes', False),
+        max_in_flight=config.get('max_in_flight', 16)
     )
+
+
+def _hashable(value: Any) -> Any:
+    """Turn a configuration value into a hashable part of a registry key"""
+    if isinstance(value, Mapping):
+        return frozenset((k, _hashable(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        # Other unhashable objects (transports, limiters) are shared by identity
+        return id(value)
+    return value
+
+
+class _SharedClients:
+    """Process-wide registry of clients keyed by configuration"""
+
+    def __init__(self):
+        self._clients: Dict[Tuple[Any, ...], MetrifoxClient] = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def get(self, config: Dict[str, Any]) -> MetrifoxClient:
+        config = {k: v for k, v in config.items() if v is not None}
+        config.setdefault('api_key', MetrifoxClient._get_api_key_from_environment())
+        key = tuple(sorted((name, _hashable(value)) for name, value in config.items()))
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = init(config)
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+
+_shared_clients = _SharedClients()
+
+
+def shared_client(config: Optional[Dict[str, Any]] = None) -> MetrifoxClient:
+    """
+    Return the process-wide client for a configuration
+
+    The first call with a given configuration creates the client (as
+    :func:`init` would) and later calls from any thread return the same
+    instance, so connection pools are shared across the process.
+
+    Args:
+        config: Optional configuration dictionary, as accepted by :func:`init`
+
+    Returns:
+        The shared MetrifoxClient instance for this configuration
+
+    Example:
+        >>> from metrifox_sdk import shared_client
+        >>>
+        >>> def handler(event, context):
+        ...     client = shared_client({"api_key": "your_api_key"})
+        ...     return client.checkout.url({"offering_key": "premium_plan"})
+    """
+    return _shared_clients.get(config or {})
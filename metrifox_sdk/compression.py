@@ -0,0 +1,37 @@
+"""
+Compression helpers for Metrifox SDK
+
+Response decompression is handled by the transport's HTTP library, which
+only advertises the encodings it can decode (gzip and deflate always; br
+and zstd when the optional decoder packages are installed, see the
+``compression`` extra). Request bodies can additionally be gzip-compressed
+once they reach a size threshold.
+"""
+
+import gzip
+from typing import Optional, Tuple
+
+# Level 6 is zlib's default and a good size/CPU trade-off for JSON
+GZIP_LEVEL = 6
+
+
+def compress_body(
+    content: Optional[bytes],
+    threshold: Optional[int],
+    level: int = GZIP_LEVEL
+) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Gzip a request body if it is at least ``threshold`` bytes long
+
+    Args:
+        content: Encoded request body
+        threshold: Minimum size in bytes to compress, or None to never compress
+        level: gzip compression level (1-9)
+
+    Returns:
+        The (possibly compressed) body and its Content-Encoding, or None if
+        the body was left as is
+    """
+    if content is None or threshold is None or len(content) < threshold:
+        return content, None
+    return gzip.compress(content, compresslevel=level, mtime=0), 'gzip'
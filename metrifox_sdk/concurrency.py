@@ -0,0 +1,218 @@
+"""
+Bounded concurrency helpers for Metrifox SDK
+
+Bulk operations fan requests out over a thread pool. The transports'
+connection pools are thread-safe, so concurrent calls share connections.
+Calls run at the request priority of the code that scheduled them.
+"""
+
+import queue
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+from . import fork
+from .exceptions import APIError, QueueFullError
+from .priority import bind_priority
+
+T = TypeVar('T')
+
+DEFAULT_MAX_WORKERS = 8
+
+# ThreadPoolExecutor.shutdown gained cancel_futures in Python 3.9
+_SHUTDOWN_CANCELS_FUTURES = sys.version_info >= (3, 9)
+
+
+def gather(
+    func: Callable[[T], Any],
+    items: Iterable[T],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    return_exceptions: bool = False
+) -> List[Any]:
+    """
+    Call ``func`` on every item with at most ``max_workers`` calls in flight
+
+    Items are consumed lazily, so a long iterable is never materialised as
+    pending work all at once.
+
+    Args:
+        func: Function called with each item
+        items: Items to process
+        max_workers: Maximum number of concurrent calls
+        return_exceptions: Return an item's APIError in its place instead of
+            raising the first one
+
+    Returns:
+        The results in the order of ``items``
+
+    Example:
+        >>> summaries = gather(client.subscriptions.get_entitlements_summary, subscription_ids)
+    """
+    results: List[Any] = []
+    iterator = iter(items)
+    func = bind_priority(func)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+
+        def submit_next() -> bool:
+            for item in iterator:
+                index = len(results)
+                results.append(None)
+                in_flight[executor.submit(func, item)] = index
+                return True
+            return False
+
+        for _ in range(max_workers):
+            if not submit_next():
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    results[index] = future.result()
+                except APIError as e:
+                    if not return_exceptions:
+                        for pending in in_flight:
+                            pending.cancel()
+                        raise
+                    results[index] = e
+                submit_next()
+    return results
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a limit on the number of queued calls
+
+    The pool's threads are started on first use. Once ``max_workers`` calls
+    are running and ``max_queue`` more are waiting, :meth:`submit` blocks
+    until one finishes (or raises :class:`~metrifox_sdk.exceptions.QueueFullError`
+    when ``block`` is False), so producers cannot queue unbounded work. Calls
+    submitted from the pool's own threads never block, since waiting for a
+    slot they hold themselves would deadlock: they raise ``QueueFullError``.
+
+    Args:
+        max_workers: Number of worker threads
+        max_queue: Maximum number of calls waiting for a worker (None for no limit)
+        block: Block :meth:`submit` while the queue is full instead of raising
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queue: Optional[int] = 1000,
+        block: bool = True
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.block = block
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker = threading.local()
+        self._shut_down = False
+        self._slots = self._new_slots()
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _new_slots(self) -> Optional[threading.BoundedSemaphore]:
+        if self.max_queue is None:
+            return None
+        return threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+    def _after_fork(self) -> None:
+        # Worker threads do not exist in the child
+        self._lock = threading.Lock()
+        self._executor = None
+        self._worker = threading.local()
+        self._slots = self._new_slots()
+
+    def submit(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> 'Future[T]':
+        """
+        Schedule ``func(*args, **kwargs)`` and return its future
+
+        Raises:
+            QueueFullError: If the queue is full and the executor does not block,
+                or the call is submitted from one of the pool's threads
+            RuntimeError: If the executor has been shut down
+        """
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                if self._shut_down:
+                    raise RuntimeError("cannot schedule new futures after shutdown")
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='metrifox',
+                        initializer=self._mark_worker
+                    )
+                executor = self._executor
+
+        slots = self._slots
+        block = self.block and not getattr(self._worker, 'active', False)
+        if slots is not None and not slots.acquire(blocking=block):
+            raise QueueFullError(
+                f"Executor queue is full ({self.max_workers} running, {self.max_queue} queued)"
+            )
+        try:
+            future = executor.submit(bind_priority(func), *args, **kwargs)
+        except BaseException:
+            if slots is not None:
+                slots.release()
+            raise
+        if slots is not None:
+            future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _mark_worker(self) -> None:
+        self._worker.active = True
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        Stop accepting calls and release the worker threads
+
+        Args:
+            wait: Wait for running and queued calls to finish
+            cancel_futures: Cancel calls that have not started yet
+        """
+        with self._lock:
+            self._shut_down = True
+            executor = self._executor
+        if executor is None:
+            return
+        if _SHUTDOWN_CANCELS_FUTURES:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+            return
+        if cancel_futures:
+            _cancel_queued(executor)
+        executor.shutdown(wait=wait)
+
+
+def _cancel_queued(executor: ThreadPoolExecutor) -> None:
+    """Cancel the calls still waiting in ``executor``'s queue, as ``cancel_futures`` does"""
+    while True:
+        try:
+            work_item = executor._work_queue.get_nowait()  # type: ignore[attr-defined]
+        except queue.Empty:
+            return
+        if work_item is not None:
+            work_item.future.cancel()
+
+
+def future_variant(name: str) -> Callable[..., 'Future[Any]']:
+    """
+    Build a method running the module method ``name`` on the module's executor
+
+    The module must have an ``_executor`` attribute holding a :class:`BoundedExecutor`.
+    """
+    def method(self, *args: Any, **kwargs: Any) -> 'Future[Any]':
+        return self._executor.submit(getattr(self, name), *args, **kwargs)
+
+    method.__name__ = f"{name}_async"
+    method.__qualname__ = method.__name__
+    method.__doc__ = (
+        f"Run :meth:`{name}` on the client's thread pool and return a\n"
+        f"``concurrent.futures.Future`` of its result"
+    )
+    return method
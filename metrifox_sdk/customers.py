@@ -2,27 +2,60 @@
 Customers module for Metrifox SDK
 """
 
-from typing import Dict, Any, Union, Optional
+import hashlib
+import json
+from typing import Dict, Any, Iterator, Union, Optional
 from .base import BaseClient
+from .concurrency import BoundedExecutor, future_variant
+from .models import Customer, CustomerDetails, RawResponse, Response, to_response
+from .pagination import iter_pages
 from .types import (
     CustomerCreateRequest,
     CustomerUpdateRequest,
     CustomerListRequest
 )
 
+# Keys a page of customers may be nested under when ``data`` is an object
+CUSTOMER_ITEM_KEYS = ('customers', 'items', 'results')
+
+
+def customer_create_idempotency_key(customer: Dict[str, Any]) -> str:
+    """
+    Derive the idempotency key of a customer creation from its content
+
+    Re-sending the same data reuses the key, so a retried bulk import does not
+    create duplicates, while corrected data gets a new key instead of the
+    stored response of the earlier attempt.
+    """
+    content = json.dumps(customer, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+    return f"customer-create-{customer.get('customer_key')}-{digest}"
+
 
 class CustomersModule:
     """Module for managing customers"""
 
-    def __init__(self, client: BaseClient):
+    def __init__(self, client: BaseClient, executor: Optional[BoundedExecutor] = None):
         self._client = client
-
-    def create(self, request: Union[CustomerCreateRequest, Dict[str, Any]]) -> Dict[str, Any]:
+        self._executor = executor or BoundedExecutor()
+
+    def create(
+        self,
+        request: Union[CustomerCreateRequest, Dict[str, Any]],
+        typed: bool = False,
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Create a new customer
 
         Args:
             request: Customer creation data (CustomerCreateRequest or dict)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            idempotency_key: Key identifying this creation across retries (optional).
+                Generated per call if not given
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
 
         Returns:
             API response with created customer data
@@ -37,15 +70,30 @@ class CustomersModule:
             ... })
         """
         data = request.to_dict() if hasattr(request, 'to_dict') else request
-        return self._client.post("customers/new", json=data)
-
-    def update(self, customer_key: str, request: Union[CustomerUpdateRequest, Dict[str, Any]]) -> Dict[str, Any]:
+        response = self._client.post(
+            "customers/new", json=data, idempotency_key=idempotency_key, raw=raw
+        )
+        return to_response(response, Customer) if typed and not raw else response
+
+    def update(
+        self,
+        customer_key: str,
+        request: Union[CustomerUpdateRequest, Dict[str, Any]],
+        typed: bool = False,
+        idempotency_key: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Update an existing customer
 
         Args:
             customer_key: The customer's unique key
             request: Customer update data (CustomerUpdateRequest or dict)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            idempotency_key: Key identifying this update across retries (optional).
+                Generated per call if not given
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
 
         Returns:
             API response with updated customer data
@@ -57,14 +105,22 @@ class CustomersModule:
             ... })
         """
         data = request.to_dict() if hasattr(request, 'to_dict') else request
-        return self._client.patch(f"customers/{customer_key}", json=data)
-
-    def get(self, customer_key: str) -> Dict[str, Any]:
+        response = self._client.patch(
+            f"customers/{customer_key}", json=data, idempotency_key=idempotency_key, raw=raw
+        )
+        return to_response(response, Customer) if typed and not raw else response
+
+    def get(
+        self, customer_key: str, typed: bool = False, raw: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Get a customer by key
 
         Args:
             customer_key: The customer's unique key
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
 
         Returns:
             API response with customer data
@@ -72,14 +128,20 @@ class CustomersModule:
         Example:
             >>> customer = client.customers.get("cust_123")
         """
-        return self._client.get(f"customers/{customer_key}")
+        response = self._client.get(f"customers/{customer_key}", raw=raw)
+        return to_response(response, Customer) if typed and not raw else response
 
-    def get_details(self, customer_key: str) -> Dict[str, Any]:
+    def get_details(
+        self, customer_key: str, typed: bool = False, raw: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Get detailed customer information including usage stats
 
         Args:
             customer_key: The customer's unique key
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
 
         Returns:
             API response with detailed customer data
@@ -88,18 +150,34 @@ class CustomersModule:
             >>> details = client.customers.get_details("cust_123")
             >>> print(details['data']['usage_summary'])
         """
-        return self._client.get(f"customers/{customer_key}/details")
-
-    def list(self, params: Optional[Union[CustomerListRequest, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        response = self._client.get(f"customers/{customer_key}/details", raw=raw)
+        return to_response(response, CustomerDetails) if typed and not raw else response
+
+    def list(
+        self,
+        params: Optional[Union[CustomerListRequest, Dict[str, Any]]] = None,
+        typed: bool = False,
+        raw: bool = False,
+        stream: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse, Iterator[Union[Dict[str, Any], Customer]]]:
         """
         List customers with optional pagination and filters
 
         Args:
             params: Optional filtering and pagination parameters
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
+            stream: Return an iterator over the page's customers, decoded one at a
+                time as the response arrives, so memory use does not grow with
+                the page size. Pagination metadata is not returned
 
         Returns:
             API response with list of customers and pagination metadata
 
+        Raises:
+            ValueError: If both ``stream`` and ``raw`` are set
+
         Example:
             >>> # List all customers
             >>> customers = client.customers.list()
@@ -112,16 +190,70 @@ class CustomersModule:
             ...     "customer_type": "BUSINESS",
             ...     "search_term": "Acme"
             ... })
+            >>>
+            >>> # Stream a large page
+            >>> for customer in client.customers.list({"per_page": 10000}, stream=True):
+            ...     export(customer)
         """
+        if stream and raw:
+            raise ValueError("stream and raw cannot be combined")
         query_params = params.to_dict() if hasattr(params, 'to_dict') else (params or {})
-        return self._client.get("customers", params=query_params)
+        if stream:
+            return self._stream_list(query_params, typed)
+        response = self._client.get("customers", params=query_params, raw=raw)
+        return to_response(response, Customer) if typed and not raw else response
+
+    def iter_list(
+        self,
+        params: Optional[Union[CustomerListRequest, Dict[str, Any]]] = None,
+        per_page: int = 100,
+        read_ahead: int = 0,
+        typed: bool = False
+    ) -> Iterator[Union[Dict[str, Any], Customer]]:
+        """
+        Iterate over all customers matching the filters, page by page
+
+        Args:
+            params: Optional filters (``page`` and ``per_page`` are managed by the iterator)
+            per_page: Customers requested per page
+            read_ahead: Pages requested ahead concurrently while the current one is consumed
+            typed: Yield :class:`~metrifox_sdk.models.Customer` models instead of dicts
+
+        Yields:
+            Customers
 
-    def delete(self, customer_key: str) -> Dict[str, Any]:
+        Example:
+            >>> for customer in client.customers.iter_list({"customer_type": "BUSINESS"}):
+            ...     print(customer["customer_key"])
+        """
+        filters = params.to_dict() if hasattr(params, 'to_dict') else dict(params or {})
+        filters.pop('page', None)
+        filters['per_page'] = per_page
+        pages = iter_pages(
+            lambda page: self._client.get("customers", params={**filters, "page": page}),
+            per_page,
+            keys=CUSTOMER_ITEM_KEYS,
+            read_ahead=read_ahead
+        )
+        for customers in pages:
+            for customer in customers:
+                yield Customer(customer) if typed else customer
+
+    def _stream_list(
+        self, query_params: Dict[str, Any], typed: bool
+    ) -> Iterator[Union[Dict[str, Any], Customer]]:
+        for customer in self._client.stream_items(
+            "customers", params=query_params, keys=CUSTOMER_ITEM_KEYS
+        ):
+            yield Customer(customer) if typed else customer
+
+    def delete(self, customer_key: str, raw: bool = False) -> Union[Dict[str, Any], RawResponse]:
         """
         Delete a customer
 
         Args:
             customer_key: The customer's unique key
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
 
         Returns:
             API response confirming deletion
@@ -129,7 +261,7 @@ class CustomersModule:
         Example:
             >>> response = client.customers.delete("cust_123")
         """
-        return self._client.delete(f"customers/{customer_key}")
+        return self._client.delete(f"customers/{customer_key}", raw=raw)
 
     def has_active_subscription(self, customer_key: str) -> bool:
         """
@@ -149,12 +281,14 @@ class CustomersModule:
         response = self._client.get(f"customers/{customer_key}/check-active-subscription")
         return response.get('data', {}).get('has_active_subscription', False)
 
-    def upload_csv(self, file_path: str) -> Dict[str, Any]:
+    def upload_csv(self, file_path: str, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Upload customers via CSV file
 
         Args:
             file_path: Path to the CSV file
+            idempotency_key: Key identifying this upload across retries (optional).
+                Generated per call if not given
 
         Returns:
             API response with upload results
@@ -166,4 +300,16 @@ class CustomersModule:
         """
         with open(file_path, 'rb') as f:
             files = {'csv': (file_path.split('/')[-1], f, 'text/csv')}
-            return self._client.post("customers/csv-upload", files=files)
+            return self._client.post(
+                "customers/csv-upload", files=files, idempotency_key=idempotency_key
+            )
+
+    # Future-returning variants, run on the client's bounded thread pool
+    create_async = future_variant('create')
+    update_async = future_variant('update')
+    get_async = future_variant('get')
+    get_details_async = future_variant('get_details')
+    list_async = future_variant('list')
+    delete_async = future_variant('delete')
+    has_active_subscription_async = future_variant('has_active_subscription')
+    upload_csv_async = future_variant('upload_csv')
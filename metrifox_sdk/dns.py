@@ -0,0 +1,110 @@
+"""
+DNS caching for Metrifox SDK
+
+Resolved addresses of the API hosts are cached for a TTL so that new
+pooled connections skip the DNS lookup. TLS still verifies the original
+hostname: only the address the socket connects to comes from the cache.
+"""
+
+import ipaddress
+import socket
+from typing import Optional
+
+from .cache import TTLCache
+
+
+class DNSCache:
+    """
+    Cache of resolved host addresses
+
+    Args:
+        ttl: Seconds a resolved address is reused
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._addresses = TTLCache(ttl)
+
+    def resolve(self, host: str, port: int) -> Optional[str]:
+        """
+        Resolve ``host`` to an IP address, using the cache when possible
+
+        Returns:
+            The address, or None if ``host`` is already an IP address or
+            cannot be resolved (the connection then resolves it as usual)
+        """
+        try:
+            ipaddress.ip_address(host.strip('[]'))
+            return None
+        except ValueError:
+            pass
+
+        key = (host, port)
+        address = self._addresses.get(key)
+        if address is None:
+            try:
+                infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+            except OSError:
+                return None
+            if not infos:
+                return None
+            address = infos[0][4][0]
+            self._addresses.set(key, address)
+        return address
+
+    def invalidate(self, host: str, port: int) -> None:
+        """Forget the cached address of ``host``"""
+        self._addresses.pop((host, port))
+
+    def clear(self) -> None:
+        """Forget all cached addresses"""
+        self._addresses.clear()
+
+
+def mount_dns_cache(session, dns_cache: DNSCache) -> None:
+    """Make a ``requests.Session`` open its connections through ``dns_cache``"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class CachedDNSMixin:
+        def _new_conn(self):
+            host = self._dns_host
+            address = dns_cache.resolve(host, self.port)
+            if address is None:
+                return super()._new_conn()
+            # Connect to the cached address; TLS still uses self.host for SNI
+            # and certificate verification
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except Exception:
+                # The cached address may be stale: resolve afresh
+                dns_cache.invalidate(host, self.port)
+                self._dns_host = host
+                return super()._new_conn()
+            finally:
+                self._dns_host = host
+
+    class CachedDNSHTTPConnection(CachedDNSMixin, HTTPConnection):
+        pass
+
+    class CachedDNSHTTPSConnection(CachedDNSMixin, HTTPSConnection):
+        pass
+
+    class CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CachedDNSHTTPConnection
+
+    class CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CachedDNSHTTPSConnection
+
+    class CachedDNSAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': CachedDNSHTTPConnectionPool,
+                'https': CachedDNSHTTPSConnectionPool,
+            }
+
+    session.mount('http://', CachedDNSAdapter())
+    session.mount('https://', CachedDNSAdapter())
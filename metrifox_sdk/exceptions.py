@@ -25,3 +25,13 @@ class APIError(MetrifoxError):
         if self.status_code:
             return f"{self.args[0]} (Status: {self.status_code})"
         return self.args[0]
+
+
+class TransportError(APIError):
+    """Raised when a request could not be sent or no response was received"""
+    pass
+
+
+class QueueFullError(MetrifoxError):
+    """Raised when a call cannot be queued because the client's executor is full"""
+    pass
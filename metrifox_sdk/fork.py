@@ -0,0 +1,40 @@
+"""
+Fork safety for Metrifox SDK
+
+Objects holding per-process resources (connection pools, caches,
+background threads) register themselves here. After ``os.fork()`` every
+registered object's ``_after_fork()`` runs in the child, so a client
+created before a prefork server (gunicorn, celery) forks its workers never
+shares sockets with its parent and restarts its own threads.
+"""
+
+import os
+import threading
+import weakref
+
+_registry: "weakref.WeakSet" = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+def register(obj) -> None:
+    """
+    Call ``obj._after_fork()`` in the child process after every fork
+
+    Only a weak reference is kept, so registration does not keep ``obj`` alive.
+    """
+    with _lock:
+        _registry.add(obj)
+
+
+def _run_after_fork_hooks() -> None:
+    """Reset registered objects in a freshly forked child"""
+    global _lock
+    # Another thread may have held the lock at fork time; it will never be
+    # released in the child
+    _lock = threading.Lock()
+    for obj in list(_registry):
+        obj._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_run_after_fork_hooks)
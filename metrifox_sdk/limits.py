@@ -0,0 +1,285 @@
+"""
+Adaptive concurrency limits for Metrifox SDK
+
+An :class:`AdaptiveLimiter` caps the requests a
+:class:`~metrifox_sdk.base.BaseClient` has in flight. The cap is not fixed:
+every completed request reports its latency and whether it was dropped
+(a timeout, connection failure, 429 or 503), and the limiter's
+:class:`Limit` algorithm raises the cap while the service keeps up and
+lowers it as soon as latency grows or requests are shed. Bulk helpers
+running many worker threads then send as many requests at once as the
+service can currently take, without tuning ``max_workers`` by hand.
+
+Two algorithms are provided, after Netflix's concurrency-limits:
+
+- :class:`AIMDLimit`: additive increase, multiplicative decrease on drops
+  or latency above a threshold
+- :class:`GradientLimit`: scales the limit by the ratio of the long-term
+  to the short-term latency, so queueing shrinks it before errors appear
+
+:class:`FixedLimit` keeps the limit constant, for priority lanes without
+adaptation. With ``shares``, the limiter also runs priority lanes: each
+:class:`~metrifox_sdk.priority.Priority` may only fill its share of the
+limit, and a free slot always goes to the most urgent waiting request.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Mapping, Optional
+
+from . import fork
+from .priority import Priority, current_priority
+
+#: Response statuses meaning the service is shedding load
+DROP_STATUSES = frozenset((408, 429, 503, 504))
+
+# Shortest latency GradientLimit works with, since clocks can report 0.0
+MIN_LATENCY = 1e-6
+
+#: Default priority lane shares: bulk requests leave half of the limit free
+#: for interactive ones
+DEFAULT_SHARES: Mapping[Priority, float] = {
+    Priority.INTERACTIVE: 1.0,
+    Priority.NORMAL: 0.8,
+    Priority.BULK: 0.5,
+}
+
+
+class Limit(ABC):
+    """Interface for concurrency limit algorithms"""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+
+    @property
+    def limit(self) -> int:
+        """Current maximum number of requests in flight"""
+        return int(self._limit)
+
+    @abstractmethod
+    def on_sample(self, latency: float, inflight: int, dropped: bool) -> None:
+        """
+        Update the limit from a completed request
+
+        Args:
+            latency: Seconds the request took
+            inflight: Requests in flight when it was sent, itself included
+            dropped: Whether the request timed out, failed or was shed
+        """
+
+    def _clamp(self, limit: float) -> float:
+        return max(float(self.min_limit), min(limit, float(self.max_limit)))
+
+
+class FixedLimit(Limit):
+    """
+    A limit that does not adapt
+
+    Args:
+        limit: Maximum number of requests in flight
+    """
+
+    def __init__(self, limit: int = 16):
+        super().__init__(limit, limit, limit)
+
+    def on_sample(self, latency: float, inflight: int, dropped: bool) -> None:
+        pass
+
+
+class AIMDLimit(Limit):
+    """
+    Additive increase, multiplicative decrease
+
+    The limit grows by one for every request completed while at least half
+    of it was in use, and is multiplied by ``backoff_ratio`` when a request
+    is dropped or slower than ``latency_threshold``.
+
+    Args:
+        initial: Starting limit
+        min_limit: Lowest limit
+        max_limit: Highest limit
+        backoff_ratio: Factor applied to the limit on a drop
+        latency_threshold: Seconds above which a request counts as dropped (optional)
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.9,
+        latency_threshold: Optional[float] = None
+    ):
+        super().__init__(initial, min_limit, max_limit)
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+
+    def on_sample(self, latency: float, inflight: int, dropped: bool) -> None:
+        if dropped or (self.latency_threshold is not None and latency > self.latency_threshold):
+            self._limit = self._clamp(math.floor(self._limit * self.backoff_ratio))
+        elif inflight * 2 >= self._limit:
+            self._limit = self._clamp(self._limit + 1)
+
+
+class GradientLimit(Limit):
+    """
+    Latency gradient
+
+    Tracks a short-term and a long-term (no-load) average latency. While
+    the short-term latency stays near the long-term one the limit grows by
+    about its square root; when requests start queueing and latency rises,
+    the limit shrinks by their ratio. Drops halve the gradient.
+
+    Args:
+        initial: Starting limit
+        min_limit: Lowest limit
+        max_limit: Highest limit
+        tolerance: Latency increase (as a ratio) tolerated before the limit shrinks
+        smoothing: Weight of each new limit estimate
+        short_window: Samples averaged for the short-term latency
+        long_window: Samples averaged for the long-term latency
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        long_window: int = 600
+    ):
+        super().__init__(initial, min_limit, max_limit)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._short_weight = 2.0 / (short_window + 1)
+        self._long_weight = 2.0 / (long_window + 1)
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+
+    def on_sample(self, latency: float, inflight: int, dropped: bool) -> None:
+        latency = max(latency, MIN_LATENCY)
+        if self._short_latency is None:
+            self._short_latency = self._long_latency = latency
+        self._short_latency += (latency - self._short_latency) * self._short_weight
+        self._long_latency += (latency - self._long_latency) * self._long_weight
+        # Let the baseline recover quickly after a sustained slowdown ends
+        if self._long_latency > 2 * self._short_latency:
+            self._long_latency *= 0.95
+
+        # The limit is not being tested while well under half of it is in use
+        if not dropped and inflight * 2 < self._limit:
+            return
+
+        if dropped:
+            gradient = 0.5
+        else:
+            gradient = max(0.5, min(1.0, self.tolerance * self._long_latency / self._short_latency))
+        estimate = self._limit * gradient + math.sqrt(self._limit)
+        self._limit = self._clamp(self._limit * (1 - self.smoothing) + estimate * self.smoothing)
+
+
+class AdaptiveLimiter:
+    """
+    Blocks requests beyond an adaptive limit on the number in flight
+
+    Requests are admitted most urgent first: while a request of a higher
+    :class:`~metrifox_sdk.priority.Priority` is waiting, lower ones wait
+    too. With ``shares``, a priority may also only fill its share of the
+    limit, keeping the rest free for more urgent requests.
+
+    Args:
+        limit: Limit algorithm (defaults to :class:`AIMDLimit`)
+        shares: Fraction of the limit each priority may fill (optional, see
+            :data:`DEFAULT_SHARES`). Priorities not listed may fill all of it
+
+    Example:
+        >>> limiter = AdaptiveLimiter(GradientLimit(max_limit=32), shares=DEFAULT_SHARES)
+        >>> client = BaseClient("your_api_key", "https://api.metrifox.com/api/v1/", limiter=limiter)
+        >>> limiter.limit, limiter.inflight
+    """
+
+    def __init__(
+        self, limit: Optional[Limit] = None, shares: Optional[Mapping[Priority, float]] = None
+    ):
+        self.algorithm = limit or AIMDLimit()
+        self.shares: Dict[Priority, float] = dict(shares or {})
+        self.inflight = 0
+        self._waiting = [0] * len(Priority)
+        self._condition = threading.Condition()
+        fork.register(self)
+
+    def _after_fork(self) -> None:
+        # Requests in flight in the parent do not exist in the child
+        self.inflight = 0
+        self._waiting = [0] * len(Priority)
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current maximum number of requests in flight"""
+        return self.algorithm.limit
+
+    def capacity(self, priority: Priority) -> int:
+        """Requests in flight up to which a request of ``priority`` is admitted"""
+        return max(1, int(self.algorithm.limit * self.shares.get(priority, 1.0)))
+
+    def _admits(self, priority: Priority) -> bool:
+        return self.inflight < self.capacity(priority) and not any(self._waiting[:priority])
+
+    def acquire(self, timeout: Optional[float] = None, priority: Optional[Priority] = None) -> int:
+        """
+        Wait until a request may be sent
+
+        Args:
+            timeout: Seconds to wait at most (optional)
+            priority: The request's priority (defaults to the current
+                :func:`~metrifox_sdk.priority.current_priority`)
+
+        Returns:
+            Requests in flight, this one included
+
+        Raises:
+            TimeoutError: If no slot was free within ``timeout``
+        """
+        priority = current_priority() if priority is None else Priority(priority)
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                admitted = self._condition.wait_for(lambda: self._admits(priority), timeout)
+            finally:
+                self._waiting[priority] -= 1
+                # Less urgent requests may have been waiting on this one
+                self._condition.notify_all()
+            if not admitted:
+                raise TimeoutError("No concurrency slot became free in time")
+            self.inflight += 1
+            return self.inflight
+
+    def release(
+        self, latency: float, dropped: bool = False, inflight: Optional[int] = None
+    ) -> None:
+        """
+        Report a completed request and free its slot
+
+        Args:
+            latency: Seconds the request took
+            dropped: Whether it timed out, failed or was shed by the service
+            inflight: Requests in flight when it was sent, as returned by
+                :meth:`acquire` (defaults to the current number)
+        """
+        with self._condition:
+            if inflight is None:
+                inflight = self.inflight
+            try:
+                self.algorithm.on_sample(latency, inflight, dropped)
+            finally:
+                self.inflight -= 1
+                self._condition.notify_all()
+
+    def __repr__(self) -> str:
+        return f"AdaptiveLimiter(limit={self.limit}, inflight={self.inflight})"
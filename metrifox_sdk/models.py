@@ -0,0 +1,300 @@
+"""
+Typed response models for Metrifox SDK
+
+Models are thin, slotted views over the decoded JSON payload. Scalar
+fields are read straight from the underlying dict and nested objects are
+only wrapped in their model the first time they are accessed, so reading
+a single field such as ``can_access`` does no extra work for the rest of
+the payload. The original dict is always available via ``to_dict()``.
+"""
+
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Type, Union
+
+
+class Field:
+    """Descriptor exposing a key of the underlying payload as an attribute"""
+
+    __slots__ = ('key', 'model', 'name')
+
+    def __init__(self, key: Optional[str] = None, model: Optional[Type['Model']] = None):
+        self.key = key
+        self.model = model
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if self.key is None:
+            self.key = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.model is None:
+            return instance._data.get(self.key)
+        cache = instance._cache
+        if cache is None:
+            cache = instance._cache = {}
+        try:
+            return cache[self.key]
+        except KeyError:
+            value = _wrap(instance._data.get(self.key), self.model)
+            cache[self.key] = value
+            return value
+
+
+class Model:
+    """Base class for response models"""
+
+    __slots__ = ('_data', '_cache')
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        self._data = data if data is not None else {}
+        self._cache = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Model):
+            return type(self) is type(other) and self._data == other._data
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read a raw payload key, including keys without a typed field"""
+        return self._data.get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the underlying payload"""
+        return self._data
+
+
+class ModelList(Sequence):
+    """Read-only list of models, wrapping each item on first access"""
+
+    __slots__ = ('_items', '_model', '_wrapped')
+
+    def __init__(self, items: List[Any], model: Type[Model]):
+        self._items = items
+        self._model = model
+        self._wrapped: List[Optional[Model]] = [None] * len(items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        wrapped = self._wrapped[index]
+        if wrapped is None:
+            wrapped = self._wrapped[index] = _wrap(self._items[index], self._model)
+        return wrapped
+
+    def __iter__(self) -> Iterator[Model]:
+        for index in range(len(self._items)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return f"ModelList[{self._model.__name__}]({len(self._items)} items)"
+
+    def to_list(self) -> List[Any]:
+        """Return the underlying payload list"""
+        return self._items
+
+
+def _wrap(value: Any, model: Type[Model]) -> Any:
+    """Wrap a payload value in a model (or a list of models)"""
+    if isinstance(value, dict):
+        return model(value)
+    if isinstance(value, list):
+        return ModelList(value, model)
+    return value
+
+
+# Customers
+class Customer(Model):
+    """A customer"""
+    __slots__ = ()
+
+    id = Field()
+    customer_key = Field()
+    customer_type = Field()
+    primary_email = Field()
+    first_name = Field()
+    last_name = Field()
+    legal_name = Field()
+    display_name = Field()
+    primary_phone = Field()
+    billing_email = Field()
+    website_url = Field()
+    timezone = Field()
+    language = Field()
+    currency = Field()
+    account_manager = Field()
+    tax_identification_number = Field()
+    created_at = Field()
+    updated_at = Field()
+
+
+class Subscription(Model):
+    """A customer's subscription"""
+    __slots__ = ()
+
+    id = Field()
+    status = Field()
+    offering_key = Field()
+    billing_interval = Field()
+    created_at = Field()
+
+
+class CustomerDetails(Customer):
+    """A customer with usage and billing details"""
+    __slots__ = ()
+
+    usage_summary = Field()
+    subscriptions = Field(model=Subscription)
+
+
+# Usage
+class AccessCheck(Model):
+    """Result of a feature access check"""
+    __slots__ = ()
+
+    customer_key = Field()
+    feature_key = Field()
+    requested_quantity = Field()
+    can_access = Field()
+    unlimited = Field()
+    balance = Field()
+    used_quantity = Field()
+    entitlement_active = Field()
+    prepaid = Field()
+    wallet_balance = Field()
+    message = Field()
+
+
+class UsageEvent(Model):
+    """A recorded usage event"""
+    __slots__ = ()
+
+    customer_key = Field()
+    feature_key = Field()
+    quantity = Field()
+
+
+# Subscriptions
+class BillingHistoryEntry(Model):
+    """An entry in a subscription's billing history"""
+    __slots__ = ()
+
+    id = Field()
+    amount = Field()
+    currency = Field()
+    status = Field()
+    description = Field()
+    created_at = Field()
+
+
+class Entitlement(Model):
+    """A feature entitlement of a subscription"""
+    __slots__ = ()
+
+    feature_key = Field()
+    feature_name = Field()
+    unlimited = Field()
+    balance = Field()
+    used_quantity = Field()
+    included_quantity = Field()
+
+
+class Response(Model):
+    """
+    API response envelope
+
+    ``data`` is wrapped in the response's model on first access: a dict
+    becomes a single model and a list becomes a :class:`ModelList`.
+    """
+
+    __slots__ = ('_model',)
+
+    message = Field()
+    meta = Field()
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, model: Type[Model] = Model):
+        super().__init__(data)
+        self._model = model
+
+    @property
+    def data(self) -> Union[Model, ModelList, Any]:
+        """The response payload wrapped in its model"""
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        try:
+            return cache['data']
+        except KeyError:
+            value = cache['data'] = _wrap(self._data.get('data'), self._model)
+            return value
+
+
+def to_response(payload: Any, model: Type[Model]) -> Response:
+    """Wrap a decoded API response in a :class:`Response` of ``model``"""
+    return Response(payload if isinstance(payload, dict) else {'data': payload}, model)
+
+
+# Headers that describe the connection or the encoded body, which no longer
+# apply once the transport has decoded it
+_UNFORWARDED_HEADERS = frozenset((
+    'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length',
+    'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'upgrade',
+))
+
+
+class RawResponse:
+    """
+    Undecoded API response, returned by module methods called with ``raw=True``
+
+    ``content`` is the response body exactly as the API sent it (after
+    content decoding), so it can be relayed without decoding and
+    re-encoding the JSON. ``headers`` leaves out hop-by-hop and
+    body-encoding headers, which do not apply to a relayed body.
+
+    Example:
+        >>> raw = client.customers.list({"page": 1}, raw=True)
+        >>> return flask.Response(
+        ...     raw.content, status=raw.status_code, content_type=raw.content_type
+        ... )
+    """
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @classmethod
+    def from_transport(cls, response: Any) -> 'RawResponse':
+        """Build a raw response from a :class:`~metrifox_sdk.transport.TransportResponse`"""
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _UNFORWARDED_HEADERS
+        }
+        return cls(response.status_code, headers, response.content)
+
+    @property
+    def content_type(self) -> str:
+        """The body's Content-Type"""
+        return next(
+            (value for name, value in self.headers.items() if name.lower() == 'content-type'),
+            'application/json'
+        )
+
+    def __repr__(self) -> str:
+        return f"RawResponse({self.status_code}, {len(self.content)} bytes)"
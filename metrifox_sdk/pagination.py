@@ -0,0 +1,104 @@
+"""
+Pagination helpers for Metrifox SDK
+"""
+
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Sequence, Set
+
+from .priority import bind_priority
+
+# Keys a page's list of items may be nested under when ``data`` is an object
+DEFAULT_ITEM_KEYS = ('items', 'entries', 'results')
+
+
+def page_items(
+    response: Dict[str, Any], keys: Sequence[str] = DEFAULT_ITEM_KEYS
+) -> List[Dict[str, Any]]:
+    """Return the list of items of a page response"""
+    data = response.get('data')
+    if isinstance(data, dict):
+        data = next((data[key] for key in keys if isinstance(data.get(key), list)), None)
+    return data if isinstance(data, list) else []
+
+
+def has_next_page(response: Dict[str, Any], page: int, count: int, per_page: int) -> bool:
+    """Decide from pagination metadata (or the page size) whether another page follows"""
+    meta = response.get('meta')
+    pagination = meta.get('pagination', meta) if isinstance(meta, dict) else {}
+    if pagination.get('total_pages') is not None:
+        return page < pagination['total_pages']
+    if 'next_page' in pagination:
+        return bool(pagination['next_page'])
+    # More than a page means the whole list came back unpaginated
+    return count == per_page
+
+
+def _page_digest(items: List[Any]) -> str:
+    """Fingerprint of a page's items, independent of key order"""
+    content = json.dumps(items, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def iter_pages(
+    fetch: Callable[[int], Dict[str, Any]],
+    per_page: int,
+    keys: Sequence[str] = DEFAULT_ITEM_KEYS,
+    read_ahead: int = 0
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Fetch pages one after another and yield their items
+
+    Stops on pagination metadata, a short page, or a page repeating an
+    earlier one (an endpoint that ignores the page parameter), detected by
+    its first item's ``id`` or, for items without ids, by its content.
+
+    Args:
+        fetch: Function returning the response for a page number (from 1)
+        per_page: Items requested per page
+        keys: Keys the items may be nested under in ``data``
+        read_ahead: Pages requested ahead, concurrently, while the current one
+            is consumed. A few requests past the last page may be wasted
+
+    Yields:
+        The items of each page
+    """
+    executor = ThreadPoolExecutor(max_workers=read_ahead) if read_ahead else None
+    pending: Deque[Any] = deque()
+    next_page = 1
+
+    def request(page: int):
+        return executor.submit(bind_priority(fetch), page) if executor is not None else fetch(page)
+
+    try:
+        previous_first_id = None
+        seen: Set[str] = set()
+        page = 1
+        while True:
+            while len(pending) <= read_ahead:
+                pending.append(request(next_page))
+                next_page += 1
+            response = pending.popleft()
+            if executor is not None:
+                response = response.result()
+
+            items = page_items(response, keys)
+            first_id = items[0].get('id') if items and isinstance(items[0], dict) else None
+            if first_id is not None and first_id == previous_first_id:
+                return
+            digest = _page_digest(items)
+            if items and digest in seen:
+                return
+            previous_first_id = first_id
+            seen.add(digest)
+            yield items
+            if not has_next_page(response, page, len(items), per_page):
+                return
+            page += 1
+    finally:
+        if executor is not None:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
@@ -0,0 +1,93 @@
+"""
+Request priorities for Metrifox SDK
+
+Every request is sent at a :class:`Priority`: ``INTERACTIVE`` for calls a
+user is waiting on, ``NORMAL`` by default and ``BULK`` for background jobs.
+When a client has priority lanes (see
+:class:`~metrifox_sdk.limits.AdaptiveLimiter`), bulk requests may only take
+part of its concurrency and always wait behind higher-priority ones, so a
+backfill running in the same process does not slow down access checks.
+
+The priority is carried by the calling context, so it applies to every
+request made inside a ``with request_priority(...)`` block, and is handed
+on to the worker threads of the SDK's bulk helpers and ``*_async`` methods.
+"""
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class Priority(IntEnum):
+    """Request priority classes, most urgent first"""
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
+
+
+_current: ContextVar[Optional[Priority]] = ContextVar('metrifox_priority', default=None)
+
+
+def current_priority() -> Priority:
+    """Return the priority of requests made in the current context"""
+    priority = _current.get()
+    return Priority.NORMAL if priority is None else priority
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Send the requests made inside the block at ``priority``
+
+    Example:
+        >>> with request_priority(Priority.BULK):
+        ...     client.checkout.pregenerate(offering_keys)
+    """
+    token = _current.set(Priority(priority))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def default_priority(priority: Priority) -> Iterator[None]:
+    """Like :func:`request_priority`, unless the caller already chose a priority"""
+    if _current.get() is not None:
+        yield
+        return
+    with request_priority(priority):
+        yield
+
+
+def runs_at(priority: Priority) -> Callable[[F], F]:
+    """Decorate a function so its requests default to ``priority``"""
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with default_priority(priority):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def bind_priority(func: F) -> F:
+    """
+    Bind ``func`` to the current priority, for running it on another thread
+
+    Returns ``func`` itself when no priority has been chosen.
+    """
+    priority = _current.get()
+    if priority is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with request_priority(priority):
+            return func(*args, **kwargs)
+    return wrapper  # type: ignore[return-value]
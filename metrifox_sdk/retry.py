@@ -0,0 +1,93 @@
+"""
+Retries and idempotency keys for Metrifox SDK
+
+Every POST and PATCH request carries an ``Idempotency-Key`` header. The key
+is caller-supplied, derived from the ``event_id`` of usage events, or
+generated, and is sent unchanged on every retry of the same call, so the
+API applies a mutation at most once however often it is delivered.
+"""
+
+import random
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+#: Methods that get an idempotency key
+IDEMPOTENT_KEY_METHODS = frozenset(('POST', 'PATCH'))
+
+
+def generate_idempotency_key() -> str:
+    """Return a new random idempotency key"""
+    return uuid.uuid4().hex
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed request
+
+    Requests that received no response (:class:`~metrifox_sdk.exceptions.TransportError`)
+    or a retryable status are retried with exponential backoff and full
+    jitter. A ``Retry-After`` header takes precedence over the backoff.
+
+    Args:
+        max_retries: Maximum number of retries after the first attempt
+        backoff_factor: Base delay in seconds; attempt ``n`` waits up to
+            ``backoff_factor * 2 ** n``
+        max_backoff: Upper bound of a single delay in seconds
+        retry_statuses: HTTP status codes that are retried
+
+    Example:
+        >>> client = MetrifoxClient(api_key="your_api_key", retry_policy=RetryPolicy(max_retries=5))
+    """
+
+    DEFAULT_RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.25,
+        max_backoff: float = 10.0,
+        retry_statuses: Tuple[int, ...] = DEFAULT_RETRY_STATUSES
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def should_retry_status(self, status_code: int) -> bool:
+        """Return True if a response with ``status_code`` is retried"""
+        return status_code in self.retry_statuses
+
+    def delay(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Seconds to wait before retry number ``attempt`` (starting at 0)
+
+        Args:
+            attempt: Number of retries made so far
+            headers: Headers of the failed response, if any
+        """
+        retry_after = _retry_after(headers) if headers else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,76 @@
+"""
+JSON serialization for Metrifox SDK
+
+Request bodies are encoded straight to bytes and responses are decoded
+from the raw body bytes, so no intermediate ``str`` copies are made on
+either side. When ``orjson`` is installed it is used automatically;
+otherwise the standard library ``json`` module is used.
+"""
+
+import json
+from typing import Any, Optional
+
+
+class JSONCodec:
+    """JSON codec backed by the standard library ``json`` module"""
+
+    name = "json"
+    content_type = "application/json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object to UTF-8 JSON bytes"""
+        text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+        return text.encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        """
+        Decode JSON from bytes
+
+        Raises:
+            ValueError: If the payload is not valid JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec backed by ``orjson``"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object to UTF-8 JSON bytes"""
+        return self._orjson.dumps(obj, option=self._options)
+
+    def loads(self, data: bytes) -> Any:
+        """
+        Decode JSON from bytes
+
+        Raises:
+            ValueError: If the payload is not valid JSON
+        """
+        return self._orjson.loads(data)
+
+
+_default_codec: Optional[JSONCodec] = None
+
+
+def get_default_codec() -> JSONCodec:
+    """
+    Return the fastest available JSON codec
+
+    ``orjson`` is preferred when it can be imported; the standard library
+    codec is used otherwise. The result is cached for the process.
+    """
+    global _default_codec
+    if _default_codec is None:
+        try:
+            _default_codec = OrjsonCodec()
+        except ImportError:
+            _default_codec = JSONCodec()
+    return _default_codec
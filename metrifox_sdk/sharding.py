@@ -0,0 +1,351 @@
+"""
+Routing customers across several Metrifox clients for Metrifox SDK
+
+Accounts spread over several API keys or regions (tenants) are served by one
+:class:`MetrifoxClient` per shard. :class:`ShardedMetrifoxClient` picks the
+shard of each ``customer_key`` from a lookup table, falling back to a
+consistent hash ring, and fans bulk operations out to all shards in
+parallel.
+"""
+
+import bisect
+import hashlib
+import queue
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .client import MetrifoxClient, init
+from .concurrency import DEFAULT_MAX_WORKERS, gather
+from .customers import customer_create_idempotency_key
+from .exceptions import ConfigurationError
+from .priority import Priority, bind_priority, runs_at
+
+T = TypeVar('T')
+
+ShardConfig = Union[MetrifoxClient, Dict[str, Any]]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring of shard names
+
+    Each shard is placed on the ring at ``replicas`` points, so keys spread
+    evenly and adding or removing a shard only moves the keys of that shard.
+
+    Args:
+        shards: Shard names
+        replicas: Points per shard on the ring
+    """
+
+    def __init__(self, shards: Iterable[str], replicas: int = 100):
+        points = sorted((_hash(f"{shard}#{i}"), shard) for shard in shards for i in range(replicas))
+        if not points:
+            raise ConfigurationError("A hash ring needs at least one shard")
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def get(self, key: str) -> str:
+        """Return the shard of ``key``"""
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[index]
+
+
+class ShardedMetrifoxClient:
+    """
+    Routes requests for each customer to the client of its shard
+
+    Shards given as configurations (as accepted by :func:`~metrifox_sdk.init`)
+    that use the same base URL share one HTTP transport and so one
+    connection pool; requests still carry their own shard's API key.
+
+    Args:
+        shards: Clients or client configurations by shard name
+        routes: Shard name by customer key (optional). Customers not listed
+            are placed by consistent hashing
+        replicas: Points per shard on the hash ring
+        max_workers: Default maximum number of concurrent requests per shard
+            in bulk operations
+
+    Raises:
+        ConfigurationError: If there are no shards or a route names an unknown shard
+
+    Example:
+        >>> sharded = ShardedMetrifoxClient(
+        ...     {"eu": {"api_key": EU_KEY, "base_url": EU_URL}, "us": {"api_key": US_KEY}},
+        ...     routes={"cust_acme": "eu"},
+        ... )
+        >>> sharded.client_for("cust_acme").usages.check_access(
+        ...     {"customer_key": "cust_acme", "feature_key": "seats"}
+        ... )
+        >>> results = sharded.create_many(new_customers)
+    """
+
+    def __init__(
+        self,
+        shards: Mapping[str, ShardConfig],
+        routes: Optional[Mapping[str, str]] = None,
+        replicas: int = 100,
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ):
+        if not shards:
+            raise ConfigurationError("ShardedMetrifoxClient needs at least one shard")
+        self.routes: Dict[str, str] = dict(routes or {})
+        unknown = set(self.routes.values()) - set(shards)
+        if unknown:
+            raise ConfigurationError(f"Routes name unknown shards: {', '.join(sorted(unknown))}")
+        self.max_workers = max_workers
+        self.clients: Dict[str, MetrifoxClient] = self._build_clients(shards)
+        self._ring = HashRing(self.clients, replicas)
+
+    @staticmethod
+    def _build_clients(shards: Mapping[str, ShardConfig]) -> Dict[str, MetrifoxClient]:
+        transports: Dict[Tuple[Any, ...], Any] = {}
+        clients = {}
+        for name, shard in shards.items():
+            if isinstance(shard, MetrifoxClient):
+                clients[name] = shard
+                continue
+            config = dict(shard)
+            if config.get('transport') is None:
+                # Requests send their API key per request, so shards on the same
+                # host can share a connection pool
+                base_url = config.get('base_url') or MetrifoxClient.DEFAULT_BASE_URL
+                key = (base_url, config.get('dns_cache_ttl'))
+                if key not in transports:
+                    transports[key] = _build_transport(config.get('dns_cache_ttl'))
+                config['transport'] = transports[key]
+            clients[name] = init(config)
+        return clients
+
+    def shard_for(self, customer_key: str) -> str:
+        """Return the name of the shard serving ``customer_key``"""
+        shard = self.routes.get(customer_key)
+        return shard if shard is not None else self._ring.get(customer_key)
+
+    def client_for(self, customer_key: str) -> MetrifoxClient:
+        """Return the client of the shard serving ``customer_key``"""
+        return self.clients[self.shard_for(customer_key)]
+
+    def check_access(self, request: Any, **kwargs) -> Any:
+        """Check feature access on the customer's shard, see :meth:`UsagesModule.check_access`"""
+        return self.client_for(_customer_key(request)).usages.check_access(request, **kwargs)
+
+    def record_usage(self, request: Any, **kwargs) -> Any:
+        """Record a usage event on the customer's shard, see :meth:`UsagesModule.record_usage`"""
+        return self.client_for(_customer_key(request)).usages.record_usage(request, **kwargs)
+
+    @runs_at(Priority.BULK)
+    def create_many(
+        self,
+        requests: Sequence[Any],
+        max_workers: Optional[int] = None,
+        return_exceptions: bool = True
+    ) -> List[Any]:
+        """
+        Create customers on their shards, all shards in parallel
+
+        Args:
+            requests: Customer creation data (CustomerCreateRequest or dict)
+            max_workers: Maximum number of concurrent requests per shard
+            return_exceptions: Put a failed creation's APIError in the results
+                instead of raising it
+
+        Returns:
+            API responses (or errors) in the order of ``requests``
+
+        Example:
+            >>> results = sharded.create_many(customers)
+            >>> failed = [r for r in results if isinstance(r, APIError)]
+        """
+        return self._fan_out(
+            requests,
+            lambda client, request: client.customers.create(
+                request, idempotency_key=customer_create_idempotency_key(_as_dict(request))
+            ),
+            max_workers,
+            return_exceptions
+        )
+
+    @runs_at(Priority.BULK)
+    def record_usage_many(
+        self,
+        events: Sequence[Any],
+        max_workers: Optional[int] = None,
+        return_exceptions: bool = True
+    ) -> List[Any]:
+        """
+        Record usage events on their customers' shards, all shards in parallel
+
+        Args:
+            events: Usage events (UsageEventRequest or dict)
+            max_workers: Maximum number of concurrent requests per shard
+            return_exceptions: Put a failed event's APIError in the results
+                instead of raising it
+
+        Returns:
+            API responses (or errors) in the order of ``events``
+        """
+        return self._fan_out(
+            events,
+            lambda client, event: client.usages.record_usage(event),
+            max_workers,
+            return_exceptions,
+        )
+
+    def iter_customers(
+        self,
+        params: Optional[Dict[str, Any]] = None,
+        per_page: int = 100,
+        buffer: int = 1000
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Iterate over the customers of all shards, paging through the shards in parallel
+
+        Customers are yielded as they arrive, so shards are interleaved.
+
+        Args:
+            params: Optional filters, see :meth:`CustomersModule.iter_list`
+            per_page: Customers requested per page
+            buffer: Customers fetched ahead of the consumer at most
+
+        Yields:
+            ``(shard_name, customer)`` pairs
+
+        Raises:
+            APIError: If listing a shard fails
+
+        Example:
+            >>> for shard, customer in sharded.iter_customers():
+            ...     export(shard, customer)
+        """
+        items: 'queue.Queue[Tuple[str, Any]]' = queue.Queue(maxsize=buffer)
+        stop = threading.Event()
+        done = object()
+
+        def produce(name: str, client: MetrifoxClient) -> None:
+            try:
+                for customer in client.customers.iter_list(params, per_page=per_page):
+                    if stop.is_set():
+                        return
+                    items.put((name, customer))
+            except Exception as e:
+                items.put((name, e))
+            finally:
+                items.put((name, done))
+
+        threads = [
+            threading.Thread(
+                target=bind_priority(produce),
+                args=(name, client),
+                name=f'metrifox-shard-{name}',
+                daemon=True
+            )
+            for name, client in self.clients.items()
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            remaining = len(threads)
+            while remaining:
+                name, item = items.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield name, item
+        finally:
+            stop.set()
+            # Unblock producers waiting on a full queue
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    items.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+
+    def warmup(self, connections: int = 1, timeout: float = 5.0) -> None:
+        """Pre-establish connections for every shard concurrently
+
+        See :meth:`MetrifoxClient.warmup`.
+        """
+        gather(
+            lambda client: client.warmup(connections, timeout=timeout),
+            list(self.clients.values()),
+            max_workers=len(self.clients)
+        )
+
+    def close(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """Close every shard's client"""
+        for client in self.clients.values():
+            client.close(wait=wait, cancel_pending=cancel_pending)
+
+    def _fan_out(
+        self,
+        items: Sequence[Any],
+        call: Callable[[MetrifoxClient, Any], T],
+        max_workers: Optional[int],
+        return_exceptions: bool
+    ) -> List[Any]:
+        """Run ``call`` for every item on its shard's client, keeping the order
+
+        Shards run in parallel, each sending up to ``max_workers`` items at a time.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(self.shard_for(_customer_key(item)), []).append(index)
+
+        def run_shard(shard: Tuple[str, List[int]]) -> List[Any]:
+            name, indexes = shard
+            client = self.clients[name]
+            return gather(
+                lambda index: call(client, items[index]),
+                indexes,
+                max_workers=max_workers or self.max_workers,
+                return_exceptions=return_exceptions
+            )
+
+        shards = list(groups.items())
+        results: List[Any] = [None] * len(items)
+        outcomes = gather(run_shard, shards, max_workers=len(shards) or 1)
+        for (_, indexes), shard_results in zip(shards, outcomes):
+            for index, result in zip(indexes, shard_results):
+                results[index] = result
+        return results
+
+
+def _as_dict(request: Any) -> Any:
+    return request.to_dict() if hasattr(request, 'to_dict') else request
+
+
+def _customer_key(request: Any) -> str:
+    data = _as_dict(request)
+    customer_key = data.get('customer_key') if isinstance(data, dict) else None
+    if not customer_key:
+        raise ValueError("A customer_key is required to route a request to its shard")
+    return customer_key
+
+
+def _build_transport(dns_cache_ttl: Optional[float]):
+    from .transport import RequestsTransport
+
+    if not dns_cache_ttl:
+        return RequestsTransport()
+    from .dns import DNSCache
+    return RequestsTransport(dns_cache=DNSCache(ttl=dns_cache_ttl))
@@ -0,0 +1,485 @@
+"""
+Offline mode for Metrifox SDK
+
+An :class:`EntitlementSnapshot` keeps the last known access state of
+customers' features, in memory and optionally in a file. When the client is
+configured with one, ``check_access`` answers from it while the meter
+service is unreachable, as long as the entry is younger than the snapshot's
+``max_age``. A :class:`UsageReplayQueue` holds usage events that could not be
+delivered and sends them once the service is back. A
+:class:`SnapshotRefresher` keeps the snapshot current in the background:
+
+    snapshot = EntitlementSnapshot(max_age=3600, path="/var/cache/metrifox/snapshot.json")
+    client = MetrifoxClient(snapshot=snapshot, replay_queue=UsageReplayQueue())
+    SnapshotRefresher(client, ["cust_123", "cust_456"], interval=60).start()
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from . import fork
+from .exceptions import APIError, ConfigurationError, TransportError
+from .serialization import JSONCodec, get_default_codec
+
+if TYPE_CHECKING:
+    from .client import MetrifoxClient
+
+logger = logging.getLogger(__name__)
+
+#: Access check fields kept in the snapshot
+ACCESS_FIELDS = (
+    'customer_key',
+    'feature_key',
+    'can_access',
+    'unlimited',
+    'balance',
+    'used_quantity',
+    'entitlement_active',
+    'prepaid',
+    'wallet_balance',
+)
+
+
+def is_unavailable(error: APIError) -> bool:
+    """Return True if ``error`` means the service could not answer (rather than refused)"""
+    return isinstance(error, TransportError) or (error.status_code or 0) >= 500
+
+
+def summary_entitlements(summary: Any) -> List[Dict[str, Any]]:
+    """Return the entitlements with a ``feature_key`` in an entitlements summary response"""
+    data = summary.get('data') if isinstance(summary, dict) else None
+    if isinstance(data, dict):
+        data = data.get('entitlements', data.get('features'))
+    if not isinstance(data, list):
+        return []
+    return [
+        entitlement for entitlement in data
+        if isinstance(entitlement, dict) and entitlement.get('feature_key')
+    ]
+
+
+class EntitlementSnapshot:
+    """
+    Last known access state per customer and feature
+
+    Args:
+        max_age: Seconds an entry may be served for after it was fetched
+            while the service is unavailable
+        fresh_for: Seconds after it was fetched that ``check_access`` answers
+            from an entry without asking the service at all (optional). By
+            default the service is always asked first
+        path: JSON file the snapshot is saved to and loaded from (optional).
+            An existing file is loaded on construction
+        codec: JSON codec for the file (optional)
+        clock: Wall clock returning seconds (for tests)
+    """
+
+    def __init__(
+        self,
+        max_age: float = 3600.0,
+        fresh_for: Optional[float] = None,
+        path: Optional[str] = None,
+        codec: Optional[JSONCodec] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_age = max_age
+        self.fresh_for = fresh_for
+        self.path = path
+        self.codec = codec or get_default_codec()
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+        if path and os.path.exists(path):
+            self.load()
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        customer_key: str,
+        feature_key: str,
+        access: Dict[str, Any],
+        fetched_at: Optional[float] = None
+    ) -> None:
+        """
+        Store the access state of a customer's feature
+
+        Args:
+            customer_key: The customer's unique key
+            feature_key: The feature's key
+            access: ``data`` of a ``check_access`` response, or an equivalent dict
+            fetched_at: When the state was fetched (defaults to now)
+        """
+        entry = {k: access[k] for k in ACCESS_FIELDS if k in access}
+        entry['customer_key'] = customer_key
+        entry['feature_key'] = feature_key
+        fetched_at = self._clock() if fetched_at is None else fetched_at
+        with self._lock:
+            self._entries[(customer_key, feature_key)] = (fetched_at, entry)
+
+    def update_from_summary(self, customer_key: str, summary: Dict[str, Any]) -> int:
+        """
+        Store the access state of every feature in an entitlements summary
+
+        Args:
+            customer_key: The customer the summary belongs to
+            summary: A ``get_entitlements_summary`` response
+
+        Returns:
+            Number of features stored
+        """
+        fetched_at = self._clock()
+        count = 0
+        for entitlement in summary_entitlements(summary):
+            feature_key = entitlement['feature_key']
+            unlimited = bool(entitlement.get('unlimited'))
+            balance = entitlement.get('balance')
+            access = dict(entitlement)
+            access.setdefault('can_access', unlimited or (balance or 0) > 0)
+            access.setdefault('entitlement_active', True)
+            self.update(customer_key, feature_key, access, fetched_at=fetched_at)
+            count += 1
+        return count
+
+    def consume(self, customer_key: str, feature_key: str, quantity: float) -> None:
+        """Deduct recorded usage from an entry's balance"""
+        with self._lock:
+            item = self._entries.get((customer_key, feature_key))
+            if item is None:
+                return
+            entry = item[1]
+            if entry.get('unlimited') or entry.get('balance') is None:
+                return
+            entry['balance'] -= quantity
+            entry['used_quantity'] = (entry.get('used_quantity') or 0) + quantity
+            entry['can_access'] = entry['balance'] > 0
+
+    def get(
+        self, customer_key: str, feature_key: str, max_age: Optional[float] = None
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Return a fresh entry and its age in seconds
+
+        Args:
+            customer_key: The customer's unique key
+            feature_key: The feature's key
+            max_age: Maximum age in seconds (defaults to the snapshot's ``max_age``)
+
+        Returns:
+            ``(access, age)``, or None if there is no entry young enough
+        """
+        with self._lock:
+            item = self._entries.get((customer_key, feature_key))
+        if item is None:
+            return None
+        fetched_at, entry = item
+        age = self._clock() - fetched_at
+        if age > (self.max_age if max_age is None else max_age):
+            return None
+        return dict(entry), age
+
+    def check_access(
+        self, request: Dict[str, Any], max_age: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer an access check from the snapshot
+
+        Args:
+            request: Access check parameters (``customer_key``, ``feature_key``
+                and optionally ``requested_quantity``)
+            max_age: Maximum age in seconds of the entry (defaults to ``max_age``)
+
+        Returns:
+            A response shaped like ``check_access``'s, with ``meta.source`` set to
+            ``"snapshot"``, or None if the snapshot has no fresh entry
+
+        Raises:
+            ValueError: If ``requested_quantity`` is not a number
+        """
+        item = self.get(request.get('customer_key'), request.get('feature_key'), max_age)
+        if item is None:
+            return None
+        access, age = item
+        requested = request.get('requested_quantity') or 1
+        if isinstance(requested, str):
+            try:
+                requested = float(requested)
+            except ValueError:
+                raise ValueError(f"requested_quantity is not a number: {requested!r}")
+        balance = access.get('balance')
+        if access.get('can_access') and not access.get('unlimited') and balance is not None:
+            access['can_access'] = balance >= requested
+        access['requested_quantity'] = requested
+        return {
+            'data': access,
+            'message': 'Served from entitlement snapshot',
+            'meta': {'source': 'snapshot', 'age': age},
+        }
+
+    def customers(self) -> List[str]:
+        """Keys of the customers in the snapshot"""
+        with self._lock:
+            return sorted({customer_key for customer_key, _ in self._entries})
+
+    def prune(self) -> int:
+        """
+        Drop entries older than ``max_age``
+
+        Returns:
+            Number of entries dropped
+        """
+        cutoff = self._clock() - self.max_age
+        with self._lock:
+            stale = [key for key, (fetched_at, _) in self._entries.items() if fetched_at < cutoff]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the snapshot to ``path`` (default: the snapshot's path) atomically"""
+        path = path or self.path
+        if not path:
+            raise ConfigurationError("No snapshot path configured")
+        with self._lock:
+            entries = [[fetched_at, entry] for fetched_at, entry in self._entries.values()]
+        data = self.codec.dumps({'version': 1, 'entries': entries})
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrifox-snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path: Optional[str] = None) -> int:
+        """
+        Merge entries from a file written by :meth:`save`
+
+        Entries already in memory win over older entries from the file.
+
+        Returns:
+            Number of entries loaded
+        """
+        path = path or self.path
+        with open(path, 'rb') as f:
+            data = self.codec.loads(f.read())
+        count = 0
+        with self._lock:
+            for fetched_at, entry in data.get('entries', []):
+                key = (entry['customer_key'], entry['feature_key'])
+                current = self._entries.get(key)
+                if current is None or current[0] < fetched_at:
+                    self._entries[key] = (fetched_at, entry)
+                    count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UsageReplayQueue:
+    """
+    Usage events waiting to be delivered
+
+    Args:
+        max_size: Maximum number of queued events; the oldest are dropped first
+        path: JSON Lines file mirroring the queue, so events survive a restart
+            (optional). An existing file is loaded on construction
+        codec: JSON codec for the file (optional)
+        compact_every: Dropped events after which the file is rewritten
+            without them. Until then they stay in the file and are skipped
+            when it is loaded
+    """
+
+    def __init__(
+        self,
+        max_size: int = 100000,
+        path: Optional[str] = None,
+        codec: Optional[JSONCodec] = None,
+        compact_every: int = 1000
+    ):
+        self.max_size = max_size
+        self.path = path
+        self.codec = codec or get_default_codec()
+        self.compact_every = compact_every
+        self.dropped = 0
+        self._events: Deque[Tuple[Dict[str, Any], Optional[str]]] = deque()
+        self._stale = 0
+        self._lock = threading.Lock()
+        fork.register(self)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        item = self.codec.loads(line)
+                        self._events.append((item['event'], item.get('idempotency_key')))
+            while len(self._events) > max_size:
+                self._events.popleft()
+                self._stale += 1
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def append(self, event: Dict[str, Any], idempotency_key: Optional[str] = None) -> None:
+        """
+        Queue an event
+
+        Args:
+            event: The usage event
+            idempotency_key: Key the event is resent with
+        """
+        item = (event, idempotency_key)
+        with self._lock:
+            self._events.append(item)
+            if len(self._events) > self.max_size:
+                self._events.popleft()
+                self.dropped += 1
+                self._stale += 1
+            if not self.path:
+                return
+            if self._stale >= self.compact_every:
+                self._rewrite()
+            else:
+                with open(self.path, 'ab') as f:
+                    f.write(self._dumps_item(item))
+
+    def replay(self, send: Callable[[Dict[str, Any], Optional[str]], Any]) -> int:
+        """
+        Send queued events, oldest first, until the service is unavailable
+
+        Events are resent with the idempotency key they were queued with, so
+        an event that did reach the service before is not recorded twice.
+        Events the service rejects are dropped.
+
+        Args:
+            send: Function sending an event with an idempotency key, raising
+                APIError on failure
+
+        Returns:
+            Number of events delivered
+        """
+        delivered = 0
+        while True:
+            with self._lock:
+                if not self._events:
+                    break
+                item = self._events[0]
+            try:
+                send(*item)
+            except APIError as e:
+                if is_unavailable(e):
+                    break
+                # The service refused the event: retrying will not help
+            with self._lock:
+                if self._events and self._events[0] is item:
+                    self._events.popleft()
+            delivered += 1
+        if delivered or self._stale:
+            with self._lock:
+                self._rewrite()
+        return delivered
+
+    def _rewrite(self) -> None:
+        self._stale = 0
+        if not self.path:
+            return
+        with open(self.path, 'wb') as f:
+            for item in self._events:
+                f.write(self._dumps_item(item))
+
+    def _dumps_item(self, item: Tuple[Dict[str, Any], Optional[str]]) -> bytes:
+        event, idempotency_key = item
+        return self.codec.dumps({'event': event, 'idempotency_key': idempotency_key}) + b'\n'
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class SnapshotRefresher:
+    """
+    Background thread that keeps an entitlement snapshot current
+
+    Every ``interval`` seconds it fetches the entitlements summary of each
+    configured customer's subscriptions into the client's snapshot, saves the
+    snapshot file if it has one, and replays queued usage events.
+
+    Args:
+        client: Client configured with a ``snapshot``
+        customer_keys: Customers whose entitlements are kept
+        interval: Seconds between refreshes
+        max_workers: Maximum number of concurrent requests per refresh
+    """
+
+    def __init__(
+        self,
+        client: 'MetrifoxClient',
+        customer_keys: Iterable[str],
+        interval: float = 60.0,
+        max_workers: int = 8
+    ):
+        if client.snapshot is None:
+            raise ConfigurationError("The client has no entitlement snapshot configured")
+        self.client = client
+        self.customer_keys = list(customer_keys)
+        self.interval = interval
+        self.max_workers = max_workers
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        fork.register(self)
+
+    def _after_fork(self) -> None:
+        # The thread does not exist in the child
+        if self._thread is not None:
+            self._thread = None
+            self._stopping = threading.Event()
+            self.start()
+
+    def start(self) -> 'SnapshotRefresher':
+        """Start refreshing in a daemon thread"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='metrifox-snapshot', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop refreshing"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def refresh(self) -> int:
+        """
+        Refresh the snapshot once
+
+        Returns:
+            Number of features stored
+        """
+        snapshot = self.client.snapshot
+        summaries = self.client.subscriptions.prefetch_entitlements(
+            customer_keys=self.customer_keys, max_workers=self.max_workers
+        )
+        snapshot.prune()
+        if snapshot.path:
+            snapshot.save()
+        self.client.usages.replay_queued_usage()
+        return sum(len(summary_entitlements(summary)) for summary in summaries.values())
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # Keep the last snapshot and try again on the next refresh
+                logger.exception("Refreshing the entitlement snapshot failed")
+            self._stopping.wait(self.interval)
@@ -0,0 +1,173 @@
+"""
+Incremental JSON decoding for Metrifox SDK
+
+Large list responses are decoded from the body as it arrives, one array
+element at a time, instead of reading the whole body and building the full
+object graph first. Peak memory is bounded by the largest single element
+plus one network chunk, whatever the page size.
+
+Only the array holding the items is streamed. Other members of the envelope
+(``message``, ``meta``, ...) are decoded whole and skipped.
+"""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Sequence
+
+from .pagination import DEFAULT_ITEM_KEYS
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Text cursor over a stream of UTF-8 byte chunks"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, min_size: int = 0) -> bool:
+        """
+        Read more chunks, dropping consumed text
+
+        Chunks are read until at least ``min_size`` characters are unconsumed
+        (at least one chunk).
+
+        Returns:
+            False if the stream had already ended
+        """
+        if self.eof:
+            return False
+        parts = [self.buffer[self.pos:]]
+        size = len(parts[0])
+        read = False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            text = self._utf8.decode(chunk)
+            parts.append(text)
+            size += len(text)
+            read = True
+            if size >= min_size:
+                break
+        else:
+            parts.append(self._utf8.decode(b'', final=True))
+            self.eof = True
+        self.buffer = ''.join(parts)
+        self.pos = 0
+        return read
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at the end of the stream)"""
+        while True:
+            buffer, pos = self.buffer, self.pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of ``chars``"""
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else "end of data"
+            raise ValueError(f"Invalid JSON response: expected one of {chars!r}, found {found}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Most likely the value continues in the next chunks. Doubling the
+                # text read each time keeps decoding a value spanning many chunks
+                # linear in its size
+                if not self.fill(2 * (len(self.buffer) - self.pos)):
+                    raise ValueError(f"Invalid JSON response: {e}")
+                continue
+            # A number (or literal) at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(
+    chunks: Iterable[bytes],
+    keys: Sequence[str] = DEFAULT_ITEM_KEYS
+) -> Iterator[Any]:
+    """
+    Decode the items of a list response incrementally
+
+    The items are the elements of the ``data`` array or, when ``data`` is an
+    object, of its first array member named in ``keys`` (the same layouts
+    :func:`~metrifox_sdk.pagination.page_items` reads).
+
+    Args:
+        chunks: The response body, in chunks of any size
+        keys: Keys the items may be nested under in ``data``
+
+    Yields:
+        Decoded items, each as soon as it has been received
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    reader = _Reader(chunks)
+    if reader.peek() == '[':
+        # A bare array
+        yield from _iter_array(reader)
+        return
+    for key in _iter_object_keys(reader):
+        if key != 'data':
+            reader.value()
+            continue
+        if reader.peek() == '[':
+            yield from _iter_array(reader)
+        elif reader.peek() == '{':
+            for nested_key in _iter_object_keys(reader):
+                if nested_key in keys and reader.peek() == '[':
+                    yield from _iter_array(reader)
+                    keys = ()
+                else:
+                    reader.value()
+        else:
+            reader.value()
+
+
+def _iter_object_keys(reader: _Reader) -> Iterator[str]:
+    """Consume an object, yielding each key with the reader positioned at its value"""
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError("Invalid JSON response: object key is not a string")
+        reader.expect(':')
+        yield key
+        if reader.expect(',}') == '}':
+            return
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
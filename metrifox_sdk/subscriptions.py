@@ -2,37 +2,151 @@
 Subscriptions module for Metrifox SDK
 """
 
-from typing import Dict, Any
+from datetime import date, datetime, time, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Optional, Union
 from .base import BaseClient
+from .concurrency import DEFAULT_MAX_WORKERS, BoundedExecutor, future_variant, gather
+from .customers import CustomersModule
+from .exceptions import APIError
+from .models import BillingHistoryEntry, Entitlement, RawResponse, Response, to_response
+from .pagination import iter_pages
+from .priority import Priority, runs_at
+
+if TYPE_CHECKING:
+    from .cache import TTLCache
+    from .snapshot import EntitlementSnapshot
+
+# Keys billing history entries may be nested under when ``data`` is an object
+BILLING_HISTORY_ITEM_KEYS = ('billing_history', 'entries', 'items')
 
 
 class SubscriptionsModule:
     """Module for managing subscriptions"""
 
-    def __init__(self, client: BaseClient):
+    def __init__(
+        self,
+        client: BaseClient,
+        snapshot: Optional['EntitlementSnapshot'] = None,
+        entitlements_cache: Optional['TTLCache'] = None,
+        executor: Optional[BoundedExecutor] = None
+    ):
         self._client = client
+        self._executor = executor or BoundedExecutor()
+        self._customers = CustomersModule(client, executor=self._executor)
+        self._snapshot = snapshot
+        self._entitlements_cache = entitlements_cache
 
-    def get_billing_history(self, subscription_id: str) -> Dict[str, Any]:
+    def get_billing_history(
+        self, subscription_id: str, typed: bool = False, raw: bool = False, stream: bool = False
+    ) -> Union[
+        Dict[str, Any], Response, RawResponse, Iterator[Union[Dict[str, Any], BillingHistoryEntry]]
+    ]:
         """
         Get billing history for a subscription
 
         Args:
             subscription_id: The subscription's unique ID (UUID)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
+            stream: Return an iterator over the entries, decoded one at a time as
+                the response arrives, so memory use does not grow with the history
 
         Returns:
             API response with billing history data
 
+        Raises:
+            ValueError: If both ``stream`` and ``raw`` are set
+
         Example:
             >>> history = client.subscriptions.get_billing_history("sub_uuid_123")
         """
-        return self._client.get(f"subscriptions/{subscription_id}/billing-history")
+        if stream and raw:
+            raise ValueError("stream and raw cannot be combined")
+        if stream:
+            return self._stream_billing_history(subscription_id, typed)
+        response = self._client.get(f"subscriptions/{subscription_id}/billing-history", raw=raw)
+        return to_response(response, BillingHistoryEntry) if typed and not raw else response
+
+    def _stream_billing_history(
+        self, subscription_id: str, typed: bool
+    ) -> Iterator[Union[Dict[str, Any], BillingHistoryEntry]]:
+        entries = self._client.stream_items(
+            f"subscriptions/{subscription_id}/billing-history", keys=BILLING_HISTORY_ITEM_KEYS
+        )
+        for entry in entries:
+            yield BillingHistoryEntry(entry) if typed else entry
+
+    def iter_billing_history(
+        self,
+        subscription_id: str,
+        start_date: Optional[Union[date, datetime, str]] = None,
+        end_date: Optional[Union[date, datetime, str]] = None,
+        per_page: int = 100,
+        typed: bool = False
+    ) -> Iterator[Union[Dict[str, Any], BillingHistoryEntry]]:
+        """
+        Iterate over a subscription's billing history entries page by page
+
+        Only one page is requested and decoded at a time, so long histories
+        are processed in constant memory. If the API returns the whole
+        history at once instead of a page, its entries are yielded as is.
+
+        Args:
+            subscription_id: The subscription's unique ID (UUID)
+            start_date: Only yield entries created on or after this date or time
+            end_date: Only yield entries created on or before this date (the
+                whole day) or time
+            per_page: Entries requested per page
+            typed: Yield :class:`~metrifox_sdk.models.BillingHistoryEntry` models instead of dicts
+
+        Yields:
+            Billing history entries
+
+        Example:
+            >>> for entry in client.subscriptions.iter_billing_history(
+            ...     "sub_uuid_123", start_date=date(2025, 1, 1), end_date=date(2025, 3, 31)
+            ... ):
+            ...     reconcile(entry)
+        """
+        start = _to_datetime(start_date) if start_date is not None else None
+        end = _to_datetime(end_date, end_of_day=True) if end_date is not None else None
+        pages = iter_pages(
+            lambda page: self._client.get(
+                f"subscriptions/{subscription_id}/billing-history",
+                params={"page": page, "per_page": per_page}
+            ),
+            per_page,
+            keys=BILLING_HISTORY_ITEM_KEYS
+        )
+        for entries in pages:
+            for entry in entries:
+                if start is not None or end is not None:
+                    created_at = entry.get('created_at')
+                    created_at = _to_datetime(created_at) if created_at else None
+                    if created_at is None:
+                        continue
+                    if start is not None and created_at < start:
+                        continue
+                    if end is not None and created_at > end:
+                        continue
+                yield BillingHistoryEntry(entry) if typed else entry
 
-    def get_entitlements_summary(self, subscription_id: str) -> Dict[str, Any]:
+    def get_entitlements_summary(
+        self, subscription_id: str, typed: bool = False, raw: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Get entitlements summary for a subscription
 
+        When the client has an entitlements cache, a summary fetched (or
+        prefetched) within its TTL is returned without a request. Raw
+        responses are always requested.
+
         Args:
             subscription_id: The subscription's unique ID (UUID)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
 
         Returns:
             API response with entitlements summary data
@@ -40,14 +154,174 @@ class SubscriptionsModule:
         Example:
             >>> summary = client.subscriptions.get_entitlements_summary("sub_uuid_123")
         """
-        return self._client.get(f"subscriptions/{subscription_id}/v2/entitlements-summary")
+        if raw:
+            return self._client.get(
+                f"subscriptions/{subscription_id}/v2/entitlements-summary", raw=True
+            )
+        cache = self._entitlements_cache
+        response = cache.get(subscription_id) if cache is not None else None
+        if response is None:
+            response = self._fetch_entitlements_summary(subscription_id)
+        return to_response(response, Entitlement) if typed else response
+
+    def get_overview(
+        self,
+        subscription_id: str,
+        include_billing_history: bool = True,
+        typed: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get a subscription's entitlements summary, entitlements usage and billing history at once
+
+        The requests are sent concurrently over the client's connection pool,
+        so the overview takes about as long as the slowest of them.
+
+        Args:
+            subscription_id: The subscription's unique ID (UUID)
+            include_billing_history: Also fetch the billing history
+            typed: Return typed :class:`~metrifox_sdk.models.Response` objects instead of dicts
+
+        Returns:
+            Dict with ``subscription_id`` and the API responses under
+            ``entitlements_summary``, ``entitlements_usage`` and ``billing_history``
+
+        Raises:
+            APIError: If any of the requests fails
+
+        Example:
+            >>> overview = client.subscriptions.get_overview("sub_uuid_123")
+            >>> overview["entitlements_usage"]["data"]
+        """
+        return self.get_overviews(
+            [subscription_id], include_billing_history=include_billing_history, typed=typed
+        )[subscription_id]
 
-    def get_entitlements_usage(self, subscription_id: str) -> Dict[str, Any]:
+    def get_overviews(
+        self,
+        subscription_ids: Iterable[str],
+        include_billing_history: bool = True,
+        typed: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        return_exceptions: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the overviews of many subscriptions, see :meth:`get_overview`
+
+        All requests for all subscriptions share one bounded pool of workers.
+
+        Args:
+            subscription_ids: The subscriptions' unique IDs
+            include_billing_history: Also fetch the billing histories
+            typed: Return typed :class:`~metrifox_sdk.models.Response` objects instead of dicts
+            max_workers: Maximum number of concurrent requests
+            return_exceptions: Put a failed request's APIError in the overview
+                instead of raising it
+
+        Returns:
+            Overviews by subscription ID
+
+        Example:
+            >>> overviews = client.subscriptions.get_overviews(["sub_1", "sub_2"])
+        """
+        parts = ['entitlements_summary', 'entitlements_usage']
+        if include_billing_history:
+            parts.append('billing_history')
+        fetchers = {
+            'entitlements_summary': self.get_entitlements_summary,
+            'entitlements_usage': self.get_entitlements_usage,
+            'billing_history': self.get_billing_history,
+        }
+        calls = [(subscription_id, part) for subscription_id in subscription_ids for part in parts]
+        results = gather(
+            lambda call: fetchers[call[1]](call[0], typed=typed),
+            calls,
+            max_workers=max_workers,
+            return_exceptions=return_exceptions
+        )
+
+        overviews: Dict[str, Dict[str, Any]] = {}
+        for (subscription_id, part), result in zip(calls, results):
+            overview = overviews.setdefault(subscription_id, {'subscription_id': subscription_id})
+            overview[part] = result
+        return overviews
+
+    @runs_at(Priority.BULK)
+    def prefetch_entitlements(
+        self,
+        subscription_ids: Iterable[str] = (),
+        customer_keys: Iterable[str] = (),
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch the entitlements summaries of many subscriptions concurrently
+
+        Subscriptions of ``customer_keys`` are resolved with
+        ``customers.get_details``. The summaries populate the client's
+        entitlements cache and, for customers given by key, its entitlement
+        snapshot, so later lookups and access checks can be served locally.
+        Failed fetches are skipped.
+
+        Args:
+            subscription_ids: Subscription IDs to fetch
+            customer_keys: Customers whose subscriptions to fetch
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            Entitlements summary responses by subscription ID
+
+        Example:
+            >>> summaries = client.subscriptions.prefetch_entitlements(
+            ...     customer_keys=top_customer_keys, max_workers=16
+            ... )
+        """
+        owners: Dict[str, Optional[str]] = {
+            subscription_id: None for subscription_id in subscription_ids
+        }
+        customer_keys = list(customer_keys)
+        resolved = gather(
+            self._subscription_ids, customer_keys, max_workers, return_exceptions=True
+        )
+        for customer_key, ids in zip(customer_keys, resolved):
+            if isinstance(ids, APIError):
+                continue
+            for subscription_id in ids:
+                owners[subscription_id] = customer_key
+
+        ids = list(owners)
+        summaries = {}
+        for subscription_id, summary in zip(
+            ids, gather(self._fetch_entitlements_summary, ids, max_workers, return_exceptions=True)
+        ):
+            if isinstance(summary, APIError):
+                continue
+            summaries[subscription_id] = summary
+            customer_key = owners[subscription_id]
+            if self._snapshot is not None and customer_key is not None:
+                self._snapshot.update_from_summary(customer_key, summary)
+        return summaries
+
+    def _subscription_ids(self, customer_key: str) -> List[str]:
+        details = self._customers.get_details(customer_key)
+        subscriptions = (details.get('data') or {}).get('subscriptions') or []
+        return [subscription['id'] for subscription in subscriptions if subscription.get('id')]
+
+    def _fetch_entitlements_summary(self, subscription_id: str) -> Dict[str, Any]:
+        response = self._client.get(f"subscriptions/{subscription_id}/v2/entitlements-summary")
+        if self._entitlements_cache is not None:
+            self._entitlements_cache.set(subscription_id, response)
+        return response
+
+    def get_entitlements_usage(
+        self, subscription_id: str, typed: bool = False, raw: bool = False
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Get entitlements usage for a subscription
 
         Args:
             subscription_id: The subscription's unique ID (UUID)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the response undecoded, as a :class:`~metrifox_sdk.models.RawResponse`
+                (for relaying it as is; takes precedence over ``typed``)
 
         Returns:
             API response with entitlements usage data
@@ -55,4 +329,38 @@ class SubscriptionsModule:
         Example:
             >>> usage = client.subscriptions.get_entitlements_usage("sub_uuid_123")
         """
-        return self._client.get(f"subscriptions/{subscription_id}/v2/entitlements-usage")
+        response = self._client.get(
+            f"subscriptions/{subscription_id}/v2/entitlements-usage", raw=raw
+        )
+        return to_response(response, Entitlement) if typed and not raw else response
+
+    # Future-returning variants, run on the client's bounded thread pool
+    get_billing_history_async = future_variant('get_billing_history')
+    get_entitlements_summary_async = future_variant('get_entitlements_summary')
+    get_entitlements_usage_async = future_variant('get_entitlements_usage')
+    get_overview_async = future_variant('get_overview')
+
+
+def _to_datetime(
+    value: Union[date, datetime, str, int, float], end_of_day: bool = False
+) -> Optional[datetime]:
+    """Convert a date, ISO 8601 string or epoch timestamp (s or ms) to an aware datetime"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 1e11 else value
+        return datetime.fromtimestamp(seconds, tz=timezone.utc)
+    if isinstance(value, str):
+        try:
+            if len(value) == 10:
+                value = date.fromisoformat(value)
+            else:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        if end_of_day:
+            next_day = datetime.combine(value + timedelta(days=1), time(), timezone.utc)
+            return next_day - timedelta(microseconds=1)
+        return datetime.combine(value, time(), timezone.utc)
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
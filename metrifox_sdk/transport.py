@@ -0,0 +1,567 @@
+"""
+HTTP transports for Metrifox SDK
+
+A transport sends a single HTTP request and returns the status code,
+headers and raw body bytes. :class:`~metrifox_sdk.base.BaseClient` builds
+the request (URL, auth headers, encoded body) and interprets the response;
+the transport only owns the connection pool.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
+
+from . import fork
+from .exceptions import ConfigurationError, TransportError
+
+if TYPE_CHECKING:
+    from .dns import DNSCache
+
+#: Bytes read from the socket at a time when streaming a response body
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class TransportResponse:
+    """Status code, headers and body bytes of an HTTP response"""
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class StreamingResponse:
+    """
+    Status code and headers of an HTTP response whose body is read incrementally
+
+    The body must be consumed with :meth:`iter_bytes` (or :meth:`read`)
+    before the connection is returned to the pool by :meth:`close`.
+    """
+
+    __slots__ = ('status_code', 'headers', '_chunks', '_close')
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Mapping[str, str],
+        chunks: Iterable[bytes],
+        close: Optional[Callable[[], None]] = None
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self._chunks = chunks
+        self._close = close
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yield the body in chunks, decoded according to its Content-Encoding"""
+        return iter(self._chunks)
+
+    def read(self) -> bytes:
+        """Read the whole remaining body"""
+        return b''.join(self.iter_bytes())
+
+    def close(self) -> None:
+        """Release the connection"""
+        if self._close is not None:
+            self._close()
+
+    def __enter__(self) -> 'StreamingResponse':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Transport(ABC):
+    """Interface for HTTP transports"""
+
+    #: Content codings the transport decodes, sent as Accept-Encoding.
+    #: None leaves the header to the transport.
+    accept_encoding: Optional[str] = None
+
+    @abstractmethod
+    def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        """
+        Send an HTTP request
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, DELETE)
+            url: Absolute request URL
+            params: Query parameters
+            headers: Request headers
+            content: Encoded request body
+            files: Files for multipart upload
+            timeout: Timeout in seconds
+
+        Returns:
+            The response, whatever its status code, with the body already
+            decoded according to its Content-Encoding
+
+        Raises:
+            TransportError: If no response was received
+        """
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None
+    ) -> StreamingResponse:
+        """
+        Send an HTTP request and return as soon as the response headers arrive
+
+        The default implementation reads the whole body with :meth:`send`;
+        transports backed by a network library read it incrementally.
+
+        Returns:
+            The response, whatever its status code, with its body not yet read
+
+        Raises:
+            TransportError: If no response was received, or (while iterating
+                the body) the connection failed
+        """
+        response = self.send(
+            method, url, params=params, headers=headers, content=content, timeout=timeout
+        )
+        return StreamingResponse(response.status_code, response.headers, (response.content,))
+
+    def warmup(self, url: str, timeout: Optional[float] = None) -> None:
+        """
+        Open a pooled connection to ``url``'s host ahead of the first request
+
+        The default implementation sends a HEAD request and ignores the
+        response and any error.
+
+        Args:
+            url: Any URL on the host to connect to
+            timeout: Timeout in seconds
+        """
+        try:
+            self.send('HEAD', url, timeout=timeout)
+        except TransportError:
+            pass
+
+    def close(self) -> None:
+        """Release pooled connections"""
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 transport backed by a ``requests.Session`` (the default)
+
+    ``requests`` is only imported when the session is first needed. Its
+    default Accept-Encoding already lists br and zstd when urllib3 has
+    decoders for them, so ``accept_encoding`` is left unset.
+
+    After a fork the child gets a fresh session; a session passed in by the
+    caller keeps its configuration but has its connection pools emptied.
+
+    Args:
+        session: An existing ``requests.Session`` to use (optional)
+        dns_cache: Cache of resolved host addresses used when opening new
+            connections (optional). Only applies to the session created by
+            the transport, not one passed in
+    """
+
+    def __init__(self, session=None, dns_cache: Optional['DNSCache'] = None):
+        self._owns_session = session is None
+        self._session = session
+        self.dns_cache = dns_cache
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    @property
+    def session(self):
+        """The ``requests.Session``, created on first use"""
+        session = self._session
+        if session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    if self.dns_cache is not None:
+                        from .dns import mount_dns_cache
+                        mount_dns_cache(session, self.dns_cache)
+                    self._session = session
+                session = self._session
+        return session
+
+    @session.setter
+    def session(self, session) -> None:
+        self._session = session
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        # The inherited sockets belong to the parent: drop them unused
+        if self._owns_session:
+            self._session = None
+        elif self._session is not None:
+            for adapter in self._session.adapters.values():
+                adapter.close()
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        try:
+            response = self.session.request(
+                method=method,
+                url=url,
+                params=params,
+                data=content,
+                files=files,
+                headers=headers,
+                timeout=timeout
+            )
+        except Exception as e:
+            from requests.exceptions import RequestException
+            if isinstance(e, RequestException):
+                raise TransportError(f"Request failed: {str(e)}")
+            raise
+        return TransportResponse(response.status_code, response.headers, response.content)
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None
+    ) -> StreamingResponse:
+        from requests.exceptions import RequestException
+
+        try:
+            response = self.session.request(
+                method=method,
+                url=url,
+                params=params,
+                data=content,
+                headers=headers,
+                timeout=timeout,
+                stream=True
+            )
+        except RequestException as e:
+            raise TransportError(f"Request failed: {str(e)}")
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            except RequestException as e:
+                raise TransportError(f"Reading the response failed: {str(e)}")
+
+        return StreamingResponse(response.status_code, response.headers, chunks(), response.close)
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
+class HTTP2Transport(Transport):
+    """
+    HTTP/2 transport backed by ``httpx``
+
+    Concurrent requests to the same host are multiplexed as streams over a
+    single connection, so many in-flight calls from different threads do
+    not each need their own socket. Requires ``pip install metrifox-sdk[http2]``.
+
+    Args:
+        client: An existing ``httpx.Client`` to use (optional). Such a client is
+            not rebuilt after a fork, unlike the default one
+        max_connections: Maximum number of connections in the pool
+    """
+
+    def __init__(self, client=None, max_connections: int = 10):
+        try:
+            import httpx
+            import h2  # noqa: F401
+        except ImportError:
+            raise ConfigurationError(
+                "The HTTP/2 transport requires httpx with HTTP/2 support. "
+                "Install it with: pip install metrifox-sdk[http2]"
+            )
+
+        self._httpx = httpx
+        self._max_connections = max_connections
+        self._owns_client = client is None
+        self.client = client if client is not None else self._new_client()
+        # httpx adds br and zstd when their decoders are installed
+        self.accept_encoding = self.client.headers.get('accept-encoding')
+        fork.register(self)
+
+    def _new_client(self):
+        return self._httpx.Client(
+            http2=True,
+            limits=self._httpx.Limits(max_connections=self._max_connections)
+        )
+
+    def _after_fork(self) -> None:
+        if self._owns_client:
+            self.client = self._new_client()
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        try:
+            response = self.client.request(
+                method,
+                url,
+                params=params,
+                headers=headers,
+                content=content,
+                files=files,
+                timeout=timeout
+            )
+        except self._httpx.HTTPError as e:
+            raise TransportError(f"Request failed: {str(e)}")
+        return TransportResponse(response.status_code, response.headers, response.content)
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None
+    ) -> StreamingResponse:
+        try:
+            request = self.client.build_request(
+                method, url, params=params, headers=headers, content=content, timeout=timeout
+            )
+            response = self.client.send(request, stream=True)
+        except self._httpx.HTTPError as e:
+            raise TransportError(f"Request failed: {str(e)}")
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_bytes(STREAM_CHUNK_SIZE)
+            except self._httpx.HTTPError as e:
+                raise TransportError(f"Reading the response failed: {str(e)}")
+
+        return StreamingResponse(response.status_code, response.headers, chunks(), response.close)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class AsyncTransport(ABC):
+    """Interface for asynchronous HTTP transports"""
+
+    accept_encoding: Optional[str] = None
+
+    @abstractmethod
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        """Send an HTTP request; see :meth:`Transport.send`"""
+
+    async def close(self) -> None:
+        """Release pooled connections"""
+        pass
+
+
+class AsyncHTTPXTransport(AsyncTransport):
+    """
+    Asynchronous transport backed by ``httpx.AsyncClient``
+
+    Requires ``pip install metrifox-sdk[http2]``.
+
+    Args:
+        client: An existing ``httpx.AsyncClient`` to use (optional). Such a client
+            is not rebuilt after a fork, unlike the default one
+        http2: Negotiate HTTP/2 and multiplex concurrent requests
+        max_connections: Maximum number of connections in the pool
+    """
+
+    def __init__(self, client=None, http2: bool = True, max_connections: int = 10):
+        try:
+            import httpx
+            if http2:
+                import h2  # noqa: F401
+        except ImportError:
+            raise ConfigurationError(
+                "The async transport requires httpx. "
+                "Install it with: pip install metrifox-sdk[http2]"
+            )
+
+        self._httpx = httpx
+        self._http2 = http2
+        self._max_connections = max_connections
+        self._owns_client = client is None
+        self.client = client if client is not None else self._new_client()
+        self.accept_encoding = self.client.headers.get('accept-encoding')
+        fork.register(self)
+
+    def _new_client(self):
+        return self._httpx.AsyncClient(
+            http2=self._http2,
+            limits=self._httpx.Limits(max_connections=self._max_connections)
+        )
+
+    def _after_fork(self) -> None:
+        if self._owns_client:
+            self.client = self._new_client()
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        try:
+            response = await self.client.request(
+                method,
+                url,
+                params=params,
+                headers=headers,
+                content=content,
+                files=files,
+                timeout=timeout
+            )
+        except self._httpx.HTTPError as e:
+            raise TransportError(f"Request failed: {str(e)}")
+        return TransportResponse(response.status_code, response.headers, response.content)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class MockRequest:
+    """A request received by a :class:`MockTransport`"""
+
+    __slots__ = ('method', 'url', 'params', 'headers', 'content', 'files')
+
+    def __init__(self, method, url, params=None, headers=None, content=None, files=None):
+        self.method = method
+        self.url = url
+        self.params = params
+        self.headers = headers
+        self.content = content
+        self.files = files
+
+    def __repr__(self) -> str:
+        return f"MockRequest({self.method} {self.url})"
+
+
+MockHandler = Callable[[MockRequest], Union[TransportResponse, TransportError]]
+
+
+class MockTransport(Transport):
+    """
+    In-memory transport for tests and load tests
+
+    Every request is recorded in ``requests`` and answered by ``handler``,
+    which receives a :class:`MockRequest` and returns a
+    :class:`TransportResponse`. Returning (or raising) a
+    :class:`~metrifox_sdk.exceptions.TransportError` simulates a connection
+    failure; any other exception the handler raises propagates unchanged,
+    so assertions and bugs in a test are not retried. Without a handler
+    every request gets ``200 {}``.
+
+    Example:
+        >>> transport = MockTransport(lambda request: TransportResponse(
+        ...     200, {}, b'{"data": {"can_access": true}}'
+        ... ))
+        >>> client = MetrifoxClient(api_key="test", transport=transport)
+    """
+
+    def __init__(self, handler: Optional[MockHandler] = None):
+        self.handler = handler
+        self.requests: List[MockRequest] = []
+
+    def handle(self, request: MockRequest) -> TransportResponse:
+        """Record a request and produce its response"""
+        self.requests.append(request)
+        if self.handler is None:
+            return TransportResponse(200, {'Content-Type': 'application/json'}, b'{}')
+        response = self.handler(request)
+        if isinstance(response, TransportError):
+            raise response
+        return response
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        return self.handle(MockRequest(method, url, params, headers, content, files))
+
+
+class AsyncMockTransport(AsyncTransport):
+    """Asynchronous counterpart of :class:`MockTransport`"""
+
+    def __init__(self, handler: Optional[MockHandler] = None):
+        self._mock = MockTransport(handler)
+
+    @property
+    def requests(self) -> List[MockRequest]:
+        """Requests received so far"""
+        return self._mock.requests
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> TransportResponse:
+        return self._mock.handle(MockRequest(method, url, params, headers, content, files))
@@ -2,16 +2,55 @@
 Type definitions for Metrifox SDK
 """
 
-from typing import TypedDict, Optional, Literal, Dict, Any
-from dataclasses import dataclass, field, asdict
+from typing import TypedDict, Optional, Literal, Dict, Any, Tuple
+from dataclasses import dataclass, fields
+
+
+def _slotted(cls):
+    """
+    Rebuild a dataclass with ``__slots__``
+
+    Equivalent to ``@dataclass(slots=True)`` on Python 3.10+, kept as a
+    helper for older interpreters. Also precomputes ``_fields``, the
+    ``(attribute, key)`` pairs used by :meth:`_Request.to_dict`.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names and k != '__dict__'}
+    namespace.pop('__weakref__', None)
+    namespace['__slots__'] = names
+    namespace['_fields'] = tuple((name, cls._renames.get(name, name)) for name in names)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+class _Request:
+    """Base for request types with a single-pass, non-copying ``to_dict``"""
+
+    __slots__ = ()
+
+    _fields: Tuple[Tuple[str, str], ...] = ()
+    # Attribute name -> API field name
+    _renames: Dict[str, str] = {}
+    _skip_none = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary, removing None values"""
+        if not self._skip_none:
+            return {key: getattr(self, name) for name, key in self._fields}
+        data = {}
+        for name, key in self._fields:
+            value = getattr(self, name)
+            if value is not None:
+                data[key] = value
+        return data
 
 
 # Customer Types
 CustomerType = Literal["INDIVIDUAL", "BUSINESS"]
 
 
+@_slotted
 @dataclass
-class CustomerCreateRequest:
+class CustomerCreateRequest(_Request):
     """Request to create a new customer"""
     customer_key: str
     customer_type: CustomerType
@@ -29,13 +68,10 @@ class CustomerCreateRequest:
     account_manager: Optional[str] = None
     tax_identification_number: Optional[str] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary, removing None values"""
-        return {k: v for k, v in asdict(self).items() if v is not None}
-
 
+@_slotted
 @dataclass
-class CustomerUpdateRequest:
+class CustomerUpdateRequest(_Request):
     """Request to update an existing customer"""
     primary_email: Optional[str] = None
     first_name: Optional[str] = None
@@ -52,13 +88,10 @@ class CustomerUpdateRequest:
     account_manager: Optional[str] = None
     tax_identification_number: Optional[str] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary, removing None values"""
-        return {k: v for k, v in asdict(self).items() if v is not None}
-
 
+@_slotted
 @dataclass
-class CustomerListRequest:
+class CustomerListRequest(_Request):
     """Request to list customers with optional filters"""
     page: Optional[int] = None
     per_page: Optional[int] = None
@@ -66,15 +99,14 @@ class CustomerListRequest:
     customer_type: Optional[CustomerType] = None
     date_created: Optional[str] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary, removing None values"""
-        return {k: v for k, v in asdict(self).items() if v is not None}
-
 
 # Usage Types
+@_slotted
 @dataclass
-class UsageEventRequest:
+class UsageEventRequest(_Request):
     """Request to record a usage event"""
+    _renames = {'amount': 'quantity'}
+
     customer_key: str
     event_id: str
     event_name: Optional[str] = None
@@ -84,39 +116,27 @@ class UsageEventRequest:
     timestamp: Optional[int] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary, removing None values"""
-        data = asdict(self)
-        # Rename 'amount' to 'quantity' as per API requirement
-        if 'amount' in data:
-            data['quantity'] = data.pop('amount')
-        return {k: v for k, v in data.items() if v is not None}
-
 
+@_slotted
 @dataclass
-class AccessCheckRequest:
+class AccessCheckRequest(_Request):
     """Request to check feature access"""
+    _skip_none = False
+
     feature_key: str
     customer_key: str
     requested_quantity: int = 1
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
-        return asdict(self)
-
 
 # Checkout Types
+@_slotted
 @dataclass
-class CheckoutConfig:
+class CheckoutConfig(_Request):
     """Configuration for checkout URL generation"""
     offering_key: str
     billing_interval: Optional[str] = None
     customer_key: Optional[str] = None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary, removing None values"""
-        return {k: v for k, v in asdict(self).items() if v is not None}
-
 
 # Response Types (as TypedDict for flexibility)
 class APIResponse(TypedDict, total=False):
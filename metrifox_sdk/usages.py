@@ -2,27 +2,73 @@
 Usages module for Metrifox SDK
 """
 
-from typing import Dict, Any, Union
+from typing import TYPE_CHECKING, Dict, Any, Optional, Union
 from .base import BaseClient
-from .types import UsageEventRequest, AccessCheckRequest, AccessResponse
+from .concurrency import BoundedExecutor, future_variant
+from .exceptions import APIError
+from .models import AccessCheck, RawResponse, Response, UsageEvent, to_response
+from .priority import Priority, runs_at
+from .retry import generate_idempotency_key
+from .snapshot import is_unavailable
+from .types import UsageEventRequest, AccessCheckRequest
+
+if TYPE_CHECKING:
+    from .aggregator import UsageCollectorClient
+    from .snapshot import EntitlementSnapshot, UsageReplayQueue
+
+
+def usage_idempotency_key(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Derive the idempotency key of a usage event from its ``event_id``
+
+    Returns:
+        The key, or None if the event has no ``event_id`` (a key is then generated)
+    """
+    event_id = event.get('event_id')
+    return f"usage-{event_id}" if event_id else None
 
 
 class UsagesModule:
     """Module for usage tracking and access control"""
 
-    def __init__(self, client: BaseClient, meter_service_client: BaseClient):
+    def __init__(
+        self,
+        client: BaseClient,
+        meter_service_client: BaseClient,
+        collector: Optional['UsageCollectorClient'] = None,
+        snapshot: Optional['EntitlementSnapshot'] = None,
+        replay_queue: Optional['UsageReplayQueue'] = None,
+        executor: Optional[BoundedExecutor] = None
+    ):
         self._client = client
+        self._executor = executor or BoundedExecutor()
         self._meter_client = meter_service_client
+        self._collector = collector
+        self._snapshot = snapshot
+        self._replay_queue = replay_queue
 
-    def check_access(self, request: Union[AccessCheckRequest, Dict[str, Any]]) -> Dict[str, Any]:
+    @runs_at(Priority.INTERACTIVE)
+    def check_access(
+        self,
+        request: Union[AccessCheckRequest, Dict[str, Any]],
+        typed: bool = False,
+        raw: bool = False,
+    ) -> Union[Dict[str, Any], Response, RawResponse]:
         """
         Check if a customer has access to a feature
 
         Args:
             request: Access check request (AccessCheckRequest or dict)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            raw: Return the meter service's response undecoded, as a
+                :class:`~metrifox_sdk.models.RawResponse` (for relaying it as is).
+                Raw checks always go to the meter service and bypass the snapshot
 
         Returns:
-            API response with access information
+            API response with access information. If the client has an entitlement
+            snapshot and the meter service is unavailable (or the snapshot's
+            ``fresh_for`` is set and the entry is that recent), the answer comes
+            from the snapshot and ``meta.source`` is ``"snapshot"``
 
         Example:
             >>> access = client.usages.check_access({
@@ -33,19 +79,66 @@ class UsagesModule:
             ...     print(f"Access granted. Balance: {access['data']['balance']}")
             ... else:
             ...     print("Access denied")
+            >>>
+            >>> # Typed response
+            >>> access = client.usages.check_access(request, typed=True)
+            >>> access.data.can_access
         """
         params = request.to_dict() if hasattr(request, 'to_dict') else request
-        return self._meter_client.get("usage/access", params=params)
+        if raw:
+            return self._meter_client.get("usage/access", params=params, raw=True)
+        if self._snapshot is not None and self._snapshot.fresh_for is not None:
+            response = self._snapshot.check_access(params, max_age=self._snapshot.fresh_for)
+            if response is not None:
+                return to_response(response, AccessCheck) if typed else response
+        try:
+            response = self._meter_client.get("usage/access", params=params)
+        except APIError as e:
+            if self._snapshot is None or not is_unavailable(e):
+                raise
+            response = self._snapshot.check_access(params)
+            if response is None:
+                raise
+        else:
+            data = response.get('data') if self._snapshot is not None else None
+            customer_key, feature_key = params.get('customer_key'), params.get('feature_key')
+            if isinstance(data, dict) and customer_key and feature_key:
+                self._snapshot.update(customer_key, feature_key, data)
+        return to_response(response, AccessCheck) if typed else response
 
-    def record_usage(self, request: Union[UsageEventRequest, Dict[str, Any]]) -> Dict[str, Any]:
+    def record_usage(
+        self,
+        request: Union[UsageEventRequest, Dict[str, Any]],
+        typed: bool = False,
+        idempotency_key: Optional[str] = None,
+        direct: bool = False
+    ) -> Union[Dict[str, Any], Response]:
         """
         Record a usage event
 
+        The event is sent with an idempotency key derived from its ``event_id``,
+        so retrying a timed-out call (or sending the same event twice) never
+        records it twice.
+
         Args:
             request: Usage event data (UsageEventRequest or dict)
+            typed: Return a typed :class:`~metrifox_sdk.models.Response` instead of a dict
+            idempotency_key: Idempotency key overriding the one derived from
+                ``event_id`` (optional). Events with an explicit key bypass the
+                usage collector and are sent directly
+            direct: Always send the event to the meter service and raise if it
+                fails, bypassing the usage collector and replay queue, so a
+                returned response means the service recorded the event
 
         Returns:
-            API response confirming event recording
+            API response confirming event recording. When the client is configured
+            with a usage collector, the event is handed to it and
+            ``{"message": "Event queued"}`` is returned instead. When it has a
+            replay queue and the meter service is unavailable, the event is
+            queued for :meth:`replay_queued_usage` and
+            ``{"message": "Event queued for replay"}`` is returned. Only events
+            the meter service confirmed are deducted from the entitlement
+            snapshot's balances
 
         Example:
             >>> # Simple usage recording
@@ -76,4 +169,52 @@ class UsagesModule:
         if 'amount' in data and 'quantity' not in data:
             data['quantity'] = data.pop('amount')
 
-        return self._meter_client.post("usage/events", json=data)
+        # Hand off to the per-host collector; fall back to sending directly
+        # if it is not running. The collector derives keys from event ids, so
+        # events with an explicit idempotency key are sent directly
+        if (
+            self._collector is not None and not direct and idempotency_key is None
+            and self._collector.send(data)
+        ):
+            response = {"message": "Event queued"}
+        else:
+            if idempotency_key is None:
+                idempotency_key = usage_idempotency_key(data)
+            if idempotency_key is None and self._replay_queue is not None:
+                # A replayed event must be sent with the key of the first attempt
+                idempotency_key = generate_idempotency_key()
+            try:
+                response = self._post_usage(data, idempotency_key)
+            except APIError as e:
+                if direct or self._replay_queue is None or not is_unavailable(e):
+                    raise
+                self._replay_queue.append(data, idempotency_key)
+                response = {"message": "Event queued for replay"}
+            else:
+                # Only usage the service has recorded is deducted: queued events
+                # show up in the balances of the next refresh instead
+                if self._snapshot is not None and data.get('feature_key'):
+                    self._snapshot.consume(
+                        data.get('customer_key'), data['feature_key'], data.get('quantity', 1)
+                    )
+        return to_response(response, UsageEvent) if typed else response
+
+    @runs_at(Priority.BULK)
+    def replay_queued_usage(self) -> int:
+        """
+        Send usage events queued while the meter service was unavailable
+
+        Returns:
+            Number of events delivered (or rejected by the service); 0 if the
+            client has no replay queue
+        """
+        if self._replay_queue is None:
+            return 0
+        return self._replay_queue.replay(self._post_usage)
+
+    def _post_usage(self, data: Dict[str, Any], idempotency_key: Optional[str]) -> Dict[str, Any]:
+        return self._meter_client.post("usage/events", json=data, idempotency_key=idempotency_key)
+
+    # Future-returning variants, run on the client's bounded thread pool
+    check_access_async = future_variant('check_access')
+    record_usage_async = future_variant('record_usage')
@@ -35,6 +35,9 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    entry_points={
+        "console_scripts": ["metrifox=metrifox_sdk.cli:main"],
+    },
     keywords="metrifox api sdk usage-based billing saas",
     project_urls={
         "Bug Reports": "https://github.com/metrifox/metrifox-python/issues",
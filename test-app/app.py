@@ -2,7 +2,7 @@
 Simple Flask app to test the Metrifox Python SDK
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import sys
 import os
 
@@ -25,6 +25,11 @@ except ConfigurationError as e:
     metrifox = None
 
 
+def relay(raw):
+    """Pass an SDK raw response through to the browser without decoding it"""
+    return Response(raw.content, status=raw.status_code, content_type=raw.content_type)
+
+
 @app.route('/')
 def home():
     """Home page with API documentation"""
@@ -74,8 +79,7 @@ def customers():
         else:
             # List customers
             params = request.args.to_dict()
-            result = metrifox.customers.list(params)
-            return jsonify(result)
+            return relay(metrifox.customers.list(params, raw=True))
 
     except APIError as e:
         return jsonify({
@@ -92,8 +96,7 @@ def customer_detail(customer_key):
 
     try:
         if request.method == 'GET':
-            result = metrifox.customers.get(customer_key)
-            return jsonify(result)
+            return relay(metrifox.customers.get(customer_key, raw=True))
 
         elif request.method == 'PUT':
             data = request.json
@@ -118,8 +121,7 @@ def customer_details(customer_key):
         return jsonify({"error": "SDK not initialized"}), 500
 
     try:
-        result = metrifox.customers.get_details(customer_key)
-        return jsonify(result)
+        return relay(metrifox.customers.get_details(customer_key, raw=True))
     except APIError as e:
         return jsonify({
             "error": str(e),
@@ -153,11 +155,10 @@ def check_access(customer_key, feature_key):
         return jsonify({"error": "SDK not initialized"}), 500
 
     try:
-        result = metrifox.usages.check_access({
+        return relay(metrifox.usages.check_access({
             "customer_key": customer_key,
             "feature_key": feature_key
-        })
-        return jsonify(result)
+        }, raw=True))
     except APIError as e:
         return jsonify({
             "error": str(e),
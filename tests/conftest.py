@@ -25,9 +25,9 @@ def mock_base_client(mock_api_key, monkeypatch):
     """Provide a mock base client with mocked requests"""
     client = BaseClient(mock_api_key, "https://api.test.com")
     
-    # Mock the session to avoid actual HTTP calls
+    # Mock the transport's session to avoid actual HTTP calls
     mock_session = MagicMock()
-    monkeypatch.setattr(client, 'session', mock_session)
+    monkeypatch.setattr(client.transport, 'session', mock_session)
     
     return client, mock_session
 
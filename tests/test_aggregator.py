@@ -0,0 +1,183 @@
+"""
+Tests for the cross-process usage collector
+"""
+
+import json
+import socket
+import time
+
+import pytest
+from unittest.mock import MagicMock
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.aggregator import UsageCollector
+from metrifox_sdk.exceptions import APIError
+from metrifox_sdk.transport import MockTransport
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires Unix sockets")
+
+
+def event(event_id, quantity=1, customer_key="cust_1"):
+    return {
+        "customer_key": customer_key,
+        "event_name": "api_call",
+        "event_id": event_id,
+        "quantity": quantity
+    }
+
+
+class TestUsageCollector:
+    """Test batching, deduplication and forwarding"""
+
+    def test_dedup_and_flush(self, tmp_path):
+        """Test that duplicate event ids are forwarded once"""
+        usages = MagicMock()
+        collector = UsageCollector(usages, str(tmp_path / "usage.sock"))
+
+        assert collector.add(event("evt_1")) is True
+        assert collector.add(event("evt_1")) is False
+        collector.add(event("evt_2"))
+
+        assert collector.flush() == 2
+        assert usages.record_usage.call_count == 2
+        assert collector.stats["duplicates"] == 1
+
+    def test_aggregate_merges_quantities(self, tmp_path):
+        """Test that matching events are merged into one request"""
+        usages = MagicMock()
+        collector = UsageCollector(usages, str(tmp_path / "usage.sock"), aggregate=True)
+        collector.add(event("evt_1", 2))
+        collector.add(event("evt_2", 3))
+        collector.add(event("evt_3", 1, customer_key="cust_2"))
+
+        assert collector.flush() == 3
+        sent = sorted(
+            (c.args[0] for c in usages.record_usage.call_args_list), key=lambda e: e["customer_key"]
+        )
+        assert [e["quantity"] for e in sent] == [5, 1]
+        assert sent[0]["event_id"].startswith("agg_")
+        assert sent[1]["event_id"] == "evt_3"
+        assert collector.stats["requests"] == 2
+
+    def test_failed_events_retried_with_backoff(self, tmp_path, monkeypatch):
+        """Test that failed events are kept and retried with growing delays"""
+        clock = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+        usages = MagicMock()
+        usages.record_usage.side_effect = [APIError("Request failed")] * 10 + [None]
+        collector = UsageCollector(usages, str(tmp_path / "usage.sock"), retry_backoff=1.0)
+        collector.add(event("evt_1"))
+
+        assert collector.flush() == 0
+        assert collector.flush() == 0  # not due yet
+        assert usages.record_usage.call_count == 1
+
+        delay = 1.0
+        for attempt in range(2, 12):
+            clock[0] += delay
+            assert collector.flush() == (1 if attempt == 11 else 0)
+            assert usages.record_usage.call_count == attempt
+            delay *= 2
+        assert collector.stats["failed"] == 0
+
+    def test_rejected_events_dropped(self, tmp_path):
+        """Test that events refused with a client error are dropped and can be resent"""
+        usages = MagicMock()
+        usages.record_usage.side_effect = APIError("Invalid event", status_code=422)
+        collector = UsageCollector(usages, str(tmp_path / "usage.sock"))
+        collector.add(event("evt_1"))
+
+        assert collector.flush() == 0
+        assert collector.flush() == 0
+        assert usages.record_usage.call_count == 1
+        assert collector.stats["failed"] == 1
+        assert collector.add(event("evt_1")) is True
+
+    def test_retry_buffer_bounded(self, tmp_path):
+        """Test that the oldest failed events are dropped once the buffer is full"""
+        usages = MagicMock()
+        usages.record_usage.side_effect = APIError("Service unavailable", status_code=503)
+        collector = UsageCollector(usages, str(tmp_path / "usage.sock"), retry_buffer_size=2)
+        collector.add(event("evt_1"))
+        collector.flush()
+        collector.add(event("evt_2"))
+        collector.add(event("evt_3"))
+        collector.flush()
+
+        assert collector.stats["failed"] == 1
+        assert collector.add(event("evt_1")) is True
+        assert collector.add(event("evt_2")) is False
+
+    def test_failed_merged_event_resent_unchanged(self, tmp_path):
+        """Test that a failed merged event is retried as is, not merged with newer events"""
+        usages = MagicMock()
+        usages.record_usage.side_effect = [APIError("Request failed"), None, None]
+        collector = UsageCollector(
+            usages, str(tmp_path / "usage.sock"), aggregate=True, retry_backoff=0
+        )
+        collector.add(event("evt_1", 2))
+        collector.add(event("evt_2", 3))
+        assert collector.flush() == 0
+        failed = dict(usages.record_usage.call_args.args[0])
+
+        collector.add(event("evt_3", 4))
+        assert collector.flush() == 3
+        sent = [c.args[0] for c in usages.record_usage.call_args_list[1:]]
+        assert failed in sent
+        assert {e["quantity"] for e in sent} == {5, 4}
+
+    def test_workers_send_through_socket(self, tmp_path, mock_api_key):
+        """Test that worker clients hand events to a running collector"""
+        address = str(tmp_path / "usage.sock")
+        upstream = MockTransport()
+        collector_client = MetrifoxClient(api_key=mock_api_key, transport=upstream)
+        collector = UsageCollector(collector_client.usages, address, flush_interval=0.05).start()
+        try:
+            worker_transport = MockTransport()
+            worker = MetrifoxClient(
+                api_key=mock_api_key, transport=worker_transport, usage_collector=address
+            )
+
+            response = worker.usages.record_usage(event("evt_1"))
+            assert response == {"message": "Event queued"}
+            assert worker_transport.requests == []
+
+            deadline = time.time() + 5
+            while not upstream.requests and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            collector.stop()
+
+        assert len(upstream.requests) == 1
+        assert json.loads(upstream.requests[0].content)["event_id"] == "evt_1"
+
+    def test_falls_back_when_collector_down(self, tmp_path, mock_api_key):
+        """Test that events are sent directly if no collector is listening"""
+        transport = MockTransport()
+        client = MetrifoxClient(
+            api_key=mock_api_key,
+            transport=transport,
+            usage_collector=str(tmp_path / "missing.sock")
+        )
+
+        client.usages.record_usage(event("evt_1"))
+
+        assert len(transport.requests) == 1
+        assert transport.requests[0].url.endswith("usage/events")
+
+    def test_explicit_idempotency_key_bypasses_collector(self, tmp_path, mock_api_key):
+        """Test that an event with its own idempotency key is sent directly with it"""
+        address = str(tmp_path / "usage.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.bind(address)
+        try:
+            transport = MockTransport()
+            client = MetrifoxClient(
+                api_key=mock_api_key, transport=transport, usage_collector=address
+            )
+
+            client.usages.record_usage(event("evt_1"), idempotency_key="order-42")
+        finally:
+            listener.close()
+
+        assert len(transport.requests) == 1
+        assert transport.requests[0].headers["Idempotency-Key"] == "order-42"
@@ -0,0 +1,146 @@
+"""
+Tests for usage backfill
+"""
+
+import json
+import socket
+
+import pytest
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.backfill import Backfill, to_usage_event
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+
+class Meter:
+    """Mock meter service recording events and failing for one customer"""
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, request):
+        event = json.loads(request.content)
+        if event["customer_key"] == "cust_broken":
+            return TransportResponse(422, {}, b'{"message":"Unknown customer"}')
+        self.events.append(event)
+        return TransportResponse(201, {}, b'{"message":"ok"}')
+
+
+@pytest.fixture
+def meter():
+    return Meter()
+
+
+@pytest.fixture
+def client(mock_api_key, meter):
+    return MetrifoxClient(api_key=mock_api_key, transport=MockTransport(meter))
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+class TestToUsageEvent:
+    """Test row validation"""
+
+    def test_csv_row(self):
+        event = to_usage_event({
+            "customer_key": "cust_1", "event_id": "evt_1", "event_name": "api_call",
+            "quantity": "3", "credit_used": "", "metadata": '{"source": "logs"}',
+        })
+        assert event.to_dict() == {
+            "customer_key": "cust_1", "event_id": "evt_1", "event_name": "api_call",
+            "quantity": 3, "metadata": {"source": "logs"},
+        }
+
+    def test_large_integers_exact(self):
+        event = to_usage_event({
+            "customer_key": "c", "event_id": "evt_1", "event_name": "e",
+            "quantity": "9007199254740993", "timestamp": "1700000000000",
+        })
+        assert event.to_dict()["quantity"] == 2 ** 53 + 1
+        assert event.to_dict()["timestamp"] == 1700000000000
+
+    @pytest.mark.parametrize("row", [
+        {"event_id": "evt_1", "event_name": "e"},
+        {"customer_key": "c", "event_id": "evt_1"},
+        {"customer_key": "c", "event_id": "evt_1", "event_name": "e", "quantity": "many"},
+        {"customer_key": "c", "event_id": "evt_1", "event_name": "e", "quantity": "nan"},
+        {"customer_key": "c", "event_id": "evt_1", "event_name": "e", "quantity": "inf"},
+        ["not", "an", "object"],
+    ])
+    def test_invalid_rows(self, row):
+        with pytest.raises(ValueError):
+            to_usage_event(row)
+
+
+class TestBackfill:
+    """Test streaming, checkpointing and reporting"""
+
+    def test_jsonl(self, client, meter, tmp_path):
+        path = tmp_path / "usage.jsonl"
+        rows = [
+            {"customer_key": "cust_1", "event_id": f"evt_{n}", "event_name": "e", "amount": n}
+            for n in range(1, 8)
+        ]
+        rows.append({"customer_key": "cust_broken", "event_id": "evt_x", "event_name": "e"})
+        write_jsonl(path, rows)
+        with open(path, "a") as f:
+            f.write("{not json\n")
+        progress = []
+
+        stats = Backfill(
+            client.usages, str(path), batch_size=3, failures_path=str(tmp_path / "failures.jsonl"),
+            on_progress=lambda s: progress.append(s.line)
+        ).run()
+
+        assert (stats.sent, stats.failed, stats.invalid) == (7, 1, 1)
+        assert sorted(event["quantity"] for event in meter.events) == list(range(1, 8))
+        assert progress == [3, 6, 9]
+        failures = (tmp_path / "failures.jsonl").read_text().splitlines()
+        assert sorted(json.loads(line)["line"] for line in failures) == [8, 9]
+
+    def test_csv_resume_from_checkpoint(self, client, meter, tmp_path):
+        path = tmp_path / "usage.csv"
+        path.write_text("customer_key,event_id,feature_key,quantity\n" + "".join(
+            f"cust_1,evt_{n},seats,1\n" for n in range(10)
+        ))
+        checkpoint = str(tmp_path / "usage.ckpt")
+
+        class Interrupt(Exception):
+            pass
+
+        def interrupt(stats):
+            if stats.sent >= 4:
+                raise Interrupt()
+
+        def backfill(**kwargs):
+            return Backfill(
+                client.usages, str(path), checkpoint_path=checkpoint, batch_size=4, **kwargs
+            )
+
+        with pytest.raises(Interrupt):
+            backfill(on_progress=interrupt).run()
+        stats = backfill().run()
+
+        assert (stats.skipped, stats.sent) == (4, 6)
+        assert sorted(event["event_id"] for event in meter.events) == sorted(
+            f"evt_{n}" for n in range(10)
+        )
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires Unix sockets")
+    def test_events_not_handed_to_collector(self, mock_api_key, meter, tmp_path):
+        address = str(tmp_path / "usage.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.bind(address)
+        path = tmp_path / "usage.jsonl"
+        write_jsonl(path, [{"customer_key": "cust_1", "event_id": "evt_1", "event_name": "e"}])
+        try:
+            client = MetrifoxClient(
+                api_key=mock_api_key, transport=MockTransport(meter), usage_collector=address
+            )
+            stats = Backfill(client.usages, str(path)).run()
+        finally:
+            listener.close()
+
+        assert stats.sent == 1
+        assert [event["event_id"] for event in meter.events] == ["evt_1"]
@@ -0,0 +1,129 @@
+"""
+Tests for the base HTTP client
+"""
+
+import gzip
+import json
+
+import pytest
+import requests
+from metrifox_sdk.base import BaseClient
+from metrifox_sdk.exceptions import APIError
+from metrifox_sdk.serialization import JSONCodec, get_default_codec
+from metrifox_sdk.transport import MockTransport, RequestsTransport
+
+
+def make_response(status_code=200, body=b'{}'):
+    """Build a requests.Response with the given status and raw body"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    return response
+
+
+class TestJSONCodec:
+    """Test request body encoding and response decoding"""
+
+    def test_post_encodes_body_to_bytes(self, mock_base_client):
+        """Test that JSON bodies are sent as pre-encoded bytes"""
+        client, session = mock_base_client
+        session.request.return_value = make_response(body=b'{"message":"ok"}')
+
+        result = client.post("usage/events", json={"customer_key": "cust_1", "quantity": 2})
+
+        kwargs = session.request.call_args.kwargs
+        assert isinstance(kwargs["data"], bytes)
+        assert json.loads(kwargs["data"]) == {"customer_key": "cust_1", "quantity": 2}
+        assert "json" not in kwargs
+        assert result == {"message": "ok"}
+
+    def test_get_sends_no_body(self, mock_base_client):
+        """Test that requests without a JSON body send no data"""
+        client, session = mock_base_client
+        session.request.return_value = make_response(body=b'{"data":[]}')
+
+        assert client.get("customers") == {"data": []}
+        assert session.request.call_args.kwargs["data"] is None
+
+    def test_stdlib_codec(self, mock_api_key):
+        """Test the standard library codec round trip"""
+        codec = JSONCodec()
+        encoded = codec.dumps({"name": "Zoë", "amount": 1})
+        assert encoded == '{"name":"Zoë","amount":1}'.encode("utf-8")
+        assert codec.loads(encoded) == {"name": "Zoë", "amount": 1}
+
+        client = BaseClient(mock_api_key, "https://api.test.com", codec=codec)
+        assert client.codec is codec
+
+    def test_default_codec_prefers_orjson(self):
+        """Test that orjson is used when it is installed"""
+        pytest.importorskip("orjson")
+        assert get_default_codec().name == "orjson"
+
+    def test_invalid_json_response(self, mock_base_client):
+        """Test that undecodable responses raise APIError"""
+        client, session = mock_base_client
+        session.request.return_value = make_response(body=b'<html>')
+
+        with pytest.raises(APIError) as exc_info:
+            client.get("customers")
+        assert "Invalid JSON response" in str(exc_info.value)
+
+    def test_error_message_decoded_from_body(self, mock_base_client):
+        """Test that API error messages are extracted from the error body"""
+        client, session = mock_base_client
+        session.request.return_value = make_response(404, b'{"message":"Customer not found"}')
+
+        with pytest.raises(APIError) as exc_info:
+            client.get("customers/missing")
+        assert exc_info.value.status_code == 404
+        assert "Customer not found" in str(exc_info.value)
+
+
+class TestCompression:
+    """Test response encoding negotiation and request body compression"""
+
+    def test_accept_encoding_from_transport(self, mock_api_key):
+        """Test that the transport's decodable encodings are advertised"""
+        transport = MockTransport()
+        transport.accept_encoding = "gzip,deflate,br"
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        client.get("customers")
+
+        assert transport.requests[0].headers["Accept-Encoding"] == "gzip,deflate,br"
+
+    def test_requests_default_accept_encoding(self):
+        """Test that requests' own Accept-Encoding negotiation is kept"""
+        transport = RequestsTransport()
+        assert transport.accept_encoding is None
+        assert "gzip" in transport.session.headers["Accept-Encoding"]
+
+    def test_small_bodies_not_compressed(self, mock_api_key):
+        """Test that bodies under the threshold are sent as is"""
+        client = BaseClient(mock_api_key, "https://api.test.com", compression_threshold=1024)
+        url, headers, content = client._prepare_request("usage/events", {"customer_key": "c"}, None)
+        assert content == b'{"customer_key":"c"}'
+        assert "Content-Encoding" not in headers
+
+    def test_large_bodies_gzipped(self, mock_base_client):
+        """Test that bodies over the threshold are gzipped"""
+        client, session = mock_base_client
+        client.compression_threshold = 1024
+        session.request.return_value = make_response()
+        body = {"data": [{"customer_key": f"cust_{i}"} for i in range(200)]}
+
+        client.post("customers/bulk", json=body)
+
+        kwargs = session.request.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(kwargs["data"])) == body
+        assert "Content-Encoding" not in client.headers
+
+    def test_compression_disabled_by_default(self, mock_api_key):
+        """Test that compression is opt-in"""
+        client = BaseClient(mock_api_key, "https://api.test.com")
+        body = {"data": ["x" * 100] * 100}
+        _, headers, content = client._prepare_request("customers/bulk", body, None)
+        assert "Content-Encoding" not in headers
+        assert json.loads(content) == body
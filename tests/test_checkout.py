@@ -0,0 +1,69 @@
+"""
+Tests for the checkout module
+"""
+
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.serialization import JSONCodec
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+
+def checkout_handler(request):
+    if request.params["offering_key"] == "retired_plan":
+        return TransportResponse(404, {}, b'{"message":"Not found"}')
+    offering_key, interval = request.params["offering_key"], request.params.get("billing_interval")
+    url = f"https://app.test.com/checkout/{offering_key}/{interval}"
+    return TransportResponse(200, {}, JSONCodec().dumps({"data": {"checkout_url": url}}))
+
+
+class TestCheckoutCache:
+    """Test checkout URL caching and pre-generation"""
+
+    def test_cached_per_offering_interval_and_customer(self, mock_api_key):
+        transport = MockTransport(checkout_handler)
+        client = MetrifoxClient(
+            api_key=mock_api_key, transport=transport, checkout_url_cache_ttl=60
+        )
+
+        monthly = {"offering_key": "premium_plan", "billing_interval": "monthly"}
+        first = client.checkout.url(monthly)
+        second = client.checkout.url(dict(monthly))
+        client.checkout.url({"offering_key": "premium_plan", "billing_interval": "yearly"})
+
+        assert first == second == "https://app.test.com/checkout/premium_plan/monthly"
+        assert len(transport.requests) == 2
+
+    def test_cached_per_configuration(self, mock_api_key):
+        transport = MockTransport(checkout_handler)
+        client = MetrifoxClient(
+            api_key=mock_api_key, transport=transport, checkout_url_cache_ttl=60
+        )
+
+        client.checkout.url({"offering_key": "premium_plan", "success_url": "https://a.test/done"})
+        client.checkout.url({"offering_key": "premium_plan", "success_url": "https://b.test/done"})
+        client.checkout.url({"success_url": "https://b.test/done", "offering_key": "premium_plan"})
+
+        assert len(transport.requests) == 2
+        assert client.checkout._cache.max_size is not None
+
+    def test_not_cached_by_default(self, mock_api_key):
+        transport = MockTransport(checkout_handler)
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+        client.checkout.url({"offering_key": "premium_plan"})
+        client.checkout.url({"offering_key": "premium_plan"})
+        assert len(transport.requests) == 2
+
+    def test_pregenerate(self, mock_api_key):
+        transport = MockTransport(checkout_handler)
+        client = MetrifoxClient(
+            api_key=mock_api_key, transport=transport, checkout_url_cache_ttl=60
+        )
+
+        urls = client.checkout.pregenerate(
+            ["basic_plan", "premium_plan", "retired_plan"], billing_intervals=["monthly", "yearly"]
+        )
+
+        assert len(urls) == 4
+        assert urls[("basic_plan", "yearly")] == "https://app.test.com/checkout/basic_plan/yearly"
+        requests = len(transport.requests)
+        client.checkout.url({"offering_key": "basic_plan", "billing_interval": "yearly"})
+        assert len(transport.requests) == requests
@@ -0,0 +1,100 @@
+"""
+Tests for the metrifox command line
+"""
+
+import json
+
+import pytest
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.cli import main
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+CUSTOMERS = [
+    {"id": f"c{i}", "customer_key": f"cust_{i}", "metadata": {"tier": i}} for i in range(5)
+]
+
+
+class API:
+    """Mock API serving two pages of customers"""
+
+    def __init__(self):
+        self.created = []
+
+    def __call__(self, request):
+        if request.method == "POST" and request.url.endswith("customers/new"):
+            body = json.loads(request.content)
+            if body["customer_key"] == "cust_taken":
+                return TransportResponse(422, {}, b'{"message":"Customer already exists"}')
+            self.created.append((body, request.headers["Idempotency-Key"]))
+            return TransportResponse(201, {}, b'{"data":{}}')
+        if request.url.endswith("/customers"):
+            page, per_page = int(request.params["page"]), int(request.params["per_page"])
+            items = CUSTOMERS[(page - 1) * per_page:page * per_page]
+            return TransportResponse(200, {}, json.dumps({"data": items}).encode())
+        if request.url.endswith("cust_1/details"):
+            return TransportResponse(200, {}, b'{"data":{"subscriptions":[{"id":"sub_1"}]}}')
+        if request.url.endswith("sub_1/v2/entitlements-summary"):
+            return TransportResponse(200, {}, b'{"data":[{"feature_key":"seats","balance":2}]}')
+        return TransportResponse(404, {}, b'{"message":"Not found"}')
+
+
+@pytest.fixture
+def api():
+    return API()
+
+
+@pytest.fixture
+def run(mock_api_key, api):
+    def run(*argv):
+        return main(
+            ["--api-key", mock_api_key, *argv],
+            client_factory=lambda **options: MetrifoxClient(transport=MockTransport(api), **options)
+        )
+    return run
+
+
+class TestCLI:
+    """Test the metrifox subcommands"""
+
+    def test_customers_export_jsonl(self, run, capsys):
+        assert run("customers", "export", "--per-page", "2") == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line) for line in lines] == CUSTOMERS
+
+    def test_customers_export_csv(self, run, tmp_path):
+        output = tmp_path / "customers.csv"
+        args = ["--format", "csv", "--output", str(output), "--per-page", "2"]
+        assert run("customers", "export", *args) == 0
+        rows = output.read_text().splitlines()
+        assert rows[0] == "id,customer_key,metadata"
+        assert rows[1] == 'c0,cust_0,"{""tier"":0}"'
+        assert len(rows) == 6
+
+    def test_customers_import(self, run, api, tmp_path):
+        path = tmp_path / "customers.csv"
+        path.write_text("customer_key,primary_email\ncust_a,a@example.com\ncust_taken,\ncust_b,\n")
+
+        assert run("customers", "import", str(path)) == 1
+        created = sorted(api.created, key=lambda created: created[0]["customer_key"])
+        assert [customer for customer, _ in created] == [
+            {"customer_key": "cust_a", "primary_email": "a@example.com"},
+            {"customer_key": "cust_b"},
+        ]
+        assert created[0][1].startswith("customer-create-cust_a-")
+
+        # A corrected row is sent with a new key, an unchanged one with the same key
+        path.write_text("customer_key,primary_email\ncust_a,new@example.com\ncust_b,\n")
+        run("customers", "import", str(path))
+        keys = {key for _, key in api.created[-2:]}
+        assert created[0][1] not in keys and created[1][1] in keys
+
+    def test_entitlements_dump(self, run, capsys):
+        args = ["--customer-key", "cust_1", "--customer-key", "cust_missing"]
+        assert run("entitlements", "dump", *args) == 1
+        first, second = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        entitlements = [{"feature_key": "seats", "balance": 2}]
+        assert first == {
+            "customer_key": "cust_1",
+            "subscriptions": [{"subscription_id": "sub_1", "entitlements": entitlements}],
+        }
+        assert second["customer_key"] == "cust_missing" and "error" in second
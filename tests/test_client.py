@@ -4,8 +4,11 @@ Tests for the main Metrifox client
 
 import pytest
 import os
-from metrifox_sdk import MetrifoxClient, init
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrifox_sdk import MetrifoxClient, init, shared_client
 from metrifox_sdk.exceptions import ConfigurationError
+from metrifox_sdk.priority import Priority
 
 
 class TestMetrifoxClient:
@@ -58,3 +61,61 @@ class TestMetrifoxClient:
         monkeypatch.setenv("METRIFOX_API_KEY", "env_key")
         client = init()
         assert client.api_key == "env_key"
+
+
+class TestLazyConstruction:
+    """Test lazy construction and thread safety of the client"""
+
+    def test_nothing_built_until_used(self, mock_api_key):
+        """Test that HTTP clients and modules are built on first access"""
+        client = MetrifoxClient(api_key=mock_api_key)
+        assert client._main_client_instance is None
+        assert client._meter_client_instance is None
+
+        client.checkout
+        assert client._main_client_instance is not None
+        assert client._meter_client_instance is None
+
+    def test_concurrent_access_builds_once(self, mock_api_key):
+        """Test that concurrent first access builds each module once"""
+        client = MetrifoxClient(api_key=mock_api_key)
+        barrier = threading.Barrier(8)
+
+        def access():
+            barrier.wait()
+            return client.usages
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            modules = list(executor.map(lambda _: access(), range(8)))
+
+        assert all(module is modules[0] for module in modules)
+
+    def test_close_before_use(self, mock_api_key):
+        """Test that closing an unused client builds nothing"""
+        client = MetrifoxClient(api_key=mock_api_key)
+        client.close()
+        assert client._main_client_instance is None
+
+
+class TestSharedClient:
+    """Test the process-wide shared client accessor"""
+
+    def test_same_config_same_client(self):
+        """Test that the same configuration returns the same client"""
+        assert shared_client({"api_key": "key_a"}) is shared_client({"api_key": "key_a"})
+        assert shared_client({"api_key": "key_a"}) is not shared_client({"api_key": "key_b"})
+
+    def test_mapping_valued_option(self):
+        """Test that configurations holding mappings and lists can be keyed"""
+        config = {"api_key": "key_a", "priority_lanes": {Priority.BULK: 0.3}}
+        assert shared_client(config) is shared_client(dict(config))
+        assert shared_client(config) is not shared_client({**config, "priority_lanes": True})
+
+    def test_env_api_key(self, monkeypatch):
+        """Test that the environment API key is part of the key"""
+        monkeypatch.setenv("METRIFOX_API_KEY", "env_key_1")
+        first = shared_client()
+        monkeypatch.setenv("METRIFOX_API_KEY", "env_key_2")
+        second = shared_client()
+        assert first is not second
+        assert second.api_key == "env_key_2"
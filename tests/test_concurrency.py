@@ -0,0 +1,129 @@
+"""
+Tests for bounded concurrency helpers
+"""
+
+import threading
+import time
+
+import pytest
+from metrifox_sdk import MetrifoxClient, concurrency
+from metrifox_sdk.concurrency import BoundedExecutor, gather
+from metrifox_sdk.exceptions import APIError, QueueFullError
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+
+class TestGather:
+    """Test concurrent fan-out"""
+
+    def test_preserves_order_and_bounds_concurrency(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def work(n):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.005)
+            with lock:
+                state['running'] -= 1
+            return n * 2
+
+        assert gather(work, range(20), max_workers=3) == [n * 2 for n in range(20)]
+        assert state['peak'] <= 3
+
+    def test_exceptions(self):
+        def work(n):
+            if n == 2:
+                raise APIError("failed", status_code=500)
+            return n
+
+        results = gather(work, range(4), return_exceptions=True)
+        assert results[:2] == [0, 1] and isinstance(results[2], APIError)
+        with pytest.raises(APIError):
+            gather(work, range(4))
+
+
+class TestBoundedExecutor:
+    """Test the bounded thread pool behind the *_async methods"""
+
+    def test_queue_limit(self):
+        release = threading.Event()
+        executor = BoundedExecutor(max_workers=1, max_queue=1, block=False)
+        running = executor.submit(release.wait)
+        queued = executor.submit(lambda: "done")
+
+        with pytest.raises(QueueFullError):
+            executor.submit(lambda: None)
+
+        release.set()
+        assert queued.result(timeout=5) == "done"
+        assert running.result(timeout=5) is True
+        executor.submit(lambda: None).result(timeout=5)
+        executor.shutdown()
+
+    def test_submit_from_worker_does_not_block(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=0)
+
+        def nested():
+            with pytest.raises(QueueFullError):
+                executor.submit(lambda: None)
+            return "done"
+
+        assert executor.submit(nested).result(timeout=5) == "done"
+        executor.shutdown()
+
+    def test_client_executor_block_option(self, mock_api_key):
+        client = MetrifoxClient(api_key=mock_api_key, executor_max_queue=0, executor_block=False)
+        assert client.executor.block is False
+        client.close()
+
+    def test_shutdown(self):
+        executor = BoundedExecutor()
+        executor.shutdown()
+        with pytest.raises(RuntimeError):
+            executor.submit(lambda: None)
+
+    @pytest.mark.parametrize("cancels_futures", [True, False])
+    def test_close_cancels_pending(self, mock_api_key, monkeypatch, cancels_futures):
+        # False takes the Python 3.8 path, whose shutdown has no cancel_futures
+        monkeypatch.setattr(concurrency, "_SHUTDOWN_CANCELS_FUTURES", cancels_futures)
+        started, release = threading.Event(), threading.Event()
+
+        def handler(request):
+            started.set()
+            release.wait(5)
+            return TransportResponse(200, {}, b'{"data":{"can_access":true}}')
+
+        client = MetrifoxClient(
+            api_key=mock_api_key, transport=MockTransport(handler), executor_max_workers=1
+        )
+        request = {"feature_key": "f", "customer_key": "cust_1"}
+        running = client.usages.check_access_async(request)
+        queued = client.usages.check_access_async(request)
+        assert started.wait(5)
+
+        client.close(wait=False, cancel_pending=True)
+        release.set()
+
+        assert queued.cancelled()
+        assert running.result(timeout=5)["data"]["can_access"] is True
+
+    def test_module_future_variants(self, mock_api_key):
+        transport = MockTransport(
+            lambda request: TransportResponse(200, {}, b'{"data":{"can_access":true}}')
+        )
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport, executor_max_workers=4)
+
+        futures = [
+            client.usages.check_access_async(
+                {"feature_key": "f", "customer_key": f"cust_{n}"}, typed=True
+            )
+            for n in range(10)
+        ]
+
+        assert all(future.result(timeout=5).data.can_access for future in futures)
+        assert len(transport.requests) == 10
+        assert client.usages.check_access_async.__name__ == "check_access_async"
+        client.close()
+        with pytest.raises(RuntimeError):
+            client.checkout.url_async({"offering_key": "premium_plan"})
@@ -0,0 +1,152 @@
+"""
+Tests for connection warmup and DNS caching
+"""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.cache import TTLCache
+from metrifox_sdk.dns import DNSCache
+from metrifox_sdk.exceptions import TransportError
+from metrifox_sdk.transport import MockTransport, RequestsTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"data":{}}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestTTLCache:
+    """Test the expiring cache"""
+
+    def test_entries_expire(self):
+        now = [0.0]
+        cache = TTLCache(10, clock=lambda: now[0])
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+        now[0] = 10.0
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_max_size_evicts_oldest(self):
+        cache = TTLCache(10, max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        assert cache.get('a') is None
+        assert cache.get('c') == 3
+
+
+class TestDNSCache:
+    """Test host address caching"""
+
+    def test_resolves_once(self, monkeypatch):
+        calls = []
+
+        def getaddrinfo(host, port, *args):
+            calls.append(host)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', port))]
+
+        monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+        cache = DNSCache(ttl=60)
+        assert cache.resolve('api.test.com', 443) == '10.0.0.1'
+        assert cache.resolve('api.test.com', 443) == '10.0.0.1'
+        assert calls == ['api.test.com']
+
+        cache.invalidate('api.test.com', 443)
+        cache.resolve('api.test.com', 443)
+        assert len(calls) == 2
+
+    def test_ip_literal_not_cached(self):
+        assert DNSCache().resolve('127.0.0.1', 80) is None
+
+    def test_requests_transport_uses_cache(self, http_server, monkeypatch):
+        """Test that new connections reuse the cached address"""
+        real_getaddrinfo = socket.getaddrinfo
+        lookups = []
+
+        def getaddrinfo(host, *args, **kwargs):
+            lookups.append(host)
+            return real_getaddrinfo(host, *args, **kwargs)
+
+        monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+        transport = RequestsTransport(dns_cache=DNSCache())
+        port = http_server.server_address[1]
+        for _ in range(2):
+            response = transport.send('GET', f'http://localhost:{port}/', timeout=5)
+            assert response.status_code == 200
+            # Force a new connection for the next request
+            transport.session.close()
+
+        assert lookups.count('localhost') == 1
+
+
+class TestWarmup:
+    """Test pre-establishing connections"""
+
+    def test_warms_up_both_hosts(self, mock_api_key):
+        transport = MockTransport()
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        client.warmup(connections=2)
+
+        urls = sorted(request.url for request in transport.requests)
+        assert [request.method for request in transport.requests] == ['HEAD'] * 4
+        assert urls == sorted([client.base_url, client.meter_service_base_url] * 2)
+
+    def test_errors_ignored(self, mock_api_key):
+        def handler(request):
+            raise TransportError("connection refused")
+
+        client = MetrifoxClient(api_key=mock_api_key, transport=MockTransport(handler))
+        client.warmup()
+
+    def test_background_warmup(self, mock_api_key):
+        transport = MockTransport()
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+        thread = client.warmup(background=True)
+        thread.join()
+        assert len(transport.requests) == 2
+
+    def test_opens_pooled_connection(self, http_server, mock_api_key):
+        port = http_server.server_address[1]
+        client = MetrifoxClient(
+            api_key=mock_api_key,
+            base_url=f'http://localhost:{port}/api/v1/',
+            dns_cache_ttl=60
+        )
+        client._main_client.warmup()
+
+        transport = client._main_client.transport
+        assert isinstance(transport, RequestsTransport)
+        assert transport.dns_cache is client._dns_cache
+        pools = transport.session.get_adapter('http://').poolmanager.pools
+        assert [pools[key].num_connections for key in pools.keys()] == [1]
+        client.close()
@@ -0,0 +1,57 @@
+"""
+Tests for fork safety
+"""
+
+import os
+
+import pytest
+from unittest.mock import MagicMock
+from metrifox_sdk import MetrifoxClient, fork
+from metrifox_sdk.transport import RequestsTransport
+
+
+class TestForkSafety:
+    """Test that per-process resources are rebuilt after a fork"""
+
+    def test_owned_session_replaced(self):
+        """Test that the default session is replaced in the child"""
+        transport = RequestsTransport()
+        session = transport.session
+
+        fork._run_after_fork_hooks()
+
+        assert transport.session is not session
+
+    def test_caller_session_pools_cleared(self):
+        """Test that a caller's session is kept but its pools are emptied"""
+        session = MagicMock()
+        adapter = MagicMock()
+        session.adapters = {"https://": adapter}
+        transport = RequestsTransport(session)
+
+        fork._run_after_fork_hooks()
+
+        assert transport.session is session
+        adapter.close.assert_called_once()
+
+    def test_registry_is_weak(self):
+        """Test that registration does not keep transports alive"""
+        transport = RequestsTransport()
+        count = len(fork._registry)
+        del transport
+        assert len(fork._registry) == count - 1
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_real_fork(self, mock_api_key):
+        """Test that a client created before fork gets new sessions in the child"""
+        client = MetrifoxClient(api_key=mock_api_key)
+        parent_session = client._main_client.transport.session
+
+        pid = os.fork()
+        if pid == 0:
+            fresh = client._main_client.transport.session is not parent_session
+            os._exit(0 if fresh else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        assert client._main_client.transport.session is parent_session
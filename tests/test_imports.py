@@ -0,0 +1,43 @@
+"""
+Tests for import-time cost
+"""
+
+import subprocess
+import sys
+
+import metrifox_sdk
+
+
+def loaded_modules(code):
+    """Run code in a fresh interpreter and return the modules it imported"""
+    script = f"import sys\n{code}\nprint('\\n'.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return set(output.stdout.split())
+
+
+class TestLazyImports:
+    """Test that importing the SDK defers heavy imports"""
+
+    def test_import_does_not_load_http_stack(self):
+        """Test that import metrifox_sdk does not import requests"""
+        modules = loaded_modules("import metrifox_sdk")
+        assert "requests" not in modules
+        assert "urllib3" not in modules
+        assert "metrifox_sdk.base" not in modules
+
+    def test_client_construction_does_not_load_http_stack(self):
+        """Test that requests is only imported when the first request is made"""
+        modules = loaded_modules(
+            "from metrifox_sdk import MetrifoxClient\n"
+            "client = MetrifoxClient(api_key='test')\n"
+            "client.usages"
+        )
+        assert "requests" not in modules
+
+    def test_public_names_resolve(self):
+        """Test that every name in __all__ can be imported"""
+        for name in metrifox_sdk.__all__:
+            assert getattr(metrifox_sdk, name) is not None
+        assert set(metrifox_sdk.__all__) <= set(dir(metrifox_sdk))
@@ -0,0 +1,108 @@
+"""
+Tests for adaptive concurrency limits
+"""
+
+import threading
+import time
+
+import pytest
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.concurrency import gather
+from metrifox_sdk.limits import AdaptiveLimiter, AIMDLimit, GradientLimit
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+
+class TestAIMDLimit:
+    """Test additive increase, multiplicative decrease"""
+
+    def test_grows_while_used_and_backs_off_on_drops(self):
+        limit = AIMDLimit(initial=10, max_limit=20)
+        limit.on_sample(0.01, inflight=2, dropped=False)
+        assert limit.limit == 10  # mostly idle: the limit is not being tested
+        for _ in range(30):
+            limit.on_sample(0.01, inflight=10, dropped=False)
+        assert limit.limit == 20
+
+        limit.on_sample(0.01, inflight=20, dropped=True)
+        assert limit.limit == 18
+
+    def test_latency_threshold(self):
+        limit = AIMDLimit(initial=10, latency_threshold=1.0)
+        limit.on_sample(2.0, inflight=10, dropped=False)
+        assert limit.limit == 9
+
+
+class TestGradientLimit:
+    """Test the latency gradient"""
+
+    def test_grows_at_steady_latency_and_shrinks_when_queueing(self):
+        limit = GradientLimit(initial=10, max_limit=50)
+        for _ in range(50):
+            limit.on_sample(0.1, inflight=limit.limit, dropped=False)
+        grown = limit.limit
+        assert grown > 10
+
+        for _ in range(50):
+            limit.on_sample(1.0, inflight=limit.limit, dropped=False)
+        assert limit.limit < grown
+
+    def test_zero_latency(self):
+        limit = GradientLimit(initial=2)
+        for _ in range(5):
+            limit.on_sample(0.0, inflight=2, dropped=False)
+        assert limit.limit >= 2
+
+
+class TestAdaptiveLimiter:
+    """Test the limiter in front of a client"""
+
+    def test_blocks_beyond_the_limit(self):
+        limiter = AdaptiveLimiter(AIMDLimit(initial=1))
+        limiter.acquire()
+        with pytest.raises(TimeoutError):
+            limiter.acquire(timeout=0.01)
+        limiter.release(0.01)
+        assert limiter.acquire(timeout=0.01) == 1
+
+    def test_release_frees_slot_when_algorithm_fails(self):
+        class BrokenLimit(AIMDLimit):
+            def on_sample(self, latency, inflight, dropped):
+                raise RuntimeError("boom")
+
+        limiter = AdaptiveLimiter(BrokenLimit(initial=1))
+        limiter.acquire()
+        with pytest.raises(RuntimeError):
+            limiter.release(0.01)
+        assert limiter.inflight == 0
+        assert limiter.acquire(timeout=0.01) == 1
+
+    def test_client_backs_off_when_shed(self, mock_api_key):
+        lock = threading.Lock()
+        state = {"inflight": 0, "peak": 0}
+
+        def handler(request):
+            with lock:
+                state["inflight"] += 1
+                state["peak"] = max(state["peak"], state["inflight"])
+            time.sleep(0.005)
+            with lock:
+                state["inflight"] -= 1
+            return TransportResponse(429, {}, b'{"message":"Too many requests"}')
+
+        client = MetrifoxClient(
+            api_key=mock_api_key,
+            transport=MockTransport(handler),
+            adaptive_concurrency=lambda: AIMDLimit(initial=8, max_limit=8)
+        )
+        gather(
+            lambda i: client.customers.get(f"cust_{i}"),
+            range(40),
+            max_workers=16,
+            return_exceptions=True,
+        )
+
+        limiter = client.limiters["api"]
+        assert state["peak"] <= 8
+        assert limiter.inflight == 0
+        assert limiter.limit == 1
+        assert "meter" not in client.limiters
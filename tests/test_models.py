@@ -0,0 +1,134 @@
+"""
+Tests for typed response models
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.exceptions import APIError
+from metrifox_sdk.transport import MockTransport, TransportResponse
+from metrifox_sdk.models import (
+    AccessCheck,
+    Customer,
+    CustomerDetails,
+    ModelList,
+    Response,
+    to_response,
+)
+from metrifox_sdk.usages import UsagesModule
+from metrifox_sdk.customers import CustomersModule
+
+
+ACCESS_PAYLOAD = {
+    "data": {
+        "customer_key": "cust_1",
+        "feature_key": "premium_feature",
+        "can_access": True,
+        "balance": 42
+    },
+    "message": "Access granted"
+}
+
+
+class TestModels:
+    """Test lazy model wrapping"""
+
+    def test_scalar_fields(self):
+        """Test that fields read from the underlying payload"""
+        response = to_response(ACCESS_PAYLOAD, AccessCheck)
+        assert isinstance(response.data, AccessCheck)
+        assert response.data.can_access is True
+        assert response.data.balance == 42
+        assert response.data.wallet_balance is None
+        assert response.message == "Access granted"
+        assert response.to_dict() is ACCESS_PAYLOAD
+
+    def test_nested_fields_wrapped_once(self):
+        """Test that nested payloads are wrapped on first access and cached"""
+        details = CustomerDetails({"customer_key": "cust_1", "subscriptions": [{"id": "sub_1"}]})
+        assert details._cache is None
+
+        subscriptions = details.subscriptions
+        assert isinstance(subscriptions, ModelList)
+        assert subscriptions[0].id == "sub_1"
+        assert details.subscriptions is subscriptions
+        assert subscriptions[0] is subscriptions[0]
+
+    def test_list_data(self):
+        """Test that list payloads become model lists"""
+        response = Response({"data": [{"customer_key": "a"}, {"customer_key": "b"}]}, Customer)
+        assert len(response.data) == 2
+        assert [c.customer_key for c in response.data] == ["a", "b"]
+        assert response.data.to_list()[0] == {"customer_key": "a"}
+
+    def test_raw_access(self):
+        """Test dict-style access to keys without typed fields"""
+        customer = Customer({"customer_key": "cust_1", "custom_field": 1})
+        assert customer["custom_field"] == 1
+        assert customer.get("missing", "default") == "default"
+        assert "custom_field" in customer
+
+    def test_slotted(self):
+        """Test that models carry no per-instance __dict__"""
+        assert not hasattr(AccessCheck({}), "__dict__")
+        assert not hasattr(to_response({}, AccessCheck), "__dict__")
+
+
+class TestTypedModuleMethods:
+    """Test the typed option on module methods"""
+
+    def test_check_access_typed(self):
+        """Test that typed=True returns a Response wrapping AccessCheck"""
+        meter_client = MagicMock()
+        meter_client.get.return_value = ACCESS_PAYLOAD
+        usages = UsagesModule(MagicMock(), meter_client)
+
+        assert usages.check_access({"feature_key": "f", "customer_key": "c"}) is ACCESS_PAYLOAD
+        access = usages.check_access({"feature_key": "f", "customer_key": "c"}, typed=True)
+        assert access.data.can_access is True
+
+    def test_customers_list_typed(self):
+        """Test that customer lists are wrapped lazily"""
+        client = MagicMock()
+        client.get.return_value = {"data": [{"customer_key": "cust_1"}], "meta": {"page": 1}}
+        customers = CustomersModule(client)
+
+        page = customers.list(typed=True)
+        assert page.meta == {"page": 1}
+        assert page.data[0].customer_key == "cust_1"
+
+
+class TestRawResponses:
+    """Test the raw option on module methods"""
+
+    BODY = b'{"data":[{"customer_key":"cust_1"}]}'
+
+    def make_client(self, mock_api_key, status=200):
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "Content-Encoding": "gzip",
+            "Content-Length": "999",
+            "X-Request-Id": "req_1",
+        }
+        transport = MockTransport(lambda request: TransportResponse(status, headers, self.BODY))
+        return MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+    def test_body_passed_through_undecoded(self, mock_api_key):
+        raw = self.make_client(mock_api_key).customers.list({"page": 1}, typed=True, raw=True)
+
+        assert raw.status_code == 200
+        assert raw.content is self.BODY
+        assert raw.content_type == "application/json; charset=utf-8"
+        # The transport already decoded the body, so its encoding headers no longer apply
+        assert raw.headers == {
+            "Content-Type": "application/json; charset=utf-8",
+            "X-Request-Id": "req_1",
+        }
+
+    def test_errors_still_raise(self, mock_api_key):
+        with pytest.raises(APIError) as excinfo:
+            self.make_client(mock_api_key, status=404).subscriptions.get_entitlements_summary(
+                "sub_1", raw=True
+            )
+        assert excinfo.value.status_code == 404
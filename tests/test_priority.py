@@ -0,0 +1,95 @@
+"""
+Tests for request priorities
+"""
+
+import threading
+import time
+
+import pytest
+from metrifox_sdk import MetrifoxClient, Priority, request_priority
+from metrifox_sdk.concurrency import gather
+from metrifox_sdk.limits import DEFAULT_SHARES, AdaptiveLimiter, FixedLimit
+from metrifox_sdk.priority import current_priority, default_priority
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 2
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestPriorityContext:
+    """Test how the current priority is chosen and handed on"""
+
+    def test_explicit_priority_wins_over_defaults(self):
+        assert current_priority() is Priority.NORMAL
+        with request_priority(Priority.INTERACTIVE):
+            with default_priority(Priority.BULK):
+                assert current_priority() is Priority.INTERACTIVE
+        with default_priority(Priority.BULK):
+            assert current_priority() is Priority.BULK
+
+    def test_worker_threads_inherit_priority(self):
+        with request_priority(Priority.BULK):
+            priorities = gather(lambda _: current_priority(), range(4), max_workers=2)
+        assert priorities == [Priority.BULK] * 4
+
+
+class TestPriorityLanes:
+    """Test admission by priority"""
+
+    def test_waiting_interactive_request_goes_first(self):
+        limiter = AdaptiveLimiter(FixedLimit(1))
+        limiter.acquire()
+        admitted = []
+
+        def request(priority):
+            limiter.acquire(priority=priority)
+            admitted.append(priority)
+            limiter.release(0.01)
+
+        threads = []
+        for priority in (Priority.BULK, Priority.INTERACTIVE):
+            thread = threading.Thread(target=request, args=(priority,))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: limiter._waiting[priority] == 1)
+        limiter.release(0.01)
+        for thread in threads:
+            thread.join()
+
+        assert admitted == [Priority.INTERACTIVE, Priority.BULK]
+
+    def test_bulk_keeps_headroom_free(self):
+        limiter = AdaptiveLimiter(FixedLimit(4), shares=DEFAULT_SHARES)
+        limiter.acquire(priority=Priority.BULK)
+        limiter.acquire(priority=Priority.BULK)
+
+        with pytest.raises(TimeoutError):
+            limiter.acquire(timeout=0.01, priority=Priority.BULK)
+        limiter.acquire(timeout=0.01, priority=Priority.INTERACTIVE)
+
+    def test_client_requests_carry_priorities(self, mock_api_key):
+        seen = []
+
+        def handler(request):
+            seen.append((request.url.rsplit("/", 1)[-1], current_priority()))
+            return TransportResponse(200, {}, b'{"data":{"checkout_url":"https://checkout"}}')
+
+        client = MetrifoxClient(
+            api_key=mock_api_key,
+            transport=MockTransport(handler),
+            priority_lanes=True,
+            max_in_flight=4,
+        )
+        client.usages.check_access({"customer_key": "cust_1", "feature_key": "seats"})
+        client.checkout.pregenerate(["basic", "premium"])
+        with request_priority(Priority.NORMAL):
+            client.usages.check_access({"customer_key": "cust_1", "feature_key": "seats"})
+
+        assert seen[0] == ("access", Priority.INTERACTIVE)
+        assert seen[1:3] == [("generate-checkout-url", Priority.BULK)] * 2
+        assert seen[3] == ("access", Priority.NORMAL)
+        assert client.limiters["api"].capacity(Priority.BULK) == 2
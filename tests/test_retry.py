@@ -0,0 +1,129 @@
+"""
+Tests for retries and idempotency keys
+"""
+
+import asyncio
+
+import pytest
+from metrifox_sdk import MetrifoxClient, RetryPolicy
+from metrifox_sdk.base import AsyncBaseClient, BaseClient
+from metrifox_sdk.exceptions import APIError, TransportError
+from metrifox_sdk.transport import AsyncMockTransport, MockTransport, TransportResponse
+
+
+def flaky(failures, status_code=None):
+    """Handler failing ``failures`` times (with a status or no response) before succeeding"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) <= failures:
+            if status_code is None:
+                raise TransportError("read timed out")
+            return TransportResponse(status_code, {'Retry-After': '0'}, b'{}')
+        return TransportResponse(200, {}, b'{"data":{}}')
+
+    return handler
+
+
+NO_WAIT = RetryPolicy(max_retries=3, backoff_factor=0)
+
+
+class TestIdempotencyKeys:
+    """Test idempotency headers on mutating requests"""
+
+    def test_generated_for_post_and_patch_only(self, mock_api_key):
+        transport = MockTransport()
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        client.post("customers/new", json={})
+        client.post("customers/new", json={})
+        client.patch("customers/c", json={})
+        client.get("customers")
+
+        keys = [request.headers.get("Idempotency-Key") for request in transport.requests]
+        assert all(keys[:3]) and len(set(keys[:3])) == 3
+        assert keys[3] is None
+        assert "Idempotency-Key" not in client.headers
+
+    def test_usage_key_derived_from_event_id(self, mock_api_key):
+        transport = MockTransport()
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        client.usages.record_usage({"customer_key": "c", "event_name": "e", "event_id": "evt_1"})
+
+        assert transport.requests[0].headers["Idempotency-Key"] == "usage-evt_1"
+
+    def test_caller_supplied_key(self, mock_api_key, sample_customer_data):
+        transport = MockTransport()
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        client.customers.create(sample_customer_data, idempotency_key="create-cust_test_123")
+
+        assert transport.requests[0].headers["Idempotency-Key"] == "create-cust_test_123"
+
+
+class TestRetries:
+    """Test retrying failed requests"""
+
+    def test_not_retried_by_default(self, mock_api_key):
+        transport = MockTransport(flaky(1))
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=transport)
+        with pytest.raises(TransportError):
+            client.post("usage/events", json={})
+        assert len(transport.requests) == 1
+
+    def test_retries_reuse_key(self, mock_api_key):
+        transport = MockTransport(flaky(2))
+        client = BaseClient(
+            mock_api_key, "https://api.test.com", transport=transport, retry_policy=NO_WAIT
+        )
+
+        assert client.post("usage/events", json={"event_id": "evt_1"}) == {"data": {}}
+        keys = {request.headers["Idempotency-Key"] for request in transport.requests}
+        assert len(transport.requests) == 3
+        assert len(keys) == 1
+
+    def test_retryable_status(self, mock_api_key):
+        transport = MockTransport(flaky(1, status_code=503))
+        client = BaseClient(
+            mock_api_key, "https://api.test.com", transport=transport, retry_policy=NO_WAIT
+        )
+        client.get("customers")
+        assert len(transport.requests) == 2
+
+    def test_client_errors_not_retried(self, mock_api_key):
+        transport = MockTransport(flaky(5, status_code=422))
+        client = BaseClient(
+            mock_api_key, "https://api.test.com", transport=transport, retry_policy=NO_WAIT
+        )
+        with pytest.raises(APIError) as exc_info:
+            client.post("customers/new", json={})
+        assert exc_info.value.status_code == 422
+        assert len(transport.requests) == 1
+
+    def test_gives_up_after_max_retries(self, mock_api_key):
+        transport = MockTransport(flaky(10, status_code=500))
+        client = BaseClient(
+            mock_api_key, "https://api.test.com", transport=transport, retry_policy=NO_WAIT
+        )
+        with pytest.raises(APIError) as exc_info:
+            client.get("customers")
+        assert exc_info.value.status_code == 500
+        assert len(transport.requests) == 4
+
+    def test_async_retries(self, mock_api_key):
+        transport = AsyncMockTransport(flaky(1))
+        client = AsyncBaseClient(
+            mock_api_key, "https://api.test.com", transport=transport, retry_policy=NO_WAIT
+        )
+        asyncio.run(client.post("usage/events", json={}))
+        requests = transport.requests
+        assert len(requests) == 2
+        assert requests[0].headers["Idempotency-Key"] == requests[1].headers["Idempotency-Key"]
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_backoff=30)
+        assert policy.delay(0, {"Retry-After": "7"}) == 7
+        assert policy.delay(0, {"Retry-After": "120"}) == 30
+        assert 0 <= policy.delay(2) <= 1.0
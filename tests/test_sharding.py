@@ -0,0 +1,122 @@
+"""
+Tests for routing customers across shards
+"""
+
+import json
+
+import pytest
+from metrifox_sdk import MetrifoxClient, ShardedMetrifoxClient
+from metrifox_sdk.exceptions import APIError, ConfigurationError
+from metrifox_sdk.sharding import HashRing
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+
+class API:
+    """Mock API recording which API key each customer was created with"""
+
+    def __init__(self):
+        self.created = {}
+
+    def __call__(self, request):
+        api_key = request.headers["x-api-key"]
+        if request.url.endswith("customers/new"):
+            customer_key = json.loads(request.content)["customer_key"]
+            if customer_key == "cust_bad":
+                return TransportResponse(422, {}, b'{"message":"Invalid customer"}')
+            self.created[customer_key] = api_key
+            return TransportResponse(
+                201, {}, json.dumps({"data": {"customer_key": customer_key}}).encode()
+            )
+        if request.url.endswith("/customers"):
+            page = int(request.params["page"])
+            items = [{"customer_key": f"{api_key}_{i}"} for i in range(3)] if page == 1 else []
+            return TransportResponse(200, {}, json.dumps({"data": items}).encode())
+        return TransportResponse(404, {}, b'{}')
+
+
+@pytest.fixture
+def api():
+    return API()
+
+
+@pytest.fixture
+def sharded(api):
+    transport = MockTransport(api)
+    return ShardedMetrifoxClient(
+        {
+            "eu": {"api_key": "key_eu", "transport": transport},
+            "us": {"api_key": "key_us", "transport": transport},
+        },
+        routes={"cust_acme": "eu"},
+    )
+
+
+class TestHashRing:
+    """Test consistent hashing"""
+
+    def test_keys_spread_over_shards(self):
+        ring = HashRing(["a", "b", "c"])
+        counts = {"a": 0, "b": 0, "c": 0}
+        for i in range(3000):
+            counts[ring.get(f"cust_{i}")] += 1
+        assert all(count > 600 for count in counts.values())
+
+    def test_removing_a_shard_only_moves_its_keys(self):
+        before, after = HashRing(["a", "b", "c"]), HashRing(["a", "b"])
+        for i in range(1000):
+            key = f"cust_{i}"
+            if before.get(key) != "c":
+                assert after.get(key) == before.get(key)
+
+
+class TestShardedMetrifoxClient:
+    """Test routing and fan-out"""
+
+    def test_lookup_table_takes_precedence(self, sharded):
+        assert sharded.shard_for("cust_acme") == "eu"
+        assert sharded.shard_for("cust_other") == HashRing(["eu", "us"]).get("cust_other")
+
+    def test_unknown_shard_in_routes(self):
+        with pytest.raises(ConfigurationError):
+            ShardedMetrifoxClient({"eu": {"api_key": "k"}}, routes={"cust_1": "us"})
+
+    def test_shards_on_one_host_share_a_transport(self):
+        sharded = ShardedMetrifoxClient({
+            "a": {"api_key": "key_a"},
+            "b": {"api_key": "key_b"},
+            "c": {"api_key": "key_c", "base_url": "https://eu.example.com/api/v1/"},
+            "d": MetrifoxClient(api_key="key_d"),
+        })
+        transports = {
+            name: client._main_client.transport for name, client in sharded.clients.items()
+        }
+
+        assert transports["a"] is transports["b"]
+        assert transports["c"] is not transports["a"]
+        assert sharded.clients["b"]._meter_client.transport is transports["a"]
+        assert sharded.clients["b"]._main_client.headers["x-api-key"] == "key_b"
+
+    def test_create_many(self, sharded, api):
+        keys = ("cust_acme", "cust_bad", *[f"cust_{i}" for i in range(20)])
+        customers = [{"customer_key": key} for key in keys]
+
+        results = sharded.create_many(customers, max_workers=4)
+
+        assert results[0]["data"]["customer_key"] == "cust_acme"
+        assert isinstance(results[1], APIError)
+        assert api.created["cust_acme"] == "key_eu"
+        for i in range(20):
+            assert api.created[f"cust_{i}"] == f"key_{sharded.shard_for(f'cust_{i}')}"
+        assert set(api.created.values()) == {"key_eu", "key_us"}
+
+    def test_iter_customers(self, sharded):
+        customers = {
+            (shard, customer["customer_key"]) for shard, customer in sharded.iter_customers()
+        }
+        assert customers == {
+            (shard, f"key_{shard}_{i}") for shard in ("eu", "us") for i in range(3)
+        }
+
+    def test_request_without_customer_key(self, sharded):
+        with pytest.raises(ValueError):
+            sharded.record_usage({"event_name": "api_call"})
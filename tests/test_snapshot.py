@@ -0,0 +1,248 @@
+"""
+Tests for offline mode
+"""
+
+import pytest
+from metrifox_sdk import EntitlementSnapshot, MetrifoxClient, SnapshotRefresher, UsageReplayQueue
+from metrifox_sdk.exceptions import APIError, TransportError
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+ACCESS = {"customer_key": "cust_1", "feature_key": "seats", "can_access": True, "balance": 3}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Service:
+    """Mock meter service that can be taken down"""
+
+    def __init__(self):
+        self.up = True
+        self.events = []
+
+    def __call__(self, request):
+        if not self.up:
+            raise TransportError("connection refused")
+        if request.url.endswith("usage/access"):
+            return TransportResponse(
+                200,
+                {},
+                b'{"data":{"customer_key":"cust_1","feature_key":"seats",'
+                b'"can_access":true,"balance":3}}',
+            )
+        if request.url.endswith("usage/events"):
+            self.events.append(request.headers["Idempotency-Key"])
+            return TransportResponse(201, {}, b'{"message":"ok"}')
+        if request.url.endswith("cust_1/details"):
+            return TransportResponse(200, {}, b'{"data":{"subscriptions":[{"id":"sub_1"}]}}')
+        if request.url.endswith("sub_1/v2/entitlements-summary"):
+            return TransportResponse(
+                200,
+                {},
+                b'{"data":[{"feature_key":"api_calls","unlimited":true},'
+                b'{"feature_key":"seats","balance":0}]}',
+            )
+        return TransportResponse(404, {}, b'{}')
+
+
+@pytest.fixture
+def service():
+    return Service()
+
+
+def make_client(mock_api_key, service, **kwargs):
+    return MetrifoxClient(api_key=mock_api_key, transport=MockTransport(service), **kwargs)
+
+
+class TestEntitlementSnapshot:
+    """Test the snapshot store"""
+
+    def test_staleness_limit(self):
+        clock = FakeClock()
+        snapshot = EntitlementSnapshot(max_age=60, clock=clock)
+        snapshot.update("cust_1", "seats", ACCESS)
+
+        access = snapshot.check_access({"customer_key": "cust_1", "feature_key": "seats"})
+        assert access["data"]["can_access"]
+        clock.now += 61
+        assert snapshot.check_access({"customer_key": "cust_1", "feature_key": "seats"}) is None
+        assert snapshot.prune() == 1
+
+    def test_requested_quantity_checked_against_balance(self):
+        snapshot = EntitlementSnapshot()
+        snapshot.update("cust_1", "seats", ACCESS)
+        response = snapshot.check_access(
+            {"customer_key": "cust_1", "feature_key": "seats", "requested_quantity": 5}
+        )
+        assert response["data"]["can_access"] is False
+
+    def test_requested_quantity_string(self):
+        snapshot = EntitlementSnapshot()
+        snapshot.update("cust_1", "seats", ACCESS)
+
+        def check(quantity):
+            request = {"customer_key": "cust_1", "feature_key": "seats"}
+            return snapshot.check_access({**request, "requested_quantity": quantity})
+
+        assert check("2")["data"]["can_access"] is True
+        assert check("5")["data"]["can_access"] is False
+        with pytest.raises(ValueError):
+            check("many")
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "snapshot.json")
+        snapshot = EntitlementSnapshot(path=path)
+        snapshot.update("cust_1", "seats", ACCESS)
+        snapshot.save()
+
+        restored = EntitlementSnapshot(path=path)
+        assert restored.get("cust_1", "seats")[0]["balance"] == 3
+
+
+class TestOfflineMode:
+    """Test serving and queueing while the meter service is down"""
+
+    def test_check_access_falls_back_to_snapshot(self, mock_api_key, service):
+        client = make_client(mock_api_key, service, snapshot=EntitlementSnapshot())
+        request = {"customer_key": "cust_1", "feature_key": "seats"}
+
+        assert "meta" not in client.usages.check_access(request)
+        service.up = False
+        response = client.usages.check_access(request, typed=True)
+
+        assert response.data.can_access is True
+        assert response.meta["source"] == "snapshot"
+
+    def test_unknown_entry_raises(self, mock_api_key, service):
+        service.up = False
+        client = make_client(mock_api_key, service, snapshot=EntitlementSnapshot())
+        with pytest.raises(TransportError):
+            client.usages.check_access({"customer_key": "cust_1", "feature_key": "seats"})
+
+    def test_client_errors_not_served_from_snapshot(self, mock_api_key):
+        snapshot = EntitlementSnapshot()
+        snapshot.update("cust_1", "seats", ACCESS)
+        transport = MockTransport(lambda request: TransportResponse(401, {}, b'{}'))
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport, snapshot=snapshot)
+        with pytest.raises(APIError):
+            client.usages.check_access({"customer_key": "cust_1", "feature_key": "seats"})
+
+    def test_usage_queued_and_replayed(self, mock_api_key, service, tmp_path):
+        queue = UsageReplayQueue(path=str(tmp_path / "usage.jsonl"))
+        client = make_client(mock_api_key, service, replay_queue=queue)
+        service.up = False
+
+        response = client.usages.record_usage(
+            {"customer_key": "cust_1", "event_name": "e", "event_id": "evt_1"}
+        )
+        client.usages.record_usage({"customer_key": "cust_1", "event_name": "e"})
+
+        assert response == {"message": "Event queued for replay"}
+        assert len(UsageReplayQueue(path=queue.path)) == 2
+
+        service.up = True
+        assert client.usages.replay_queued_usage() == 2
+        assert len(queue) == 0
+        assert service.events[0] == "usage-evt_1"
+        assert service.events[1]
+
+    def test_refresher_pulls_entitlement_summaries(self, mock_api_key, service):
+        snapshot = EntitlementSnapshot()
+        client = make_client(mock_api_key, service, snapshot=snapshot)
+
+        assert SnapshotRefresher(client, ["cust_1"]).refresh() == 2
+        assert snapshot.get("cust_1", "api_calls")[0]["can_access"] is True
+        assert snapshot.get("cust_1", "seats")[0]["can_access"] is False
+
+
+    def test_refresher_survives_errors(self, mock_api_key, service):
+        client = make_client(mock_api_key, service, snapshot=EntitlementSnapshot())
+        refresher = SnapshotRefresher(client, ["cust_1"], interval=0.01)
+        calls = []
+
+        def refresh():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            refresher._stopping.set()
+
+        refresher.refresh = refresh
+        refresher._run()
+        assert len(calls) == 2
+
+    def test_access_check_without_keys_not_snapshotted(self, mock_api_key, service):
+        snapshot = EntitlementSnapshot()
+        client = make_client(mock_api_key, service, snapshot=snapshot)
+        assert client.usages.check_access({"feature_key": "seats"})["data"]["can_access"]
+        assert len(snapshot) == 0
+
+    def test_full_replay_queue_compacted_occasionally(self, tmp_path):
+        path = tmp_path / "usage.jsonl"
+        queue = UsageReplayQueue(max_size=2, path=str(path), compact_every=3)
+        for i in range(4):
+            queue.append({"event_id": f"evt_{i}"})
+
+        # The two dropped events are still in the file but skipped on load
+        assert len(path.read_text().splitlines()) == 4
+        restored = UsageReplayQueue(max_size=2, path=str(path))
+        assert [event["event_id"] for event, _ in restored._events] == ["evt_2", "evt_3"]
+
+        queue.append({"event_id": "evt_4"})
+        assert len(path.read_text().splitlines()) == 2
+        assert queue.dropped == 3
+
+class TestPrefetch:
+    """Test bulk entitlement prefetch"""
+
+    def test_prefetch_by_customer_key(self, mock_api_key, service):
+        snapshot = EntitlementSnapshot(fresh_for=30)
+        client = make_client(mock_api_key, service, snapshot=snapshot, entitlements_cache_ttl=60)
+
+        summaries = client.subscriptions.prefetch_entitlements(
+            customer_keys=["cust_1", "cust_missing"]
+        )
+
+        assert list(summaries) == ["sub_1"]
+        service.up = False
+        # Served locally without the service
+        assert client.subscriptions.get_entitlements_summary("sub_1") == summaries["sub_1"]
+        access = client.usages.check_access({"customer_key": "cust_1", "feature_key": "api_calls"})
+        assert access["meta"]["source"] == "snapshot"
+
+    def test_prefetch_by_subscription_id(self, mock_api_key, service):
+        client = make_client(mock_api_key, service, entitlements_cache_ttl=60)
+        summaries = client.subscriptions.prefetch_entitlements(
+            ["sub_1", "sub_unknown"], max_workers=2
+        )
+        assert list(summaries) == ["sub_1"]
+
+    def test_recorded_usage_deducted(self, mock_api_key, service):
+        snapshot = EntitlementSnapshot(fresh_for=30)
+        client = make_client(mock_api_key, service, snapshot=snapshot)
+        snapshot.update("cust_1", "seats", ACCESS)
+
+        client.usages.record_usage(
+            {"customer_key": "cust_1", "feature_key": "seats", "event_id": "e", "amount": 3}
+        )
+
+        access = client.usages.check_access({"customer_key": "cust_1", "feature_key": "seats"})
+        assert access["data"]["can_access"] is False
+
+    def test_queued_usage_not_deducted(self, mock_api_key, service, tmp_path):
+        snapshot = EntitlementSnapshot()
+        queue = UsageReplayQueue()
+        client = make_client(mock_api_key, service, snapshot=snapshot, replay_queue=queue)
+        snapshot.update("cust_1", "seats", ACCESS)
+        service.up = False
+
+        client.usages.record_usage(
+            {"customer_key": "cust_1", "feature_key": "seats", "event_id": "e", "amount": 3}
+        )
+
+        assert len(queue) == 1
+        assert snapshot.get("cust_1", "seats")[0]["balance"] == 3
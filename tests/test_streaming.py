@@ -0,0 +1,129 @@
+"""
+Tests for streaming JSON decoding
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.base import BaseClient
+from metrifox_sdk.exceptions import APIError
+from metrifox_sdk.streaming import iter_json_items
+from metrifox_sdk.transport import MockTransport, RequestsTransport, TransportResponse
+
+CUSTOMERS = [
+    {"customer_key": f"cust_{i}", "name": "Zoë " * i, "balance": i * 1.5} for i in range(200)
+]
+PAGE = {"message": "ok", "data": CUSTOMERS + [12345, None], "meta": {"total": 202}}
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestIterJsonItems:
+    """Test the incremental decoder"""
+
+    @pytest.mark.parametrize("size", [1, 3, 64, 1 << 20])
+    def test_any_chunk_size(self, size):
+        body = json.dumps(PAGE, ensure_ascii=False, indent=1).encode()
+        assert list(iter_json_items(chunked(body, size))) == PAGE["data"]
+
+    def test_items_nested_in_data_object(self):
+        body = b'{"data": {"total": 2, "customers": [{"a": 1}, {"b": 2}], "other": [3]}}'
+        assert list(iter_json_items(chunked(body, 5), keys=("customers",))) == [{"a": 1}, {"b": 2}]
+
+    def test_items_yielded_before_body_ends(self):
+        def chunks():
+            yield b'{"data": [{"a": 1}, '
+            raise AssertionError("read past the first item")
+
+        assert next(iter_json_items(chunks())) == {"a": 1}
+
+    def test_large_item_decoded_in_few_attempts(self, monkeypatch):
+        import metrifox_sdk.streaming as streaming
+
+        attempts = []
+        decoder = streaming._decoder
+
+        class CountingDecoder:
+            def raw_decode(self, text, pos):
+                attempts.append(pos)
+                return decoder.raw_decode(text, pos)
+
+        monkeypatch.setattr(streaming, "_decoder", CountingDecoder())
+        item = {"notes": "x" * 1000000}
+        body = json.dumps({"data": [item]}).encode()
+
+        assert list(iter_json_items(chunked(body, 1024))) == [item]
+        assert len(attempts) < 30
+
+    @pytest.mark.parametrize("body", [b'{"data": [1, 2', b'{"data": [1 2]}', b'not json'])
+    def test_invalid_json(self, body):
+        with pytest.raises(ValueError):
+            list(iter_json_items([body]))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 404 if self.path.startswith("/missing") else 200
+        body = json.dumps(PAGE if status == 200 else {"message": "Not found"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunked(body, 1000):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestStreamItems:
+    """Test streaming list responses through the client"""
+
+    def test_requests_transport(self, api_url, mock_api_key):
+        client = BaseClient(mock_api_key, api_url, transport=RequestsTransport())
+        assert list(client.stream_items("customers", params={"per_page": 200})) == PAGE["data"]
+
+    def test_error_status_raises(self, api_url, mock_api_key):
+        client = BaseClient(mock_api_key, api_url, transport=RequestsTransport())
+        with pytest.raises(APIError) as excinfo:
+            list(client.stream_items("missing"))
+        assert excinfo.value.status_code == 404
+        assert "Not found" in str(excinfo.value)
+
+    def test_customers_list_stream(self, mock_api_key):
+        transport = MockTransport(
+            lambda request: TransportResponse(200, {}, json.dumps(PAGE).encode())
+        )
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        customers = client.customers.list({"per_page": 200}, typed=True, stream=True)
+
+        assert not transport.requests
+        keys = [customer.customer_key for customer in list(customers)[:200]]
+        assert keys == [c["customer_key"] for c in CUSTOMERS]
+        assert transport.requests[0].params == {"per_page": 200}
+
+    def test_stream_and_raw_rejected(self, mock_api_key):
+        client = MetrifoxClient(api_key=mock_api_key, transport=MockTransport())
+        with pytest.raises(ValueError):
+            client.customers.list(raw=True, stream=True)
+        with pytest.raises(ValueError):
+            client.subscriptions.get_billing_history("sub_1", raw=True, stream=True)
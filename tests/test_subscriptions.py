@@ -0,0 +1,106 @@
+"""
+Tests for the subscriptions module
+"""
+
+from datetime import date
+
+from metrifox_sdk import APIError, BillingHistoryEntry, MetrifoxClient
+from metrifox_sdk.serialization import JSONCodec
+from metrifox_sdk.transport import MockTransport, TransportResponse
+
+HISTORY = [
+    {"id": f"inv_{n}", "amount": n, "created_at": f"2025-0{n}-15T10:00:00Z"} for n in range(1, 8)
+]
+
+
+def paginated(request):
+    page, per_page = request.params["page"], request.params["per_page"]
+    entries = HISTORY[(page - 1) * per_page:page * per_page]
+    return TransportResponse(200, {}, JSONCodec().dumps({"data": entries}))
+
+
+class TestBillingHistoryIterator:
+    """Test streaming billing history"""
+
+    def test_pages_until_short_page(self, mock_api_key):
+        transport = MockTransport(paginated)
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        entries = list(client.subscriptions.iter_billing_history("sub_1", per_page=3))
+
+        assert [entry["id"] for entry in entries] == [entry["id"] for entry in HISTORY]
+        assert [request.params["page"] for request in transport.requests] == [1, 2, 3]
+
+    def test_is_lazy(self, mock_api_key):
+        transport = MockTransport(paginated)
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        iterator = client.subscriptions.iter_billing_history("sub_1", per_page=3, typed=True)
+        first = next(iterator)
+
+        assert isinstance(first, BillingHistoryEntry) and first.id == "inv_1"
+        assert len(transport.requests) == 1
+
+    def test_date_range(self, mock_api_key):
+        client = MetrifoxClient(api_key=mock_api_key, transport=MockTransport(paginated))
+        entries = client.subscriptions.iter_billing_history(
+            "sub_1", start_date="2025-02-15", end_date=date(2025, 4, 15), per_page=3
+        )
+        assert [entry["id"] for entry in entries] == ["inv_2", "inv_3", "inv_4"]
+
+    def test_unpaginated_response(self, mock_api_key):
+        transport = MockTransport(
+            lambda request: TransportResponse(200, {}, JSONCodec().dumps({"data": HISTORY}))
+        )
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        assert len(list(client.subscriptions.iter_billing_history("sub_1", per_page=7))) == 7
+        assert len(transport.requests) == 2
+
+    def test_stops_when_page_parameter_ignored(self, mock_api_key):
+        entries = [{"amount": n, "created_at": "2025-01-15T10:00:00Z"} for n in range(3)]
+        transport = MockTransport(
+            lambda request: TransportResponse(200, {}, JSONCodec().dumps({"data": entries}))
+        )
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        assert len(list(client.subscriptions.iter_billing_history("sub_1", per_page=3))) == 3
+        assert len(transport.requests) == 2
+
+
+class TestOverview:
+    """Test concurrent subscription overviews"""
+
+    @staticmethod
+    def handler(request):
+        part = request.url.rsplit("/", 1)[-1]
+        if "missing" in request.url:
+            return TransportResponse(404, {}, b'{"message":"Not found"}')
+        return TransportResponse(200, {}, JSONCodec().dumps({"data": {"part": part}}))
+
+    def test_overview_joins_parts(self, mock_api_key):
+        transport = MockTransport(self.handler)
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        overview = client.subscriptions.get_overview("sub_1")
+
+        assert overview["subscription_id"] == "sub_1"
+        assert overview["entitlements_summary"]["data"]["part"] == "entitlements-summary"
+        assert overview["entitlements_usage"]["data"]["part"] == "entitlements-usage"
+        assert overview["billing_history"]["data"]["part"] == "billing-history"
+        assert len(transport.requests) == 3
+
+    def test_overviews(self, mock_api_key):
+        client = MetrifoxClient(api_key=mock_api_key, transport=MockTransport(self.handler))
+
+        overviews = client.subscriptions.get_overviews(
+            ["sub_1", "sub_missing"],
+            include_billing_history=False,
+            return_exceptions=True,
+            typed=True,
+        )
+
+        usage = overviews["sub_1"]["entitlements_usage"]
+        assert usage.data.to_dict() == {"part": "entitlements-usage"}
+        assert "billing_history" not in overviews["sub_1"]
+        assert isinstance(overviews["sub_missing"]["entitlements_summary"], APIError)
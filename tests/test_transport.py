@@ -0,0 +1,173 @@
+"""
+Tests for HTTP transports
+"""
+
+import asyncio
+
+import pytest
+import requests
+from unittest.mock import MagicMock
+from metrifox_sdk import MetrifoxClient
+from metrifox_sdk.base import AsyncBaseClient, BaseClient
+from metrifox_sdk.exceptions import APIError, TransportError
+from metrifox_sdk.transport import (
+    AsyncMockTransport,
+    HTTP2Transport,
+    MockTransport,
+    RequestsTransport,
+    Transport,
+    TransportResponse,
+)
+
+
+class StaticTransport(Transport):
+    """Transport returning a fixed response and recording requests"""
+
+    def __init__(self, status_code=200, content=b'{"data":{}}'):
+        self.status_code = status_code
+        self.content = content
+        self.requests = []
+
+    def send(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return TransportResponse(self.status_code, {}, self.content)
+
+
+class TestTransports:
+    """Test transport selection and behaviour"""
+
+    def test_default_transport(self, mock_client):
+        """Test that requests is the default transport"""
+        assert isinstance(mock_client._main_client.transport, RequestsTransport)
+        assert mock_client._main_client.transport is not mock_client._meter_client.transport
+
+    def test_custom_transport_shared(self, mock_api_key):
+        """Test that a custom transport is used by both API clients"""
+        transport = StaticTransport()
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        client.customers.get("cust_1")
+        client.usages.check_access({"feature_key": "f", "customer_key": "cust_1"})
+
+        urls = [url for _, url, _ in transport.requests]
+        assert urls == [
+            "https://api.metrifox.com/api/v1/customers/cust_1",
+            "https://api-meter.metrifox.com/usage/access",
+        ]
+        assert transport.requests[0][2]["headers"]["x-api-key"] == mock_api_key
+
+    def test_multipart_upload_omits_content_type(self, mock_api_key):
+        """Test that file uploads let the transport set the multipart Content-Type"""
+        transport = StaticTransport()
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        client.post("customers/csv-upload", files={"csv": ("c.csv", b"a,b", "text/csv")})
+
+        kwargs = transport.requests[0][2]
+        assert "Content-Type" not in kwargs["headers"]
+        assert kwargs["headers"]["x-api-key"] == mock_api_key
+        assert kwargs["content"] is None
+
+    def test_error_status_raises_api_error(self, mock_api_key):
+        """Test that 4xx/5xx responses raise APIError"""
+        transport = StaticTransport(500, b'not json')
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        with pytest.raises(APIError) as exc_info:
+            client.get("customers")
+        assert exc_info.value.status_code == 500
+        assert "500 Internal Server Error" in str(exc_info.value)
+        assert exc_info.value.response_body == "not json"
+
+    def test_requests_transport_wraps_errors(self):
+        """Test that connection errors become TransportError"""
+        session = MagicMock()
+        session.request.side_effect = requests.exceptions.ConnectionError("refused")
+        transport = RequestsTransport(session)
+
+        with pytest.raises(TransportError) as exc_info:
+            transport.send("GET", "https://api.test.com/customers")
+        assert "Request failed" in str(exc_info.value)
+        assert isinstance(exc_info.value, APIError)
+
+
+class TestMockTransport:
+    """Test the in-memory transports"""
+
+    def test_records_and_answers_requests(self, mock_api_key):
+        """Test that requests are recorded and answered by the handler"""
+        transport = MockTransport(lambda request: TransportResponse(
+            200, {}, b'{"data":{"can_access":true}}'
+        ))
+        client = MetrifoxClient(api_key=mock_api_key, transport=transport)
+
+        access = client.usages.check_access({"feature_key": "f", "customer_key": "cust_1"})
+
+        assert access["data"]["can_access"] is True
+        assert len(transport.requests) == 1
+        assert transport.requests[0].method == "GET"
+        assert transport.requests[0].params == {"feature_key": "f", "customer_key": "cust_1"}
+
+    def test_handler_transport_error_is_connection_failure(self, mock_api_key):
+        """Test that handlers simulate connection failures with TransportError"""
+        client = BaseClient(
+            mock_api_key,
+            "https://api.test.com",
+            transport=MockTransport(lambda request: TransportError("connection reset"))
+        )
+        with pytest.raises(TransportError):
+            client.get("customers")
+
+    def test_handler_bugs_propagate(self, mock_api_key):
+        """Test that other handler exceptions are not turned into TransportError"""
+        def handler(request):
+            assert request.method == "POST"
+
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=MockTransport(handler))
+        with pytest.raises(AssertionError):
+            client.get("customers")
+
+    def test_async_client(self, mock_api_key):
+        """Test the async client over the async mock transport"""
+        transport = AsyncMockTransport(lambda request: TransportResponse(
+            201, {}, b'{"message":"Event received"}'
+        ))
+        client = AsyncBaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        async def record():
+            return await client.post("usage/events", json={"customer_key": "cust_1"})
+
+        assert asyncio.run(record()) == {"message": "Event received"}
+        assert transport.requests[0].content == b'{"customer_key":"cust_1"}'
+        assert transport.requests[0].headers["x-api-key"] == mock_api_key
+
+    def test_async_client_error(self, mock_api_key):
+        """Test that the async client raises APIError for error responses"""
+        transport = AsyncMockTransport(lambda request: TransportResponse(
+            404, {}, b'{"message":"Not found"}'
+        ))
+        client = AsyncBaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        with pytest.raises(APIError) as exc_info:
+            asyncio.run(client.get("customers/missing"))
+        assert exc_info.value.status_code == 404
+
+
+class TestHTTP2Transport:
+    """Test the httpx based HTTP/2 transport"""
+
+    def test_send(self, mock_api_key):
+        """Test requests through an httpx client"""
+        httpx = pytest.importorskip("httpx")
+        pytest.importorskip("h2")
+
+        def handler(request):
+            assert request.headers["x-api-key"] == mock_api_key
+            assert request.content == b'{"customer_key":"cust_1"}'
+            return httpx.Response(200, json={"message": "ok"})
+
+        transport = HTTP2Transport(client=httpx.Client(transport=httpx.MockTransport(handler)))
+        client = BaseClient(mock_api_key, "https://api.test.com", transport=transport)
+
+        assert client.post("customers/new", json={"customer_key": "cust_1"}) == {"message": "ok"}
+
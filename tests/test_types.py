@@ -0,0 +1,70 @@
+"""
+Tests for request types
+"""
+
+import pickle
+
+import pytest
+from metrifox_sdk.types import (
+    AccessCheckRequest,
+    CheckoutConfig,
+    CustomerCreateRequest,
+    CustomerListRequest,
+    UsageEventRequest,
+)
+
+
+class TestRequestTypes:
+    """Test slotted request types and their serialisation"""
+
+    def test_to_dict_skips_none(self):
+        """Test that None values are omitted"""
+        request = CustomerCreateRequest(
+            customer_key="cust_1",
+            customer_type="INDIVIDUAL",
+            primary_email="a@example.com",
+            first_name="Ada"
+        )
+        assert request.to_dict() == {
+            "customer_key": "cust_1",
+            "customer_type": "INDIVIDUAL",
+            "primary_email": "a@example.com",
+            "first_name": "Ada"
+        }
+        assert CustomerListRequest().to_dict() == {}
+
+    def test_usage_event_renames_amount(self):
+        """Test that amount is sent as quantity"""
+        request = UsageEventRequest(customer_key="cust_1", event_id="evt_1", amount=5)
+        data = request.to_dict()
+        assert data["quantity"] == 5
+        assert "amount" not in data
+
+    def test_to_dict_does_not_copy_metadata(self):
+        """Test that nested values are passed through without deep copies"""
+        metadata = {"source": "web_app"}
+        request = UsageEventRequest(customer_key="cust_1", event_id="evt_1", metadata=metadata)
+        assert request.to_dict()["metadata"] is metadata
+
+    def test_access_check_keeps_all_fields(self):
+        """Test that access checks always send every field"""
+        request = AccessCheckRequest(feature_key="feat", customer_key="cust_1")
+        assert request.to_dict() == {
+            "feature_key": "feat",
+            "customer_key": "cust_1",
+            "requested_quantity": 1
+        }
+
+    def test_slotted(self):
+        """Test that request types have no per-instance __dict__"""
+        request = CheckoutConfig(offering_key="premium_plan")
+        assert not hasattr(request, "__dict__")
+        with pytest.raises(AttributeError):
+            request.unknown = 1
+
+    def test_dataclass_behaviour_preserved(self):
+        """Test equality, repr and pickling"""
+        request = UsageEventRequest(customer_key="cust_1", event_id="evt_1")
+        assert request == UsageEventRequest(customer_key="cust_1", event_id="evt_1")
+        assert "evt_1" in repr(request)
+        assert pickle.loads(pickle.dumps(request)) == request